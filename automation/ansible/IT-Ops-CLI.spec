@@ -11,6 +11,8 @@ Uso:
 import os
 from pathlib import Path
 
+from PyInstaller.utils.hooks import collect_submodules
+
 block_cipher = None
 
 # Directorio base
@@ -22,6 +24,7 @@ datas = [
     (str(BASE_DIR / 'playbooks'), 'playbooks'),
     (str(BASE_DIR / 'roles'), 'roles'),
     (str(BASE_DIR / 'ansible.cfg'), '.'),
+    (str(BASE_DIR / 'plugins'), 'plugins'),
 ]
 
 # Hidden imports
@@ -52,6 +55,8 @@ hiddenimports = [
     'rich.align',
     'yaml',
 ]
+# cli/__init__.py importa sus módulos bajo demanda: incluirlos todos
+hiddenimports += collect_submodules('cli')
 
 a = Analysis(
     [str(BASE_DIR / 'app.py')],
@@ -2,29 +2,46 @@
 # -*- coding: utf-8 -*-
 """
 IT-Ops CLI - Herramienta de Automatización con Ansible
-"""
 
-import questionary
+Uso:
+    python app.py                      Menú interactivo
+    python app.py run <opción> [...]   Ejecución sin interacción (ver cli/headless.py)
+"""
 
-from cli import (
-    console,
-    logger,
-    check_environment,
-    clear_screen,
-    show_banner,
-    solicitar_vault_password,
-    mostrar_menu_categorias,
-    mostrar_menu_opciones,
-    ejecutar_opcion,
-)
+import sys
+import threading
 
 
 def main():
     """
     Función principal - Diseño minimalista mejorado.
     """
+    import questionary
+
+    from cli import (
+        console,
+        logger,
+        EXECUTION_BACKEND,
+        is_fork_server_available,
+        start_fork_server,
+        stop_fork_server,
+        close_winrm_sessions,
+        close_history,
+        clear_vault_cache,
+        check_environment,
+        clear_screen,
+        show_banner,
+        solicitar_vault_password,
+        mostrar_menu_categorias,
+        mostrar_menu_opciones,
+        ejecutar_opcion,
+    )
+
     try:
         check_environment()
+        if EXECUTION_BACKEND == "forkserver" and is_fork_server_available():
+            # Precargar ansible en segundo plano mientras se pide la password del vault
+            threading.Thread(target=start_fork_server, name="fork-server-start", daemon=True).start()
         vault_password = solicitar_vault_password()
         
         # Loop principal
@@ -43,39 +60,66 @@ def main():
                 continue
             
             if categoria.key == "HI":
-                from cli import mostrar_historial_sesion, history_get_entries
+                from cli import (
+                    mostrar_historial_sesion, mostrar_metricas_historial, solicitar_filtros_historial,
+                    history_get_entries, history_get_stats
+                )
                 try:
-                    mostrar_historial_sesion(history_get_entries())
+                    filtros = solicitar_filtros_historial()
+                    if filtros is None:
+                        continue
+                    if not filtros:
+                        mostrar_historial_sesion(history_get_entries())
+                    else:
+                        group_by = filtros.pop("group_by")
+                        mostrar_historial_sesion(history_get_entries(limit=100, **filtros))
+                        success = filtros.pop("success")
+                        mostrar_metricas_historial(
+                            history_get_stats(group_by=group_by, with_p95=True, **filtros), group_by
+                        )
+                        if success is not None:
+                            console.print("[dim]Las métricas incluyen ejecuciones exitosas y fallidas[/dim]")
                 except Exception as e:
                     console.print(f"[red]Error mostrando historial: {e}[/red]")
                     logger.error(f"Error mostrando historial: {e}", exc_info=True)
                 questionary.press_any_key_to_continue("Presione cualquier tecla para continuar...").ask()
                 continue
             elif categoria.key == "D":
-                from cli import task_get_all_tasks, mostrar_historial_sesion, ExecutionStats
+                from cli import (
+                    task_get_active_tasks, task_cancel_task, solicitar_tarea_a_cancelar,
+                    mostrar_historial_sesion, history_get_entries, winrm_pool_stats, task_get_memory_stats
+                )
                 try:
-                    all_tasks = task_get_all_tasks()
-                    if all_tasks:
-                        stats = []
-                        for task in all_tasks:
-                            if task.result:
-                                try:
-                                    stats.append(ExecutionStats(
-                                        timestamp=task.start_time.strftime("%H:%M:%S") if task.start_time else "-",
-                                        hostname=task.target or "N/A",
-                                        task_name=task.task_name or "N/A",
-                                        success=task.status == "SUCCESS",
-                                        duration=task.duration or 0
-                                    ))
-                                except Exception as e:
-                                    logger.error(f"Error procesando tarea {task.task_id}: {e}", exc_info=True)
-                                    continue
-                        if stats:
-                            mostrar_historial_sesion(stats)
-                        else:
-                            console.print("[yellow]No hay tareas con resultados disponibles[/yellow]")
+                    # Ejecuciones de esta sesión, desde el historial persistente
+                    entries = history_get_entries(session_only=True)
+                    if entries:
+                        mostrar_historial_sesion(entries, "📊 Ejecuciones de la Sesión Actual")
                     else:
-                        console.print("[yellow]No hay tareas registradas[/yellow]")
+                        console.print("[yellow]No hay tareas con resultados en esta sesión[/yellow]")
+
+                    pool = winrm_pool_stats()
+                    if pool["created"]:
+                        console.print(
+                            f"[dim]Sesiones WinRM: {pool['open']} abiertas ({pool['busy']} en uso), "
+                            f"{pool['created']} creadas, {pool['reused']} reutilizadas "
+                            f"({pool['reuse_rate']:.0%} de reutilización)[/dim]"
+                        )
+
+                    memory = task_get_memory_stats()
+                    console.print(
+                        f"[dim]Tareas en memoria: {memory['active']} activas, "
+                        f"{memory['finished']}/{memory['capacity']} terminadas "
+                        f"(~{memory['approx_bytes'] / 1024:.0f} KB, {memory['evicted']} descartadas del buffer)[/dim]"
+                    )
+
+                    # Cancelar tareas en cola o colgadas (libera el slot del worker)
+                    task_id = solicitar_tarea_a_cancelar(task_get_active_tasks())
+                    if task_id:
+                        cancelled = task_cancel_task(task_id)
+                        if cancelled:
+                            console.print(f"[yellow]Tarea(s) cancelada(s): {', '.join(cancelled)}[/yellow]")
+                        else:
+                            console.print("[dim]La tarea ya había terminado[/dim]")
                 except Exception as e:
                     console.print(f"[red]Error mostrando dashboard: {e}[/red]")
                     logger.error(f"Error mostrando dashboard: {e}", exc_info=True)
@@ -153,7 +197,19 @@ def main():
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]\n")
         raise
+    finally:
+        # Los playbooks corren en su propio grupo de procesos: detenerlos al salir
+        from cli.task_manager import cancel_all_tasks
+        cancel_all_tasks()
+        stop_fork_server()
+        close_winrm_sessions()
+        close_history()
+        # No dejar las credenciales descifradas en memoria más de lo necesario
+        clear_vault_cache()
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["run"]:
+        from cli.headless import main as run_headless
+        sys.exit(run_headless(sys.argv[2:]))
     main()
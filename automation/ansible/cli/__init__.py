@@ -5,92 +5,172 @@ cli/__init__.py
 IT-Ops CLI - Paquete principal (refactorizado con Clean Architecture).
 
 Wrappers de compatibilidad para mantener retrocompatibilidad con imports antiguos.
+
+Los nombres se importan recién cuando se usan (PEP 562): así el modo headless
+(cli/headless.py) usa el paquete sin cargar questionary ni los menús.
 """
 
+from importlib import import_module
+from typing import Any, Dict, Tuple
+
+# Nombre exportado -> (módulo relativo a cli, atributo)
+_EXPORTS: Dict[str, Tuple[str, str]] = {}
+
+
+def _export(module: str, *names: str, **aliases: str) -> None:
+    """Registra exportaciones: names con el mismo nombre, aliases como alias=atributo."""
+    for name in names:
+        _EXPORTS[name] = (module, name)
+    for alias, attr in aliases.items():
+        _EXPORTS[alias] = (module, attr)
+
+
 # ============================================================================
 # Shared (Configuración)
 # ============================================================================
-from .shared.config import BASE_DIR, console, logger, CUSTOM_STYLE
+_export(".shared.config", "BASE_DIR", "console", "logger", "CUSTOM_STYLE", "EXECUTION_BACKEND")
 
 # ============================================================================
 # Domain (Modelos)
 # ============================================================================
-from .domain.models import MenuOption, MenuCategory, ExecutionResult, HostSnapshot, ExecutionStats
-from .menu_data import MENU_CATEGORIES
+_export(
+    ".domain.models",
+    "MenuOption", "MenuCategory", "ExecutionResult", "HostSnapshot", "ExecutionStats", "HistoryAggregate"
+)
+_export(".menu_data", "MENU_CATEGORIES")
 
 # ============================================================================
 # Domain Services
 # ============================================================================
-from .domain.services.validation_service import check_environment, validate_hostname
+_export(".domain.services.validation_service", "check_environment", "validate_hostname")
 
 # ============================================================================
 # Infrastructure (Ansible)
 # ============================================================================
-from .infrastructure.ansible.playbook_executor import execute_playbook as _execute_playbook
-from .infrastructure.ansible.health_checker import check_host_online as _check_host_online, get_host_snapshot as _get_host_snapshot
-from .infrastructure.ansible.winrm_repair import repair_winrm_local
+_export(".infrastructure.ansible.winrm_repair", "repair_winrm_local")
+_export(".infrastructure.ansible.vault_manager", "clear_vault_cache")
+_export(
+    ".infrastructure.ansible.forkserver_executor",
+    "is_fork_server_available", "start_fork_server", "stop_fork_server"
+)
+_export(
+    ".infrastructure.remote.session_pool",
+    winrm_pool_stats="get_pool_stats", close_winrm_sessions="close_all_sessions"
+)
+
 
 # Wrappers de compatibilidad (usar nombres antiguos)
 def ejecutar_playbook(*args, **kwargs):
     """Wrapper de compatibilidad para execute_playbook."""
-    return _execute_playbook(*args, **kwargs)
+    from .infrastructure.ansible.playbook_executor import execute_playbook
+    return execute_playbook(*args, **kwargs)
 
 def check_online(*args, **kwargs):
     """Wrapper de compatibilidad para check_host_online."""
-    return _check_host_online(*args, **kwargs)
+    from .infrastructure.ansible.health_checker import check_host_online
+    return check_host_online(*args, **kwargs)
 
 def obtener_host_snapshot(*args, **kwargs):
     """Wrapper de compatibilidad para get_host_snapshot."""
-    return _get_host_snapshot(*args, **kwargs)
+    from .infrastructure.ansible.health_checker import get_host_snapshot
+    return get_host_snapshot(*args, **kwargs)
 
-# Intentar importar ejecutar_playbook_nueva_ventana
-try:
-    from .infrastructure.terminal.terminal_detector import execute_playbook_in_new_window as ejecutar_playbook_nueva_ventana
-except ImportError:
-    ejecutar_playbook_nueva_ventana = None
+# ejecutar_playbook_nueva_ventana: None si no hay soporte de terminal (ver __getattr__)
+_export(
+    ".infrastructure.terminal.terminal_detector",
+    ejecutar_playbook_nueva_ventana="execute_playbook_in_new_window"
+)
 
 # ============================================================================
 # Presentation (Display)
 # ============================================================================
-from .presentation.display.utils import clear_screen, show_banner, show_menu_summary
-from .presentation.display.general_formatters import (
-    mostrar_resultado, mostrar_host_snapshot, mostrar_historial_sesion,
-    mostrar_dashboard_ejecucion, guardar_reporte
+_export(".presentation.display.utils", "clear_screen", "show_banner", "show_menu_summary")
+_export(
+    ".presentation.display.general_formatters",
+    "mostrar_resultado", "mostrar_host_snapshot", "mostrar_historial_sesion",
+    "mostrar_metricas_historial", "mostrar_dashboard_ejecucion", "guardar_reporte"
 )
-from .presentation.display.hardware_formatters import (
-    mostrar_specs_tabla, mostrar_updates_resultado,
-    mostrar_bitlocker_status_tabla, mostrar_auditoria_salud
+_export(
+    ".presentation.display.hardware_formatters",
+    "mostrar_specs_tabla", "mostrar_updates_resultado",
+    "mostrar_bitlocker_status_tabla", "mostrar_auditoria_salud"
 )
-from .presentation.display.admin_formatters import (
-    mostrar_laps_resultado, mostrar_bitlocker_resultado,
-    mostrar_ad_info, mostrar_audit_groups_resultado
+_export(
+    ".presentation.display.admin_formatters",
+    "mostrar_laps_resultado", "mostrar_bitlocker_resultado",
+    "mostrar_ad_info", "mostrar_audit_groups_resultado"
 )
-from .presentation.display.monitoring_formatters import (
-    mostrar_metricas_resultado, mostrar_health_resultado
+_export(
+    ".presentation.display.monitoring_formatters",
+    "mostrar_metricas_resultado", "mostrar_health_resultado"
 )
 
 # ============================================================================
 # Presentation (CLI - Menus)
 # ============================================================================
-from .presentation.cli.menus import mostrar_menu_categorias, mostrar_menu_opciones
-from .presentation.cli.menu_handler import ejecutar_opcion
+_export(".presentation.cli.menus", "mostrar_menu_categorias", "mostrar_menu_opciones")
+_export(".presentation.cli.menu_handler", "ejecutar_opcion")
 
 # ============================================================================
 # Presentation (Prompts)
 # ============================================================================
-from .prompts import solicitar_hostname, solicitar_vault_password, interactive_confirm, solicitar_targets
+_export(
+    ".prompts",
+    "solicitar_hostname", "solicitar_vault_password", "interactive_confirm", "solicitar_targets",
+    "solicitar_tarea_a_cancelar", "solicitar_filtros_historial"
+)
 
 # ============================================================================
 # Legacy modules (mantener por compatibilidad)
 # ============================================================================
-from .history import add_entry as history_add_entry, get_entries as history_get_entries
-from .task_manager import (
-    add_task as task_add_task,
-    update_task as task_update_task,
-    get_active_tasks as task_get_active_tasks,
-    get_all_tasks as task_get_all_tasks,
-    get_task as task_get_task,
-    get_summary as task_get_summary,
-    TaskStatus
+_export(
+    ".history",
+    history_add_entry="add_entry",
+    history_get_entries="get_entries",
+    history_get_stats="get_stats",
+    history_get_last_success="get_last_success",
+    history_get_duration_percentile="get_duration_percentile"
+)
+_export(".infrastructure.persistence.history_store", "close_history")
+_export(
+    ".task_manager",
+    "TaskStatus",
+    task_add_task="add_task",
+    task_update_task="update_task",
+    task_get_active_tasks="get_active_tasks",
+    task_get_all_tasks="get_all_tasks",
+    task_get_task="get_task",
+    task_get_summary="get_summary",
+    task_cancel_task="cancel_task",
+    task_get_memory_stats="get_memory_stats",
+    task_get_panel_snapshot="get_panel_snapshot"
 )
-from .task_panel import get_task_panel, render_task_panel
+_export(".task_scheduler", "get_scheduler_stats", task_submit="submit")
+_export(".task_panel", "get_task_panel", "render_task_panel")
+_export(
+    ".shared.event_bus",
+    "TaskEvent",
+    events_subscribe="subscribe",
+    events_subscribe_queue="subscribe_queue"
+)
+
+__all__ = sorted(_EXPORTS) + ["ejecutar_playbook", "check_online", "obtener_host_snapshot"]
+
+
+def __getattr__(name: str) -> Any:
+    """Importa un nombre exportado la primera vez que se usa."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    try:
+        value = getattr(import_module(module, __name__), attr)
+    except ImportError:
+        if name != "ejecutar_playbook_nueva_ventana":
+            raise
+        value = None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+application/use_cases/ejecutar_batch.py
+=======================================
+Caso de uso: Ejecutar una opción del menú en batch multi-host.
+
+Registra una tarea por target y encola en el scheduler un único trabajo que
+ejecuta el playbook una sola vez para todos ellos (ocupa un solo slot); al
+terminar actualiza cada tarea y el historial con el resultado de su host.
+"""
+
+import uuid
+from typing import Optional, Dict, List
+
+from ...domain.models import MenuOption
+from ...shared.config import logger
+from .ejecutar_playbook import ejecutar_playbook_batch_use_case
+
+
+def ejecutar_batch_use_case(
+    opcion: MenuOption,
+    targets: List[str],
+    vault_password: Optional[str] = None,
+    extra_vars: Optional[Dict[str, str]] = None,
+    force_refresh: bool = False
+) -> List[None]:
+    """
+    Encola en segundo plano la ejecución batch de una opción.
+
+    Args:
+        opcion: La opción de menú a ejecutar
+        targets: Lista de hostnames (los repetidos, sin distinguir mayúsculas, se ejecutan una vez)
+        vault_password: Password del vault (opcional)
+        extra_vars: Variables extra para el playbook
+        force_refresh: Probar todos los targets aunque el cache de alcanzabilidad tenga resultado
+
+    Returns:
+        Lista de placeholders None (uno por target distinto, como en modo background)
+    """
+    from cli.task_manager import add_task as task_add_task, update_task as task_update_task
+    from cli.task_scheduler import submit as scheduler_submit, priority_for_action
+    from cli.history import add_entry as history_add_entry
+
+    # Un target repetido tendría una segunda tarea que el resultado por host
+    # nunca actualiza (quedaría QUEUED): se conserva la primera aparición
+    unique: Dict[str, str] = {}
+    for target_host in targets:
+        unique.setdefault(target_host.lower(), target_host)
+    if len(unique) < len(targets):
+        logger.info(f"Batch {opcion.key}: {len(targets) - len(unique)} targets repetidos omitidos")
+    targets = list(unique.values())
+
+    task_ids = {}
+    for target_host in targets:
+        task_ids[target_host] = str(uuid.uuid4())[:8]
+        task_add_task(
+            task_id=task_ids[target_host],
+            task_name=opcion.label,
+            target=target_host,
+            playbook=opcion.playbook,
+            status="QUEUED"
+        )
+
+    def execute_and_track():
+        try:
+            results = ejecutar_playbook_batch_use_case(
+                hostnames=targets,
+                playbook_path=opcion.playbook,
+                vault_password=vault_password,
+                extra_vars=extra_vars,
+                force_refresh=force_refresh
+            )
+            for target_host, task_id in task_ids.items():
+                result = results[target_host]
+                status = "SUCCESS" if result.success else "FAILED"
+                task_update_task(task_id, status, result, result.stderr if not result.success else None)
+                history_add_entry(target_host, opcion.label, result, opcion.key, opcion.playbook)
+        except Exception as e:
+            logger.error(f"Error en batch {opcion.key}: {e}", exc_info=True)
+            for task_id in task_ids.values():
+                task_update_task(task_id, "FAILED", error=str(e))
+
+    scheduler_submit(execute_and_track, list(task_ids.values()), priority_for_action(opcion.action_type))
+    return [None] * len(targets)
@@ -9,7 +9,6 @@ selección de modo de ejecución, y presentación de resultados.
 """
 
 import uuid
-import threading
 from typing import Optional, Dict, List
 
 import questionary
@@ -19,6 +18,8 @@ from ...shared.config import console, CUSTOM_STYLE, logger
 from ...infrastructure.logging.debug_logger import debug_logger
 from ..validators.script_validator import validate_powershell_script
 from .ejecutar_playbook import ejecutar_playbook_use_case
+from .ejecutar_batch import ejecutar_batch_use_case
+from ...infrastructure.ansible.command_builder import playbook_supports_batch
 
 
 def ejecutar_opcion_use_case(
@@ -26,7 +27,8 @@ def ejecutar_opcion_use_case(
     targets: List[str],
     vault_password: Optional[str] = None,
     extra_vars: Optional[Dict[str, str]] = None,
-    execution_mode: str = "normal"
+    execution_mode: str = "normal",
+    force_refresh: bool = False
 ) -> List[Optional[ExecutionResult]]:
     """
     Caso de uso para ejecutar una opción del menú.
@@ -36,13 +38,18 @@ def ejecutar_opcion_use_case(
         targets: Lista de hostnames donde ejecutar
         vault_password: Password del vault (opcional)
         extra_vars: Variables extra para el playbook
-        execution_mode: Modo de ejecución ("normal", "background", "new_window")
+        execution_mode: Modo de ejecución ("normal", "background", "batch", "new_window")
+        force_refresh: Ejecutar aunque el fact store tenga datos vigentes de los targets
         
     Returns:
-        Lista de resultados (None para background)
+        Lista de resultados (None para background y batch)
     """
+    if execution_mode == "batch":
+        return ejecutar_batch_use_case(opcion, targets, vault_password, extra_vars, force_refresh)
+    
     from ...infrastructure.terminal.terminal_detector import execute_playbook_in_new_window
     from cli.task_manager import add_task as task_add_task, update_task as task_update_task
+    from cli.task_scheduler import submit as scheduler_submit, priority_for_action
     from cli.history import add_entry as history_add_entry
     
     results = []
@@ -50,12 +57,13 @@ def ejecutar_opcion_use_case(
     for target_host in targets:
         task_id = str(uuid.uuid4())[:8]
         
-        # Registrar tarea
+        # Registrar tarea (en background espera en la cola del scheduler)
         task_add_task(
             task_id=task_id,
             task_name=opcion.label,
             target=target_host if target_host else "N/A",
-            playbook=opcion.playbook
+            playbook=opcion.playbook,
+            status="QUEUED" if execution_mode == "background" else "RUNNING"
         )
         
         if execution_mode == "new_window":
@@ -68,8 +76,8 @@ def ejecutar_opcion_use_case(
                 )
                 results.append(result)
         elif execution_mode == "background":
-            # Ejecutar en background (thread)
-            def execute_and_track():
+            # Ejecutar en background (pool de workers del scheduler)
+            def execute_and_track(task_id=task_id, target_host=target_host):
                 debug_logger.log(
                     "application/use_cases/ejecutar_opcion.py:59",
                     "Thread background INICIO",
@@ -86,20 +94,20 @@ def ejecutar_opcion_use_case(
                         playbook_path=opcion.playbook,
                         vault_password=vault_password,
                         extra_vars=extra_vars,
-                        show_progress=False
+                        show_progress=False,
+                        force_refresh=force_refresh
                     )
                     
                     status = "SUCCESS" if result.success else "FAILED"
                     task_update_task(task_id, status, result, result.stderr if not result.success else None)
                     
                     if target_host:
-                        history_add_entry(target_host, opcion.label, result)
+                        history_add_entry(target_host, opcion.label, result, opcion.key, opcion.playbook)
                 except Exception as e:
                     logger.error(f"Error en thread {task_id}: {e}", exc_info=True)
                     task_update_task(task_id, "FAILED", error=str(e))
             
-            thread = threading.Thread(target=execute_and_track, daemon=True)
-            thread.start()
+            scheduler_submit(execute_and_track, [task_id], priority_for_action(opcion.action_type))
             results.append(None)  # Placeholder para background
         else:
             # Ejecución normal
@@ -127,7 +135,8 @@ def ejecutar_opcion_use_case(
                     vault_password=vault_password,
                     extra_vars=extra_vars,
                     show_progress=True,
-                    interactive=(opcion.key == "C1")
+                    interactive=(opcion.key == "C1"),
+                    force_refresh=force_refresh
                 )
                 
                 debug_logger.log_function_result(
@@ -145,7 +154,7 @@ def ejecutar_opcion_use_case(
                 results.append(result)
                 
                 if target_host:
-                    history_add_entry(target_host, opcion.label, result)
+                    history_add_entry(target_host, opcion.label, result, opcion.key, opcion.playbook)
             except Exception as e:
                 debug_logger.log(
                     "application/use_cases/ejecutar_opcion.py:124",
@@ -199,15 +208,16 @@ def determinar_modo_ejecucion(
         can_new_window: Si está disponible ejecutar en nueva ventana
         
     Returns:
-        Modo de ejecución: "normal", "background", o "new_window"
+        Modo de ejecución: "normal", "background", "batch" o "new_window"
     """
     # Nueva ventana para consola remota
     if can_new_window and opcion.can_new_window and opcion.key == "C1":
         return "new_window"
     
-    # Múltiples targets siempre en background
+    # Múltiples targets siempre en segundo plano: batch (un solo ansible-playbook)
+    # si el playbook lo soporta, sino un proceso por target
     if len(targets) > 1:
-        return "background"
+        return "batch" if playbook_supports_batch(opcion.playbook) else "background"
     
     # Para read-only, preguntar al usuario
     if opcion.can_background and opcion.action_type == "read-only":
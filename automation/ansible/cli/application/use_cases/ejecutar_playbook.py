@@ -5,13 +5,17 @@ application/use_cases/ejecutar_playbook.py
 Caso de uso: Ejecutar playbook.
 
 Orquesta la validación, construcción de inventario y ejecución de un playbook de Ansible.
+Los playbooks que alimentan el fact store (specs, inventario unificado) se
+responden desde ahí mientras sus datos estén vigentes.
 """
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from ...domain.models import ExecutionResult
 from ...domain.services.validation_service import validate_hostname
 from ...infrastructure.ansible.playbook_executor import execute_playbook
+from ...infrastructure.ansible.batch_executor import execute_playbook_batch
+from ...infrastructure.ansible.fact_store import cached_playbook_result, record_playbook_result
 
 
 def ejecutar_playbook_use_case(
@@ -20,7 +24,8 @@ def ejecutar_playbook_use_case(
     vault_password: Optional[str] = None,
     extra_vars: Optional[Dict[str, str]] = None,
     show_progress: bool = True,
-    interactive: bool = False
+    interactive: bool = False,
+    force_refresh: bool = False
 ) -> ExecutionResult:
     """
     Caso de uso para ejecutar un playbook de Ansible.
@@ -34,16 +39,24 @@ def ejecutar_playbook_use_case(
         extra_vars: Variables extra para el playbook
         show_progress: Mostrar barra de progreso con Rich
         interactive: Si es True, no captura output para permitir interacción
+        force_refresh: Ejecutar aunque el fact store tenga datos vigentes
         
     Returns:
         ExecutionResult: Objeto con los resultados de la ejecución
+            (con cached_at si salió del fact store)
     """
     # Validar hostname
     if not validate_hostname(hostname):
         return ExecutionResult(False, None, "", "Hostname inválido", 1)
     
+    # Con variables extra el resultado puede diferir del guardado
+    if not force_refresh and not extra_vars and not interactive:
+        cached = cached_playbook_result(hostname, playbook_path)
+        if cached:
+            return cached
+    
     # Delegar ejecución al executor de infrastructure
-    return execute_playbook(
+    result = execute_playbook(
         hostname=hostname,
         playbook_path=playbook_path,
         vault_password=vault_password,
@@ -51,3 +64,60 @@ def ejecutar_playbook_use_case(
         show_progress=show_progress,
         interactive=interactive
     )
+    if not extra_vars:
+        record_playbook_result(hostname, playbook_path, result)
+    return result
+
+
+def ejecutar_playbook_batch_use_case(
+    hostnames: List[str],
+    playbook_path: str,
+    vault_password: Optional[str] = None,
+    extra_vars: Optional[Dict[str, str]] = None,
+    force_refresh: bool = False,
+    max_forks: Optional[int] = None
+) -> Dict[str, ExecutionResult]:
+    """
+    Caso de uso para ejecutar un playbook en varios hosts con una sola invocación.
+    
+    Los hostnames inválidos no se incluyen en el batch y reciben un resultado fallido.
+    
+    Args:
+        hostnames: Lista de hostnames
+        playbook_path: Ruta al playbook relativa a playbooks/
+        vault_password: Password del vault (opcional)
+        extra_vars: Variables extra para el playbook
+        force_refresh: Probar todos los hosts aunque el cache de alcanzabilidad tenga
+            resultado y ejecutar aunque el fact store tenga datos vigentes
+        max_forks: Paralelismo máximo de Ansible (None = ITOPS_BATCH_MAX_FORKS)
+        
+    Returns:
+        Dict hostname -> ExecutionResult
+    """
+    results = {}
+    valid_hosts = []
+    for hostname in hostnames:
+        if not validate_hostname(hostname):
+            results[hostname] = ExecutionResult(False, None, "", "Hostname inválido", 1)
+            continue
+        # Los hosts con datos vigentes en el fact store no entran al batch
+        cached = None if force_refresh or extra_vars else cached_playbook_result(hostname, playbook_path)
+        if cached:
+            results[hostname] = cached
+        else:
+            valid_hosts.append(hostname)
+    
+    if valid_hosts:
+        batch_results = execute_playbook_batch(
+            hostnames=valid_hosts,
+            playbook_path=playbook_path,
+            vault_password=vault_password,
+            extra_vars=extra_vars,
+            force_refresh=force_refresh,
+            max_forks=max_forks
+        )
+        if not extra_vars:
+            for hostname, result in batch_results.items():
+                record_playbook_result(hostname, playbook_path, result)
+        results.update(batch_results)
+    return results
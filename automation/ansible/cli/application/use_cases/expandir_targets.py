@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+application/use_cases/expandir_targets.py
+=========================================
+Caso de uso: Expandir una expresión de targets a una lista de hostnames.
+
+Una expresión es una lista de términos separados por espacios, comas o
+saltos de línea (# comenta hasta el fin de la línea, las comillas agrupan):
+
+    CIT-NB-01                     hostname, FQDN o IP
+    CIT-NB-*                      glob sobre los equipos del directorio
+    @hosts.txt                    archivo con más términos (puede anidar)
+    csv:inventario.csv:Hostname   columna de un CSV (nombre o número; default la primera)
+    ou:OU=Notebooks,DC=corp,DC=local   equipos de la OU y sus sub-OUs
+    cidr:10.1.0.0/22              equipos con IP conocida dentro de la red
+
+Como en los patrones de hosts de Ansible, "&término" intersecta y
+"!término" excluye; se aplican después de sumar los demás términos, sin
+importar el orden. Ej: "ou:OU=Notebooks,DC=corp,DC=local &CIT-* !@baja.txt".
+
+Globs, OUs y redes se resuelven contra datos locales, sin consultar al DC ni
+al DNS: el cache del directorio (directory_cache, solo equipos habilitados)
+y, para las redes, también las IPs del cache de DNS y de alcanzabilidad.
+"""
+
+import csv
+import fnmatch
+import ipaddress
+import re
+import shlex
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ...domain.models import TargetExpansion
+from ...shared.config import logger, INVOCATION_DIR
+from ...shared.exceptions import ValidationError
+from ...infrastructure.persistence.directory_cache import DirectoryIndex, get_directory
+
+# Anidamiento máximo de @archivo (evita ciclos como a.txt -> @b.txt -> @a.txt)
+MAX_INCLUDE_DEPTH = 4
+
+# Caracteres de glob
+_GLOB_CHARS = "*?["
+
+_HOSTNAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Separa una expresión en términos (los ou: conservan sus comas)."""
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ""
+    tokens = []
+    try:
+        raw_tokens = list(lexer)
+    except ValueError as e:
+        raise ValidationError(f"Expresión de targets inválida: {e}") from e
+    for token in raw_tokens:
+        if token.lower().startswith("ou:") or token[:4].lower() in ("!ou:", "&ou:"):
+            tokens.append(token)
+        else:
+            tokens.extend(part for part in token.split(",") if part)
+    return tokens
+
+
+def _resolve_path(path: str, base_dir: Path) -> Path:
+    resolved = Path(path).expanduser()
+    return resolved if resolved.is_absolute() else base_dir / resolved
+
+
+class _Expander:
+    """Evalúa términos contra el directorio y los caches de direcciones."""
+
+    def __init__(self, directory: DirectoryIndex, base_dir: Path):
+        self.directory = directory
+        self.base_dir = base_dir
+        self.unmatched: List[str] = []
+        self.invalid: List[str] = []
+        self._addresses: Optional[List[Tuple[ipaddress.IPv4Address, str]]] = None
+
+    def canonical(self, value: str) -> Optional[str]:
+        """Hostname canónico (nombre del directorio o en mayúsculas), IP normalizada o None si no es válido."""
+        value = value.strip().rstrip(".")
+        if not value:
+            return None
+        try:
+            return str(ipaddress.ip_address(value))
+        except ValueError:
+            pass
+        if not _HOSTNAME_RE.match(value) or value.lower() == "all":
+            self.invalid.append(value)
+            return None
+        return self.directory.canonical_name(value) or value.upper()
+
+    def evaluate(self, text: str, depth: int = 0) -> List[str]:
+        """Hosts de una expresión: unión de los términos, luego intersecciones y exclusiones."""
+        included: Dict[str, None] = {}
+        intersections: List[Set[str]] = []
+        excluded: Set[str] = set()
+        for token in _tokenize(text):
+            operator, term = (token[0], token[1:]) if token[0] in "!&" else ("", token)
+            hosts = self.term(term, depth) if term else []
+            if not hosts:
+                self.unmatched.append(token)
+            if operator == "&":
+                intersections.append(set(hosts))
+            elif operator == "!":
+                excluded.update(hosts)
+            else:
+                included.update(dict.fromkeys(hosts))
+        hosts = list(included)
+        if intersections:
+            common = set.intersection(*intersections)
+            hosts = [host for host in hosts if host in common]
+        if excluded:
+            hosts = [host for host in hosts if host not in excluded]
+        return hosts
+
+    def term(self, term: str, depth: int) -> List[str]:
+        """Hosts de un término."""
+        prefix, sep, value = term.partition(":")
+        source = prefix.lower() if sep else ""
+        if term.startswith("@"):
+            return self.include(term[1:], depth)
+        if source == "csv":
+            return self.csv_column(value)
+        if source == "ou":
+            return self.organizational_unit(value)
+        if source == "cidr":
+            return self.network(value)
+        if any(char in term for char in _GLOB_CHARS):
+            return self.glob(term)
+        if sep and not _is_ipv6(term):
+            raise ValidationError(f"Origen de targets desconocido: {prefix}: (usar @, csv:, ou: o cidr:)")
+        host = self.canonical(term)
+        return [host] if host else []
+
+    def include(self, path: str, depth: int) -> List[str]:
+        if depth >= MAX_INCLUDE_DEPTH:
+            raise ValidationError(f"Demasiados @archivo anidados (máximo {MAX_INCLUDE_DEPTH}): @{path}")
+        file_path = _resolve_path(path, self.base_dir)
+        try:
+            text = file_path.read_text(encoding="utf-8-sig")
+        except OSError as e:
+            raise ValidationError(f"No se pudo leer {file_path}: {e.strerror or e}") from e
+        return self.evaluate(text, depth + 1)
+
+    def csv_column(self, value: str) -> List[str]:
+        # La columna va después del último ":" (salvo que sea parte de la ruta, ej: C:\\x.csv)
+        path, sep, column = value.rpartition(":")
+        if not sep or len(path) <= 1 or "/" in column or "\\" in column:
+            path, column = value, ""
+        file_path = _resolve_path(path, self.base_dir)
+        try:
+            with open(file_path, encoding="utf-8-sig", newline="") as f:
+                lines = [line for line in f if not line.startswith("#TYPE")]
+        except OSError as e:
+            raise ValidationError(f"No se pudo leer {file_path}: {e.strerror or e}") from e
+        if not lines:
+            return []
+        try:
+            dialect = csv.Sniffer().sniff("".join(lines[:20]), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = csv.reader(lines, dialect=dialect)
+        header = [cell.strip().lower() for cell in next(rows)]
+
+        if not column:
+            position = 0
+        elif column.isdigit():
+            position = int(column) - 1
+        elif column.strip().lower() in header:
+            position = header.index(column.strip().lower())
+        else:
+            raise ValidationError(f"{file_path.name} no tiene la columna {column!r} (columnas: {', '.join(header)})")
+        if not 0 <= position < len(header):
+            raise ValidationError(f"{file_path.name} tiene {len(header)} columnas: no existe la columna {column}")
+
+        hosts = []
+        for row in rows:
+            if position < len(row):
+                host = self.canonical(row[position])
+                if host:
+                    hosts.append(host)
+        return hosts
+
+    def organizational_unit(self, dn: str) -> List[str]:
+        if "=" not in dn:
+            raise ValidationError(f"ou: espera un DN (ej: ou:OU=Notebooks,DC=corp,DC=local), no {dn!r}")
+        return self._enabled(self.directory.in_container(dn))
+
+    def network(self, value: str) -> List[str]:
+        try:
+            network = ipaddress.IPv4Network(value.strip(), strict=False)
+        except ValueError as e:
+            raise ValidationError(f"Red inválida en cidr:{value}: {e}") from e
+        hosts = dict.fromkeys(self._enabled(self.directory.in_network(network)))
+        for address, host in self._cached_addresses():
+            if address in network:
+                hosts.setdefault(self.directory.canonical_name(host) or host.upper())
+        return list(hosts)
+
+    def glob(self, pattern: str) -> List[str]:
+        pattern = pattern.upper()
+        prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        candidates = self.directory.with_prefix(prefix)
+        if pattern != prefix + "*":
+            match = re.compile(fnmatch.translate(pattern)).match
+            candidates = [name for name in candidates if match(name)]
+        return self._enabled(candidates)
+
+    def _enabled(self, names: List[str]) -> List[str]:
+        disabled = self.directory.disabled
+        return [name for name in names if name not in disabled] if disabled else names
+
+    def _cached_addresses(self) -> List[Tuple[ipaddress.IPv4Address, str]]:
+        """IPs conocidas por el cache de DNS y el de alcanzabilidad (se leen una vez por expansión)."""
+        if self._addresses is None:
+            from ...infrastructure.ansible.network_resolver import cached_addresses
+            from ...infrastructure.ansible.reachability_cache import known_addresses
+
+            known = {**known_addresses(), **cached_addresses()}
+            self._addresses = []
+            for host, address in known.items():
+                if _is_ip(host):
+                    continue
+                try:
+                    self._addresses.append((ipaddress.IPv4Address(address), host))
+                except ValueError:
+                    pass
+        return self._addresses
+
+
+def _is_ip(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_ipv6(value: str) -> bool:
+    return ":" in value and _is_ip(value)
+
+
+def expandir_targets_use_case(expression: str, base_dir: Optional[Path] = None) -> TargetExpansion:
+    """
+    Expande una expresión de targets (ver el docstring del módulo).
+
+    Args:
+        expression: Expresión (ej: "ou:OU=Notebooks,DC=corp,DC=local !CIT-NB-9*")
+        base_dir: Directorio de las rutas relativas de @archivo y csv: (default: INVOCATION_DIR)
+
+    Returns:
+        TargetExpansion con los hosts canónicos sin duplicados
+
+    Raises:
+        ValidationError: Si un archivo no se puede leer, una red o columna no
+            existe o un término usa un origen desconocido
+    """
+    start = time.time()
+    directory = get_directory()
+    expander = _Expander(directory, base_dir or INVOCATION_DIR)
+    hosts = expander.evaluate(expression)
+    logger.info(
+        f"Targets: {len(hosts)} hosts expandidos en {(time.time() - start) * 1000:.1f} ms "
+        f"(directorio: {len(directory)} equipos)"
+    )
+    return TargetExpansion(
+        hosts=hosts,
+        unmatched=expander.unmatched,
+        invalid=list(dict.fromkeys(expander.invalid)),
+        directory_size=len(directory),
+    )
@@ -8,9 +8,11 @@ Contiene:
 - MenuOption: Una opción de menú
 - MenuCategory: Una categoría de menú
 - ExecutionResult: Resultado de ejecución de playbook
+- HistoryAggregate: Métricas agregadas del historial
+- TargetExpansion: Hosts resultantes de una expresión de targets
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, Dict, List, Any
 
 
@@ -64,12 +66,13 @@ class MenuCategory:
 
 @dataclass
 class HostSnapshot:
-    """Información rápida del host"""
+    """Información rápida del host (cached_at: timestamp si salió del fact store)"""
     hostname: str
     user: str
     os: str
     disk_free: float
     disk_total: float
+    cached_at: Optional[float] = None
 
 @dataclass
 class ExecutionResult:
@@ -83,6 +86,10 @@ class ExecutionResult:
         stderr: Salida de error
         returncode: Código de retorno del proceso
         duration: Tiempo de ejecución en segundos
+        cached_at: Timestamp de recolección si el resultado salió del fact store
+            (None si se ejecutó ahora)
+        lazy_fields: Campos descargados a disco (data/stdout) -> handle con load();
+            se cargan recién cuando se accede al campo (ver blob_store.spill_result)
     """
     success: bool
     data: Optional[Dict[str, Any]]
@@ -90,6 +97,15 @@ class ExecutionResult:
     stderr: str
     returncode: int
     duration: float = 0.0
+    cached_at: Optional[float] = None
+    lazy_fields: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def __getattr__(self, name: str) -> Any:
+        # Solo se llama si el atributo no está en la instancia (campo descargado)
+        lazy_fields = self.__dict__.get("lazy_fields")
+        if lazy_fields and name in lazy_fields:
+            return lazy_fields[name].load()
+        raise AttributeError(name)
 
 @dataclass
 class ExecutionStats:
@@ -99,3 +115,58 @@ class ExecutionStats:
     task_name: str
     success: bool
     duration: float
+
+
+@dataclass
+class HistoryAggregate:
+    """
+    Métricas agregadas del historial para un grupo (opción, host, sitio o día).
+
+    Attributes:
+        key: Valor del grupo (ej: "H1", "PC-0001", "2026-10-17")
+        runs: Ejecuciones
+        failures: Ejecuciones fallidas
+        cached_runs: Resultados servidos desde el fact store (sin duración)
+        total_duration: Suma de duraciones en segundos
+        max_duration: Duración máxima en segundos
+        last_finished_at: Timestamp de la última ejecución
+        last_success_at: Timestamp de la última ejecución exitosa (None si no hubo)
+        p95_duration: Percentil 95 de duración (None si no se calculó)
+    """
+    key: str
+    runs: int = 0
+    failures: int = 0
+    cached_runs: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_finished_at: float = 0.0
+    last_success_at: Optional[float] = None
+    p95_duration: Optional[float] = None
+
+    @property
+    def failure_rate(self) -> float:
+        """Proporción de ejecuciones fallidas (0..1)."""
+        return self.failures / self.runs if self.runs else 0.0
+
+    @property
+    def avg_duration(self) -> float:
+        """Duración promedio de las ejecuciones reales (sin las del fact store)."""
+        executed = self.runs - self.cached_runs
+        return self.total_duration / executed if executed else 0.0
+
+
+@dataclass
+class TargetExpansion:
+    """
+    Resultado de expandir una expresión de targets.
+
+    Attributes:
+        hosts: Hostnames canónicos, sin duplicados y en el orden en que aparecieron
+        unmatched: Términos que no aportaron ningún host (ej: un glob sin coincidencias)
+        invalid: Valores descartados por no ser hostnames ni IPs válidos
+        directory_size: Equipos en el cache del directorio (0 = no hay cache)
+    """
+    hosts: List[str] = field(default_factory=list)
+    unmatched: List[str] = field(default_factory=list)
+    invalid: List[str] = field(default_factory=list)
+    directory_size: int = 0
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+cli/headless.py
+===============
+Modo no interactivo: ejecuta una opción del menú sobre una lista de targets.
+
+    python app.py run H15 --targets-file hosts.txt --concurrency 50 --output results.jsonl
+
+No hace ninguna pregunta ni importa questionary ni los menús (arranca rápido
+y sirve para cron o tareas programadas). Cada resultado se escribe apenas
+está disponible como una línea JSON y queda en el historial como cualquier
+ejecución del menú. Los playbooks aptos para batch corren en tandas de
+--chunk-size hosts con --concurrency forks; el resto, un ansible-playbook por
+host con --concurrency en paralelo.
+
+Códigos de salida: EXIT_OK, EXIT_PARTIAL, EXIT_FAILED, EXIT_USAGE,
+EXIT_ENVIRONMENT y EXIT_INTERRUPTED.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, TextIO
+
+from .shared.config import BASE_DIR, INVOCATION_DIR, logger, BATCH_MAX_FORKS
+from .shared.cancellation import CancelToken, activate
+from .domain.models import MenuOption, ExecutionResult
+from .menu_data import MENU_CATEGORIES
+
+# Códigos de salida
+EXIT_OK = 0            # Todos los targets terminaron bien
+EXIT_PARTIAL = 1       # Algunos targets fallaron
+EXIT_FAILED = 2        # Fallaron todos los targets
+EXIT_USAGE = 64        # Argumentos inválidos u opción no ejecutable sin interacción
+EXIT_ENVIRONMENT = 69  # Faltan ansible / ansible-playbook en el PATH
+EXIT_INTERRUPTED = 130 # Cancelado con Ctrl+C
+
+# Opciones que necesitan una terminal o confirmaciones interactivas
+INTERACTIVE_OPTIONS = ("C1",)
+INTERACTIVE_INPUTS = ("custom_script",)
+
+# Tandas de un batch: --concurrency x CHUNK_WAVES hosts por ansible-playbook
+CHUNK_WAVES = 4
+
+
+class UsageError(Exception):
+    """Argumentos que impiden ejecutar (se informa y sale con EXIT_USAGE)."""
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """argparse sale con 2 ante un error, que acá significa "fallaron todos los targets"."""
+
+    def error(self, message: str):
+        raise UsageError(message)
+
+
+def find_option(key: str) -> Optional[MenuOption]:
+    """
+    Busca una opción del menú por su clave (sin distinguir mayúsculas).
+
+    Args:
+        key: Clave de la opción (ej: "H15")
+
+    Returns:
+        MenuOption o None si no existe
+    """
+    key = key.strip().upper()
+    for category in MENU_CATEGORIES:
+        for option in category.options:
+            if option.key.upper() == key:
+                return option
+    return None
+
+
+def read_targets(targets_file: Optional[str], targets: Optional[str]) -> List[str]:
+    """
+    Expande los targets de un archivo y/o de una expresión (ver expandir_targets_use_case).
+
+    Args:
+        targets_file: Archivo con hostnames o términos, uno o varios por línea ("-" = stdin)
+        targets: Expresión de targets (ej: "CIT-NB-*,!CIT-NB-0001" o "ou:OU=...")
+
+    Returns:
+        Hostnames canónicos, sin duplicados y en el orden original
+
+    Raises:
+        UsageError: Si la expresión no se puede expandir
+    """
+    from .application.use_cases.expandir_targets import expandir_targets_use_case
+    from .shared.exceptions import ValidationError
+
+    expression = []
+    if targets_file == "-":
+        expression.append(sys.stdin.read())
+    elif targets_file:
+        expression.append(f'"@{targets_file}"')
+    if targets:
+        expression.append(targets)
+    try:
+        expansion = expandir_targets_use_case("\n".join(expression))
+    except ValidationError as e:
+        raise UsageError(str(e)) from e
+    if expansion.invalid:
+        print(f"Descartados (no son hostnames válidos): {', '.join(expansion.invalid)}", file=sys.stderr)
+    if expansion.unmatched:
+        print(f"Sin coincidencias: {', '.join(expansion.unmatched)}", file=sys.stderr)
+    return expansion.hosts
+
+
+def read_vault_password(path: Optional[str]) -> Optional[str]:
+    """
+    Password del vault: archivo indicado, ITOPS_VAULT_PASSWORD o .vault_pass.
+
+    Args:
+        path: Archivo con la password (None = buscar en el entorno y .vault_pass)
+
+    Returns:
+        Password o None si no hay ninguna
+    """
+    if path:
+        with open(INVOCATION_DIR / path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    if os.environ.get("ITOPS_VAULT_PASSWORD"):
+        return os.environ["ITOPS_VAULT_PASSWORD"]
+    vault_pass_file = BASE_DIR / ".vault_pass"
+    if vault_pass_file.exists():
+        return vault_pass_file.read_text().strip() or None
+    return None
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = _ArgumentParser(
+        prog="app.py run",
+        description="Ejecuta una opción del menú sin interacción y escribe un resultado JSON por línea."
+    )
+    parser.add_argument("option", help="Clave de la opción del menú (ej: H15)")
+    parser.add_argument("--targets-file", help="Archivo con hostnames o términos (uno o varios por línea, - = stdin)")
+    parser.add_argument(
+        "--targets",
+        help="Hostnames o expresión de targets (globs, @archivo, csv:, ou:, cidr:, &intersección, !exclusión)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=BATCH_MAX_FORKS,
+        help=f"Hosts en paralelo (default: {BATCH_MAX_FORKS})"
+    )
+    parser.add_argument("--chunk-size", type=int, help=f"Hosts por ansible-playbook en batch (default: concurrency x {CHUNK_WAVES})")
+    parser.add_argument("--output", default="-", help="Archivo JSONL de resultados (default: stdout)")
+    parser.add_argument("--input", dest="user_input", help="Valor del dato que la opción pide por pantalla")
+    parser.add_argument(
+        "--extra-var", action="append", default=[], metavar="CLAVE=VALOR",
+        help="Variable extra para el playbook (repetible)"
+    )
+    parser.add_argument("--vault-password-file", help="Archivo con la password del vault")
+    parser.add_argument("--force-refresh", action="store_true", help="Ejecutar aunque el fact store tenga datos vigentes")
+    parser.add_argument("--no-data", action="store_true", help="No incluir el JSON del playbook en cada línea")
+    parser.add_argument("--yes", action="store_true", help="Confirmar opciones que modifican los equipos")
+    return parser
+
+
+def _extra_vars(option: MenuOption, args: argparse.Namespace) -> Dict[str, str]:
+    """Variables extra de la línea de comandos (y el dato de --input)."""
+    extra_vars = {}
+    for item in args.extra_var:
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            raise UsageError(f"--extra-var inválido: {item!r} (usar CLAVE=VALOR)")
+        extra_vars[name.strip()] = value
+    if option.requires_input:
+        if args.user_input is None:
+            raise UsageError(f"{option.key} requiere --input ({option.input_prompt or 'dato de entrada'})")
+        extra_vars[option.input_var_name or "user_input"] = args.user_input
+    return extra_vars
+
+
+def _check_option(option: MenuOption, args: argparse.Namespace) -> None:
+    """Rechaza las opciones que no pueden correr sin interacción."""
+    if option.key in INTERACTIVE_OPTIONS or option.input_var_name in INTERACTIVE_INPUTS:
+        raise UsageError(f"{option.key} ({option.label}) solo puede ejecutarse desde el menú interactivo")
+    if option.action_type != "read-only" and not args.yes:
+        raise UsageError(f"{option.key} ({option.label}) es de tipo {option.action_type}: confirmar con --yes")
+
+
+def _result_line(option: MenuOption, hostname: str, result: ExecutionResult, with_data: bool) -> str:
+    """Línea JSONL de un resultado."""
+    record = {
+        "option": option.key,
+        "hostname": hostname,
+        "success": result.success,
+        "returncode": result.returncode,
+        "duration": round(result.duration or 0, 3),
+        "cached_at": result.cached_at,
+        "error": None if result.success else ((result.stderr or "").strip() or None),
+    }
+    if with_data:
+        record["data"] = result.data
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+def _jobs(
+    option: MenuOption,
+    targets: List[str],
+    args: argparse.Namespace,
+    vault_password: Optional[str],
+    extra_vars: Dict[str, str]
+) -> tuple:
+    """
+    Trabajos a ejecutar y workers del pool.
+
+    Returns:
+        (lista de funciones que devuelven Dict hostname -> ExecutionResult, workers)
+    """
+    from .application.use_cases.ejecutar_playbook import (
+        ejecutar_playbook_use_case, ejecutar_playbook_batch_use_case
+    )
+    from .infrastructure.ansible.command_builder import playbook_supports_batch
+
+    if not option.requires_hostname:
+        def run_local() -> Dict[str, ExecutionResult]:
+            return {"localhost": ejecutar_playbook_use_case(
+                "localhost", option.playbook, vault_password, extra_vars or None,
+                show_progress=False, force_refresh=args.force_refresh
+            )}
+        return [run_local], 1
+
+    if len(targets) > 1 and playbook_supports_batch(option.playbook):
+        chunk_size = args.chunk_size or args.concurrency * CHUNK_WAVES
+
+        def run_chunk(chunk: List[str]) -> Callable[[], Dict[str, ExecutionResult]]:
+            return lambda: ejecutar_playbook_batch_use_case(
+                chunk, option.playbook, vault_password, extra_vars or None,
+                force_refresh=args.force_refresh, max_forks=args.concurrency
+            )
+        chunks = [targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size)]
+        return [run_chunk(chunk) for chunk in chunks], 1
+
+    def run_host(hostname: str) -> Callable[[], Dict[str, ExecutionResult]]:
+        return lambda: {hostname: ejecutar_playbook_use_case(
+            hostname, option.playbook, vault_password, extra_vars or None,
+            show_progress=False, force_refresh=args.force_refresh
+        )}
+    return [run_host(hostname) for hostname in targets], args.concurrency
+
+
+def run(args: argparse.Namespace, output: TextIO) -> int:
+    """
+    Ejecuta la opción y escribe los resultados.
+
+    Args:
+        args: Argumentos parseados
+        output: Destino de las líneas JSONL
+
+    Returns:
+        Código de salida
+
+    Raises:
+        UsageError: Si los argumentos no permiten ejecutar
+    """
+    from .history import add_entry as history_add_entry
+    from .infrastructure.persistence.history_store import close_history
+
+    option = find_option(args.option)
+    if option is None:
+        raise UsageError(f"Opción inexistente: {args.option}")
+    _check_option(option, args)
+    if args.concurrency < 1:
+        raise UsageError("--concurrency debe ser mayor que 0")
+    extra_vars = _extra_vars(option, args)
+    targets = read_targets(args.targets_file, args.targets) if option.requires_hostname else []
+    if option.requires_hostname and not targets:
+        raise UsageError(f"{option.key} requiere targets (--targets-file o --targets)")
+
+    jobs, workers = _jobs(option, targets, args, read_vault_password(args.vault_password_file), extra_vars)
+    logger.info(f"Headless {option.key}: {len(targets) or 1} targets, {len(jobs)} trabajos, {workers} workers")
+
+    token = CancelToken()
+
+    def call(job: Callable[[], Dict[str, ExecutionResult]]) -> Dict[str, ExecutionResult]:
+        with activate(token):
+            return job()
+
+    start = time.time()
+    ok = failed = cached = 0
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="headless")
+    try:
+        futures = [pool.submit(call, job) for job in jobs]
+        for future in as_completed(futures):
+            for hostname, result in future.result().items():
+                output.write(_result_line(option, hostname, result, not args.no_data) + "\n")
+                output.flush()
+                if option.requires_hostname:
+                    history_add_entry(hostname, option.label, result, option.key, option.playbook)
+                ok += result.success
+                failed += not result.success
+                cached += result.cached_at is not None
+    except KeyboardInterrupt:
+        # Los ansible-playbook corren en su propio grupo de procesos: matarlos
+        token.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        print(f"\nCancelado: {ok} OK, {failed} fallidos antes de interrumpir", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    finally:
+        pool.shutdown(wait=True)
+        close_history()
+
+    print(
+        f"{option.key}: {ok} OK, {failed} fallidos ({cached} desde el fact store) en {time.time() - start:.1f}s",
+        file=sys.stderr
+    )
+    if not failed:
+        return EXIT_OK
+    return EXIT_FAILED if not ok else EXIT_PARTIAL
+
+
+def main(argv: List[str]) -> int:
+    """
+    Punto de entrada de `app.py run`.
+
+    Args:
+        argv: Argumentos después de "run"
+
+    Returns:
+        Código de salida
+    """
+    from .shared.config import console
+    from .domain.services.validation_service import check_environment
+    # stdout queda para las líneas JSONL: los mensajes de Rich van a stderr
+    console.file = sys.stderr
+    try:
+        args = _build_parser().parse_args(argv)
+        try:
+            check_environment()
+        except SystemExit:
+            # check_environment sale con 1, que se confundiría con EXIT_PARTIAL
+            return EXIT_ENVIRONMENT
+        if args.output == "-":
+            return run(args, sys.stdout)
+        with open(INVOCATION_DIR / args.output, "w", encoding="utf-8") as output:
+            return run(args, output)
+    except (UsageError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
@@ -2,48 +2,215 @@
 """
 cli/history.py
 ==============
-Gestión del historial de ejecuciones de la sesión usando funciones.
+Gestión del historial de ejecuciones usando funciones.
+
+Las ejecuciones se guardan en el historial persistente (SQLite, ver
+infrastructure/persistence/history_store.py), así sobreviven al cierre de la
+CLI y se pueden consultar entre sesiones. get_stats, get_last_success y
+get_duration_percentile son la API de métricas para menús y formateadores.
 """
 
-from typing import List
+import threading
+import time
 from datetime import datetime
-from .domain.models import ExecutionStats, ExecutionResult
+from typing import Any, Dict, List, Optional
+
+from .domain.models import ExecutionStats, ExecutionResult, HistoryAggregate
+from .infrastructure.persistence.history_store import (
+    SESSION_ID, HistoryRecord, record_execution, query_executions, flush
+)
+from .infrastructure.persistence.history_queries import (
+    aggregate_executions, last_success_by_host, duration_percentiles, period_start
+)
+
+# Límite de filas por defecto de get_entries
+DEFAULT_LIMIT = 500
 
+# Estado global del módulo: momento del último clear_history() (oculta de la
+# vista de sesión lo anterior, sin borrarlo del historial persistente)
+_session_cleared_at: Optional[float] = None
+_lock = threading.Lock()
 
-# Estado global del módulo
-_entries: List[ExecutionStats] = []
 
+def _summarize(hostname: str, result: ExecutionResult) -> Dict[str, Any]:
+    """Resumen del resultado: stats de Ansible del host, error (si falló) y blobs de la salida cruda."""
+    summary: Dict[str, Any] = {}
+    stats = (result.data or {}).get("stats", {}) if isinstance(result.data, dict) else {}
+    host_stats = stats.get(hostname) or (next(iter(stats.values())) if len(stats) == 1 else None)
+    if isinstance(host_stats, dict):
+        summary["stats"] = {
+            key: host_stats.get(key, 0) for key in ("ok", "changed", "failures", "unreachable", "skipped")
+        }
+    if not result.success and result.stderr:
+        summary["error"] = result.stderr.strip()[:500]
+    if result.lazy_fields:
+        summary["blobs"] = {name: ref.digest for name, ref in result.lazy_fields.items()}
+    return summary
 
-def add_entry(hostname: str, task_name: str, result: ExecutionResult) -> None:
+
+def add_entry(
+    hostname: str,
+    task_name: str,
+    result: ExecutionResult,
+    option_key: Optional[str] = None,
+    playbook: Optional[str] = None
+) -> None:
     """
-    Agrega una nueva ejecución al historial.
-    
+    Agrega una nueva ejecución al historial (sin bloquear).
+
     Args:
         hostname: Hostname del equipo
         task_name: Nombre de la tarea ejecutada
         result: Resultado de la ejecución
+        option_key: Clave de la opción del menú (ej: "H1")
+        playbook: Ruta del playbook relativa a playbooks/
     """
-    stats = ExecutionStats(
-        timestamp=datetime.now().strftime("%H:%M:%S"),
+    finished_at = time.time()
+    record_execution(HistoryRecord(
         hostname=hostname,
         task_name=task_name,
         success=result.success,
-        duration=result.duration
+        started_at=finished_at - (result.duration or 0),
+        finished_at=finished_at,
+        option_key=option_key,
+        playbook=playbook,
+        returncode=result.returncode,
+        duration=result.duration or 0,
+        cached=result.cached_at is not None,
+        summary=_summarize(hostname, result),
+    ))
+
+
+def _format_timestamp(timestamp: float) -> str:
+    """Hora de la ejecución (con fecha si no es de hoy)."""
+    moment = datetime.fromtimestamp(timestamp)
+    if moment.date() == datetime.now().date():
+        return moment.strftime("%H:%M:%S")
+    return moment.strftime("%d/%m %H:%M:%S")
+
+
+def get_entries(
+    session_only: bool = False,
+    hostname: Optional[str] = None,
+    option_key: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
+    days: Optional[int] = None,
+    success: Optional[bool] = None
+) -> List[ExecutionStats]:
+    """
+    Obtiene las ejecuciones más recientes del historial.
+
+    Args:
+        session_only: Solo las de la sesión actual (desde el último clear_history)
+        hostname: Solo las de este host
+        option_key: Solo las de esta opción del menú
+        limit: Máximo de entradas
+        days: Solo las de los últimos N días (hoy incluido)
+        success: Solo exitosas (True) o fallidas (False)
+
+    Returns:
+        Lista de estadísticas de ejecuciones, en orden cronológico
+    """
+    flush()
+    since = period_start(days) if days else None
+    with _lock:
+        cleared_at = _session_cleared_at
+    if session_only and cleared_at is not None:
+        since = max(since or 0.0, cleared_at)
+    records = query_executions(
+        hostname=hostname,
+        option_key=option_key,
+        session_id=SESSION_ID if session_only else None,
+        since=since,
+        success=success,
+        limit=limit
+    )
+    return [
+        ExecutionStats(
+            timestamp=_format_timestamp(record.finished_at),
+            hostname=record.hostname,
+            task_name=record.task_name,
+            success=record.success,
+            duration=record.duration
+        )
+        for record in reversed(records)
+    ]
+
+
+def get_stats(
+    group_by: str = "option_key",
+    option_key: Optional[str] = None,
+    hostname: Optional[str] = None,
+    days: Optional[int] = None,
+    with_p95: bool = False
+) -> List[HistoryAggregate]:
+    """
+    Métricas agregadas del historial (ej: tasa de fallas de SC3 en los últimos 7 días).
+
+    Args:
+        group_by: "option_key", "hostname", "site" o "day"
+        option_key: Solo esta opción del menú
+        hostname: Solo este host
+        days: Solo los últimos N días (None = todo el historial)
+        with_p95: Incluir el percentil 95 de duración
+
+    Returns:
+        Lista de HistoryAggregate
+    """
+    flush()
+    return aggregate_executions(
+        group_by=group_by, option_key=option_key, hostname=hostname,
+        since=period_start(days) if days else None, with_p95=with_p95
     )
-    _entries.append(stats)
 
 
-def get_entries() -> List[ExecutionStats]:
+def get_last_success(option_key: str, hostnames: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Última ejecución exitosa de una opción por host.
+
+    Args:
+        option_key: Opción del menú (ej: "H1")
+        hostnames: Solo estos hosts (None = todos)
+
+    Returns:
+        Dict hostname -> timestamp
+    """
+    flush()
+    return last_success_by_host(option_key, hostnames)
+
+
+def get_duration_percentile(
+    option_key: Optional[str] = None,
+    pct: float = 95,
+    group_by: Optional[str] = None,
+    days: Optional[int] = None
+) -> Dict[str, float]:
     """
-    Obtiene todas las entradas del historial.
-    
+    Percentil de duración (ej: p95 de A13 por sitio).
+
+    Args:
+        option_key: Solo esta opción del menú
+        pct: Percentil (0-100)
+        group_by: None (grupo único "*"), "option_key", "hostname", "site" o "day"
+        days: Solo los últimos N días (None = todo el historial)
+
     Returns:
-        Lista de estadísticas de ejecuciones
+        Dict grupo -> segundos
     """
-    return _entries.copy()  # Retornar copia para evitar modificación externa
+    flush()
+    return duration_percentiles(
+        pct, group_by=group_by, option_key=option_key, since=period_start(days) if days else None
+    )
 
 
 def clear_history() -> None:
-    """Limpia el historial de la sesión."""
-    global _entries
-    _entries.clear()
+    """
+    Limpia el historial de la sesión.
+
+    Como con la lista en memoria de antes, solo vacía la vista de la sesión
+    (get_entries(session_only=True)): las ejecuciones quedan en el historial
+    persistente y en sus métricas.
+    """
+    global _session_cleared_at
+    with _lock:
+        _session_cleared_at = time.time()
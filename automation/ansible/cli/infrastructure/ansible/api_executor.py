@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/api_executor.py
+======================================
+Backend de ejecución "api": worker residente con ansible-core precargado.
+
+Evita pagar en cada ejecución el arranque del intérprete, los imports de
+ansible-core y la carga de colecciones. Cada worker (api_worker.py) atiende
+un trabajo a la vez, se lanza una sola vez por sesión y se reinicia
+automáticamente si muere o excede el timeout.
+
+Para no serializar los trabajos del scheduler hay un worker por slot
+(MAX_CONCURRENT_TASKS): se crean bajo demanda, así una sesión que nunca
+ejecuta dos trabajos a la vez mantiene un solo proceso con ansible cargado.
+"""
+
+import importlib.util
+import json
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ...shared.config import (
+    BASE_DIR, logger, STDOUT_CALLBACK, CALLBACK_PLUGINS_DIR, INVENTORY_PLUGINS_DIR, MAX_CONCURRENT_TASKS
+)
+from ...shared.cancellation import on_cancel, process_group_kwargs, kill_process_group
+
+WORKER_SCRIPT = Path(__file__).parent / "api_worker.py"
+
+# Tiempo máximo para que el worker importe ansible y quede listo (segundos)
+WORKER_STARTUP_TIMEOUT = 60
+
+
+def is_api_backend_available() -> bool:
+    """
+    Indica si el backend API puede usarse.
+
+    Requiere ansible-core importable desde este intérprete y no estar
+    ejecutando desde un .exe de PyInstaller (el worker es un script .py).
+
+    Returns:
+        True si el backend API está disponible
+    """
+    if getattr(sys, 'frozen', False):
+        return False
+    return importlib.util.find_spec("ansible") is not None
+
+
+class AnsibleApiWorker:
+    """Proceso worker residente. Atiende un trabajo a la vez."""
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self.ansible_version: Optional[str] = None
+
+    def _read_message(self, timeout: float) -> Dict:
+        """Lee una respuesta JSON del worker o lanza TimeoutExpired."""
+        ready, _, _ = select.select([self._proc.stdout], [], [], timeout)
+        if not ready:
+            raise subprocess.TimeoutExpired(str(WORKER_SCRIPT), timeout)
+        line = self._proc.stdout.readline()
+        if not line:
+            raise RuntimeError("El worker de Ansible terminó inesperadamente")
+        return json.loads(line)
+
+    def _ensure_started(self) -> None:
+        """Lanza el worker si no está corriendo."""
+        if self._proc and self._proc.poll() is None:
+            return
+        start_time = time.time()
+        self._proc = subprocess.Popen(
+            [sys.executable, str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=str(BASE_DIR),
+            **process_group_kwargs(),
+            env={
+                **os.environ,
+                "ANSIBLE_STDOUT_CALLBACK": STDOUT_CALLBACK,
+                "ANSIBLE_CALLBACK_PLUGINS": str(CALLBACK_PLUGINS_DIR),
+                "ANSIBLE_INVENTORY_PLUGINS": str(INVENTORY_PLUGINS_DIR),
+                "ANSIBLE_HOST_KEY_CHECKING": "False",
+            },
+        )
+        hello = self._read_message(WORKER_STARTUP_TIMEOUT)
+        if not hello.get("ready"):
+            self.stop()
+            raise RuntimeError(f"No se pudo iniciar el worker de Ansible: {hello.get('error')}")
+        self.ansible_version = hello.get("ansible_version")
+        logger.info(
+            f"Worker API de Ansible {self.ansible_version} listo en {time.time() - start_time:.2f}s "
+            f"(pid {self._proc.pid})"
+        )
+
+    def start(self) -> None:
+        """Precalienta el worker (opcional: run() lo inicia bajo demanda)."""
+        with self._lock:
+            self._ensure_started()
+
+    def run(
+        self,
+        cmd: List[str],
+        env: Dict[str, str],
+        timeout: float,
+        on_line: Optional[Callable[[str], None]] = None,
+        vault_password: Optional[str] = None
+    ) -> Tuple[int, str, str]:
+        """
+        Ejecuta un comando ansible-playbook en el worker.
+
+        Args:
+            cmd: Argumentos de ansible-playbook (cmd[0] es el nombre del programa)
+            env: Entorno de la ejecución
+            timeout: Timeout en segundos
+            on_line: Si se indica, recibe cada línea de stdout a medida que llega
+            vault_password: Password del vault (viaja por el pipe de stdin del worker)
+
+        Returns:
+            Tupla (returncode, stdout, stderr)
+
+        Raises:
+            subprocess.TimeoutExpired: Si la ejecución excede el timeout (el worker se reinicia)
+        """
+        with self._lock:
+            self._ensure_started()
+            job = {"args": cmd, "env": env, "stream": on_line is not None, "vault_password": vault_password}
+            self._proc.stdin.write(json.dumps(job) + "\n")
+            self._proc.stdin.flush()
+            deadline = time.time() + timeout
+            proc = self._proc
+            try:
+                # Cancelar la tarea mata el worker (se relanza en el próximo trabajo)
+                with on_cancel(lambda: kill_process_group(proc)):
+                    while True:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise subprocess.TimeoutExpired(cmd, timeout)
+                        response = self._read_message(remaining)
+                        if "line" not in response:
+                            break
+                        on_line(response["line"])
+            except (subprocess.TimeoutExpired, RuntimeError):
+                self.stop()
+                raise
+            return response["returncode"], response["stdout"], response["stderr"]
+
+    def stop(self) -> None:
+        """Detiene el worker."""
+        if self._proc:
+            kill_process_group(self._proc)
+            self._proc.wait()
+        self._proc = None
+
+
+class AnsibleApiWorkerPool:
+    """Workers residentes, uno por trabajo simultáneo (hasta size)."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._workers: List[AnsibleApiWorker] = []
+        # LIFO: se reutiliza primero el worker usado más recientemente
+        self._idle: "queue.LifoQueue[AnsibleApiWorker]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> AnsibleApiWorker:
+        """Toma un worker libre, crea uno si no se llegó a size o espera a que se libere."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = AnsibleApiWorker()
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def start(self) -> None:
+        """Precalienta un worker (los demás se lanzan al haber trabajos simultáneos)."""
+        worker = self._acquire()
+        try:
+            worker.start()
+        finally:
+            self._idle.put(worker)
+
+    def run(
+        self,
+        cmd: List[str],
+        env: Dict[str, str],
+        timeout: float,
+        on_line: Optional[Callable[[str], None]] = None,
+        vault_password: Optional[str] = None
+    ) -> Tuple[int, str, str]:
+        """Ejecuta el trabajo en un worker libre (mismos argumentos que AnsibleApiWorker.run)."""
+        worker = self._acquire()
+        try:
+            return worker.run(cmd, env, timeout, on_line, vault_password)
+        finally:
+            self._idle.put(worker)
+
+    def stop(self) -> None:
+        """Detiene todos los workers."""
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.stop()
+
+
+# Workers de la sesión: uno por slot del scheduler
+api_workers = AnsibleApiWorkerPool(MAX_CONCURRENT_TASKS)
+
+
+def run_playbook_in_worker(
+    cmd: List[str],
+    env: Dict[str, str],
+    timeout: float,
+    on_line: Optional[Callable[[str], None]] = None,
+    vault_password: Optional[str] = None
+) -> Tuple[int, str, str]:
+    """
+    Ejecuta un playbook en un worker residente libre.
+
+    Args:
+        cmd: Argumentos de ansible-playbook
+        env: Entorno de la ejecución
+        timeout: Timeout en segundos
+        on_line: Si se indica, recibe cada línea de stdout a medida que llega
+        vault_password: Password del vault (opcional)
+
+    Returns:
+        Tupla (returncode, stdout, stderr)
+    """
+    return api_workers.run(cmd, env, timeout, on_line, vault_password)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/api_worker.py
+====================================
+Worker residente que ejecuta playbooks con la API Python de Ansible.
+
+Se lanza como script independiente (python api_worker.py), no como módulo del
+paquete cli, para no cargar Rich, Questionary ni la configuración de la CLI.
+Importa ansible-core una sola vez y atiende trabajos en formato JSON por línea:
+
+    stdin  <- {"args": ["ansible-playbook", "-i", ...], "env": {...}, "stream": true, "vault_password": "..."}
+    stdout -> {"line": "..."}            (una por línea de salida, solo si "stream")
+    stdout -> {"returncode": 0, "stdout": "...", "stderr": "...", "duration": 1.2}
+
+El canal de protocolo es un duplicado del stdout original; el fd 1 se redirige a
+stderr para que ninguna escritura directa de Ansible corrompa las respuestas.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+import warnings
+from typing import Any, Callable, Dict, Optional
+
+
+class LineForwarder(io.TextIOBase):
+    """Archivo de texto que reenvía cada línea completa escrita (stream de eventos)."""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None]):
+        self._send = send
+        self._pending = ""
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._send({"line": line})
+        return len(text)
+
+    def close_stream(self) -> None:
+        """Envía el resto pendiente (última línea sin salto)."""
+        if self._pending:
+            self._send({"line": self._pending})
+            self._pending = ""
+
+
+def preload() -> Dict[str, Any]:
+    """
+    Importa ansible-core y el cargador de plugins (la parte cara del arranque).
+
+    Returns:
+        Dict con la versión de Ansible cargada
+    """
+    from ansible import __version__ as ansible_version
+    from ansible.cli.playbook import PlaybookCLI  # noqa: F401
+    from ansible.executor.playbook_executor import PlaybookExecutor  # noqa: F401
+    try:
+        from ansible.plugins.loader import init_plugin_loader
+        init_plugin_loader()
+    except ImportError:
+        # ansible-core < 2.15 inicializa el loader de forma implícita
+        pass
+    return {"ansible_version": ansible_version}
+
+
+def reset_cli_args() -> None:
+    """
+    Descarta los argumentos de línea de comandos del trabajo anterior.
+
+    GlobalCLIArgs es un singleton: sin esto, cada PlaybookCLI de este proceso
+    reutilizaría el inventario, el playbook y las extra-vars del primer trabajo.
+    Las extra-vars y options-vars parseadas además quedan memorizadas en
+    atributos de las funciones que las cargan. Desde ansible-core 2.19 los
+    secretos del vault también son un singleton (VaultSecretsContext) que
+    PlaybookCLI se niega a inicializar dos veces en el mismo proceso.
+    """
+    from ansible.parsing import vault as ansible_vault
+    from ansible.utils import vars as ansible_vars
+    from ansible.utils.context_objects import GlobalCLIArgs
+    GlobalCLIArgs._Singleton__instance = None
+    vault_context = getattr(ansible_vault, "VaultSecretsContext", None)
+    if vault_context is not None:
+        vault_context._current = None
+    for loader_func, attribute in (
+        (ansible_vars.load_extra_vars, "extra_vars"),
+        (ansible_vars.load_options_vars, "options_vars"),
+    ):
+        if hasattr(loader_func, attribute):
+            delattr(loader_func, attribute)
+
+
+def run_job(job: Dict[str, Any], send: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta un playbook dentro de este proceso.
+
+    Args:
+        job: Dict con "args" (argv de ansible-playbook), "env" (entorno),
+            "stream" (reenviar el stdout línea a línea en lugar de acumularlo) y
+            "vault_password" (opcional; Ansible la lee de un pipe, nunca de disco)
+        send: Función para enviar mensajes intermedios (requerida si "stream")
+
+    Returns:
+        Dict con returncode, stdout, stderr y duration
+    """
+    from ansible.cli.playbook import PlaybookCLI
+
+    reset_cli_args()
+    # El entorno del trabajo (ITOPS_INVENTORY lleva la password descifrada)
+    # no debe quedar en el worker para los trabajos siguientes
+    saved_env = os.environ.copy()
+    args = list(job["args"])
+    password_fd = None
+    if job.get("vault_password"):
+        password_fd, write_fd = os.pipe()
+        os.write(write_fd, job["vault_password"].encode())
+        os.close(write_fd)
+        args.extend(["--vault-password-file", f"/dev/fd/{password_fd}"])
+    out = LineForwarder(send) if job.get("stream") and send else io.StringIO()
+    err = io.StringIO()
+    start_time = time.time()
+    returncode = 1
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            os.environ.update(job.get("env") or {})
+            returncode = PlaybookCLI(args).run()
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            returncode = 250
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            if password_fd is not None:
+                os.close(password_fd)
+    if isinstance(out, LineForwarder):
+        out.close_stream()
+    return {
+        "returncode": returncode or 0,
+        "stdout": out.getvalue() if isinstance(out, io.StringIO) else "",
+        "stderr": err.getvalue(),
+        "duration": time.time() - start_time,
+    }
+
+
+def main() -> int:
+    """Bucle principal: lee trabajos de stdin y responde por el canal de protocolo."""
+    # Cada PlaybookCLI reinicializa el loader de colecciones ya configurado en preload()
+    warnings.filterwarnings("ignore", message="AnsibleCollectionFinder has already been configured")
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    def send(message: Dict[str, Any]) -> None:
+        proto.write(json.dumps(message) + "\n")
+        proto.flush()
+
+    try:
+        send({"ready": True, **preload()})
+    except ImportError as e:
+        send({"ready": False, "error": str(e)})
+        return 1
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            send({"returncode": 1, "stdout": "", "stderr": f"Trabajo inválido: {e}", "duration": 0.0})
+            continue
+        send(run_job(job, send))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
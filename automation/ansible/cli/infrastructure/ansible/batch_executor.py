@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/batch_executor.py
+========================================
+Ejecutor batch: un solo ansible-playbook para N targets.
+
+En lugar de un proceso, un inventario y un descifrado del vault por host,
+escribe un inventario con todos los targets, ejecuta el playbook una vez con
+forks ajustado al tamaño del batch y separa los resultados por host.
+
+Antes de lanzar Ansible, un preflight asíncrono (consultando primero el cache
+de alcanzabilidad) descarta los hosts sin WinRM respondiendo: reciben un
+resultado "unreachable" sin ocupar un fork.
+"""
+
+import subprocess
+import time
+from dataclasses import asdict
+from typing import Optional, Dict, List, Tuple
+
+from ...shared.config import logger, BATCH_MAX_FORKS, PLAYBOOK_TIMEOUT, BATCH_PREFLIGHT
+from ...shared.cancellation import on_cancel
+from ...domain.models import ExecutionResult
+from ..ansible.command_builder import build_batch_playbook_command
+from ..ansible.playbook_executor import select_backend, parse_json_output
+from ..ansible.event_stream import EventAccumulator, publish_progress_event
+from ..ansible.result_splitter import split_batch_result, RC_HOST_UNREACHABLE
+from ..ansible.reachability_cache import get_cached, record_probes
+from ..ansible.network_resolver import resolve_hostnames
+from ..remote.preflight import preflight_hosts
+
+
+def batch_forks(host_count: int, max_forks: Optional[int] = None) -> int:
+    """
+    Calcula el paralelismo de Ansible para un batch.
+
+    Args:
+        host_count: Cantidad de hosts del batch
+        max_forks: Máximo de forks (None = BATCH_MAX_FORKS)
+
+    Returns:
+        forks entre 1 y max_forks
+    """
+    return max(1, min(host_count, max_forks or BATCH_MAX_FORKS))
+
+
+def execute_playbook_batch(
+    hostnames: List[str],
+    playbook_path: str,
+    vault_password: Optional[str] = None,
+    extra_vars: Optional[Dict[str, str]] = None,
+    backend: Optional[str] = None,
+    preflight: Optional[bool] = None,
+    force_refresh: bool = False,
+    max_forks: Optional[int] = None
+) -> Dict[str, ExecutionResult]:
+    """
+    Ejecuta un playbook en varios hosts con una sola invocación.
+
+    Args:
+        hostnames: Lista de hostnames
+        playbook_path: Ruta al playbook relativa a playbooks/
+        vault_password: Password del vault (opcional)
+        extra_vars: Variables extra para el playbook
+        backend: "subprocess", "api" o "forkserver" (None = configuración)
+        preflight: Omitir los hosts sin WinRM antes de ejecutar (None = configuración)
+        force_refresh: Probar todos los hosts aunque haya un resultado cacheado
+        max_forks: Paralelismo máximo de Ansible (None = BATCH_MAX_FORKS)
+
+    Returns:
+        Dict hostname -> ExecutionResult (uno por target)
+    """
+    results: Dict[str, ExecutionResult] = {}
+    resolved_ips = None
+    transports = None
+    if BATCH_PREFLIGHT if preflight is None else preflight:
+        results, resolved_ips, transports = _preflight(hostnames, force_refresh)
+        hostnames = [host for host in hostnames if host not in results]
+        if not hostnames:
+            return results
+        if results:
+            logger.info(f"Batch: {len(results)} hosts omitidos por el preflight")
+    else:
+        # Resolver todos los targets en paralelo antes de armar el inventario
+        resolve_hostnames(hostnames)
+
+    results.update(_run_batch(
+        hostnames, playbook_path, vault_password, extra_vars, backend, resolved_ips, max_forks, transports
+    ))
+    return results
+
+
+def _preflight(
+    hostnames: List[str],
+    force_refresh: bool
+) -> Tuple[Dict[str, ExecutionResult], Dict[str, Optional[str]], Dict[str, Optional[str]]]:
+    """
+    Descarta los hosts sin WinRM usando el cache de alcanzabilidad y el preflight.
+
+    Solo se prueban los hosts sin resultado vigente en el cache (todos si
+    force_refresh); los resultados nuevos se registran en el cache.
+
+    Returns:
+        Tupla (resultados de los hosts offline, IPs resueltas de los online,
+        transporte WinRM de los online: el inventario usa 5986/https para los
+        que solo respondieron ahí)
+    """
+    now = time.time()
+    offline: Dict[str, ExecutionResult] = {}
+    resolved_ips: Dict[str, Optional[str]] = {}
+    transports: Dict[str, Optional[str]] = {}
+    to_probe = []
+    for host in hostnames:
+        entry = None if force_refresh else get_cached(host)
+        if entry is None:
+            to_probe.append(host)
+        elif entry.reachable:
+            resolved_ips[host] = entry.address
+            transports[host] = entry.transport
+        else:
+            offline[host] = ExecutionResult(
+                False, None, "",
+                f"Host {host} offline (cache, reintento en {entry.expires_at - now:.0f}s): {entry.error}",
+                RC_HOST_UNREACHABLE
+            )
+
+    probes = preflight_hosts(to_probe)
+    record_probes([asdict(probe) for probe in probes.values()])
+    for host, probe in probes.items():
+        resolved_ips[host] = probe.address
+        transports[host] = probe.transport
+        if not probe.reachable:
+            offline[host] = ExecutionResult(
+                False, None, "", f"Host {host} sin WinRM (preflight): {probe.error}", RC_HOST_UNREACHABLE
+            )
+    return offline, resolved_ips, transports
+
+
+def _run_batch(
+    hostnames: List[str],
+    playbook_path: str,
+    vault_password: Optional[str],
+    extra_vars: Optional[Dict[str, str]],
+    backend: Optional[str],
+    resolved_ips: Optional[Dict[str, Optional[str]]],
+    max_forks: Optional[int] = None,
+    transports: Optional[Dict[str, Optional[str]]] = None
+) -> Dict[str, ExecutionResult]:
+    """Ejecuta el playbook una vez para todos los hosts y separa los resultados."""
+    forks = batch_forks(len(hostnames), max_forks)
+    command = build_batch_playbook_command(
+        hostnames, playbook_path, vault_password, extra_vars, forks, resolved_ips, transports
+    )
+    runner = select_backend(backend)
+    logger.info(f"Ejecutando batch de {len(hostnames)} hosts (forks={forks}): {command.safe_repr()}")
+
+    start_time = time.time()
+    try:
+        # El timeout escala con la cantidad de "olas" de forks
+        waves = -(-len(hostnames) // forks)
+        events = EventAccumulator(on_event=publish_progress_event)
+        with on_cancel(command.cleanup):
+            returncode, _, stderr = runner(
+                command.cmd, command.env, PLAYBOOK_TIMEOUT * waves, events.feed, command.vault_password
+            )
+        duration = time.time() - start_time
+        if stderr:
+            logger.error(f"STDERR batch: {stderr}")
+        data = events.data or parse_json_output(events.output)
+        return split_batch_result(hostnames, data, stderr, returncode, duration)
+    except subprocess.TimeoutExpired:
+        duration = time.time() - start_time
+        logger.error(f"Timeout en batch: {playbook_path}")
+        return split_batch_result(hostnames, None, "Timeout de ejecución del batch", 1, duration)
+    except Exception as e:
+        duration = time.time() - start_time
+        logger.error(f"Error inesperado ejecutando batch: {e}", exc_info=True)
+        return split_batch_result(hostnames, None, str(e), 1, duration)
+    finally:
+        command.cleanup()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/command_builder.py
+=========================================
+Constructor de comandos ansible-playbook.
+
+Arma la línea de comandos y el entorno de una ejecución, individual o en batch
+multi-host. El inventario viaja en memoria (plugin itops_targets) y la password
+del vault por un pipe que abre el backend. Es independiente del backend que la
+ejecute (subprocess o worker residente).
+"""
+
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from ...shared.config import (
+    BASE_DIR, STDOUT_CALLBACK, CALLBACK_PLUGINS_DIR, INVENTORY_PLUGINS_DIR, TARGETS_INVENTORY,
+    INVENTORY_ENV_VAR, MAX_INVENTORY_PAYLOAD
+)
+from ..ansible.vault_manager import decrypt_vault
+from ..ansible.vars_cache import localhost_extra_vars
+from ..ansible.inventory_builder import build_batch_inventory, build_inventory_payload
+from ...infrastructure.logging.debug_logger import debug_logger
+
+# hosts: "{{ target_host ... }}" (el play se dirige al target recibido por extra-vars)
+_HOSTS_TARGET_RE = re.compile(r"^\s*-?\s*hosts:\s*[\"']?\{\{\s*target_host\b", re.MULTILINE)
+
+
+@dataclass
+class PlaybookCommand:
+    """
+    Comando listo para ejecutar.
+
+    Attributes:
+        cmd: Argumentos (cmd[0] es "ansible-playbook")
+        env: Entorno del proceso
+        uses_localhost: Si el playbook corre contra localhost
+        temp_files: Archivos temporales a eliminar al terminar
+        vault_password: Password del vault; no va en cmd, el backend la pasa
+            al proceso por un pipe (ver vault_manager.vault_password_pipe)
+    """
+    cmd: List[str]
+    env: Dict[str, str]
+    uses_localhost: bool
+    temp_files: List[str] = field(default_factory=list)
+    vault_password: Optional[str] = field(default=None, repr=False)
+
+    def safe_repr(self) -> str:
+        """Comando como texto, sin argumentos que contengan passwords."""
+        return " ".join(c for c in self.cmd if "password" not in c.lower())
+
+    def cleanup(self) -> None:
+        """Elimina los archivos temporales del comando."""
+        # Puede llamarse dos veces a la vez (cancelación y fin de la ejecución)
+        while self.temp_files:
+            path = self.temp_files.pop()
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def playbook_uses_localhost(full_playbook_path: Path) -> bool:
+    """
+    Determina si un playbook se ejecuta contra localhost.
+
+    Args:
+        full_playbook_path: Ruta absoluta al playbook
+
+    Returns:
+        True si el playbook declara hosts: localhost
+    """
+    content = full_playbook_path.read_text()
+    return "hosts: localhost" in content or "'localhost'" in content or '"localhost"' in content
+
+
+def playbook_supports_batch(playbook_path: str) -> bool:
+    """
+    Determina si un playbook puede ejecutarse en batch multi-host.
+
+    Requiere un playbook remoto cuyo hosts: dependa de target_host (así puede
+    apuntar al grupo del inventario batch) y que no use variables por equipo
+    como sccm_device_name.
+
+    Args:
+        playbook_path: Ruta al playbook relativa a playbooks/
+
+    Returns:
+        True si el playbook es apto para batch
+    """
+    full_playbook_path = BASE_DIR / "playbooks" / playbook_path
+    if "sccm" in playbook_path or not full_playbook_path.exists():
+        return False
+    if playbook_uses_localhost(full_playbook_path):
+        return False
+    return bool(_HOSTS_TARGET_RE.search(full_playbook_path.read_text()))
+
+
+def write_temp_inventory(inventory_content: str) -> str:
+    """
+    Escribe un inventario temporal en inventory/ (para que Ansible encuentre group_vars/).
+
+    Args:
+        inventory_content: Contenido INI del inventario
+
+    Returns:
+        Ruta del archivo creado
+    """
+    inventory_file = tempfile.NamedTemporaryFile(
+        mode='w', suffix='.ini', dir=str(BASE_DIR / "inventory"), delete=False
+    )
+    inventory_file.write(inventory_content)
+    inventory_file.close()
+    return inventory_file.name
+
+
+def attach_inventory(
+    cmd: List[str],
+    env: Dict[str, str],
+    hostnames: List[str],
+    vault_vars: Optional[Dict[str, str]] = None,
+    resolved_ips: Optional[Dict[str, Optional[str]]] = None,
+    transports: Optional[Dict[str, Optional[str]]] = None
+) -> Optional[str]:
+    """
+    Agrega el inventario de los targets a un comando ansible/ansible-playbook.
+
+    Normalmente el inventario viaja en memoria (variable de entorno para el
+    plugin itops_targets, sin archivos); si no entra en una variable de entorno
+    se escribe un INI temporal.
+
+    Args:
+        cmd: Argumentos del comando (se les agrega -i)
+        env: Entorno del proceso (se le agrega la variable del inventario)
+        hostnames: Targets
+        vault_vars: Variables del vault descifradas (opcional)
+        resolved_ips: IPs ya resueltas por hostname (opcional)
+        transports: Transporte WinRM detectado por el preflight por hostname (opcional)
+
+    Returns:
+        Ruta del INI temporal a eliminar al terminar, o None
+    """
+    payload = build_inventory_payload(hostnames, vault_vars, resolved_ips, transports)
+    if len(payload) <= MAX_INVENTORY_PAYLOAD:
+        env[INVENTORY_ENV_VAR] = payload
+        env["ANSIBLE_INVENTORY_PLUGINS"] = str(INVENTORY_PLUGINS_DIR)
+        cmd.extend(["-i", str(TARGETS_INVENTORY)])
+        return None
+    inventory_path = write_temp_inventory(build_batch_inventory(hostnames, vault_vars, resolved_ips, transports))
+    cmd.extend(["-i", inventory_path])
+    return inventory_path
+
+
+def _base_env(interactive: bool = False) -> Dict[str, str]:
+    """Entorno base de ansible-playbook (callback JSONL salvo en modo interactivo)."""
+    env = os.environ.copy()
+    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+    if not interactive:
+        env["ANSIBLE_STDOUT_CALLBACK"] = STDOUT_CALLBACK
+        env["ANSIBLE_CALLBACK_PLUGINS"] = str(CALLBACK_PLUGINS_DIR)
+    return env
+
+
+def build_playbook_command(
+    hostname: str,
+    playbook_path: str,
+    vault_password: Optional[str] = None,
+    extra_vars: Optional[Dict[str, str]] = None,
+    interactive: bool = False
+) -> PlaybookCommand:
+    """
+    Construye el comando ansible-playbook con inventario dinámico.
+
+    Args:
+        hostname: Hostname del equipo
+        playbook_path: Ruta al playbook relativa a playbooks/
+        vault_password: Password del vault (opcional)
+        extra_vars: Variables extra para el playbook
+        interactive: Si es True, no fuerza el callback JSONL
+
+    Returns:
+        PlaybookCommand con comando, entorno y archivos temporales
+    """
+    full_playbook_path = BASE_DIR / "playbooks" / playbook_path
+
+    uses_localhost = playbook_uses_localhost(full_playbook_path)
+    command = PlaybookCommand(cmd=["ansible-playbook"], env=_base_env(interactive), uses_localhost=uses_localhost)
+
+    # Descifrar variables del vault si hay password
+    vault_vars = {}
+    if vault_password:
+        vault_vars = decrypt_vault(vault_password)
+        debug_logger.log(
+            "infrastructure/ansible/command_builder.py:116",
+            "Vault variables descifradas",
+            {
+                "has_user": "vault_ansible_user" in vault_vars,
+                "has_password": "vault_ansible_password" in vault_vars,
+                "keys": list(vault_vars.keys())
+            },
+            hypothesis_id="E"
+        )
+
+    if uses_localhost:
+        # Para playbooks que usan localhost, forzar conexión local explícitamente
+        command.cmd.extend(["-i", "localhost,", "-c", "local"])
+    else:
+        # Para playbooks que se conectan al host, usar inventario dinámico (en memoria)
+        inventory_path = attach_inventory(command.cmd, command.env, [hostname], vault_vars)
+        if inventory_path:
+            command.temp_files.append(inventory_path)
+    command.cmd.append(str(full_playbook_path))
+
+    # Pasar target_host universalmente si existe hostname (solución genérica)
+    if hostname and hostname != "localhost":
+        command.cmd.extend(["--extra-vars", f"target_host={hostname}"])
+        # Para playbooks SCCM que también esperan sccm_device_name
+        if "sccm" in playbook_path:
+            command.cmd.extend(["--extra-vars", f"sccm_device_name={hostname}"])
+
+    # Agregar variables extra del usuario
+    for key, value in (extra_vars or {}).items():
+        command.cmd.extend(["--extra-vars", f"{key}={value}"])
+
+    # Manejo de Vault: el backend pasa la password al proceso por un pipe
+    if vault_password:
+        command.vault_password = vault_password
+
+    # Para playbooks localhost, pasar vault vars (necesarias para delegate_to) y
+    # common vars (sccm_server, domain_controller, etc.) en un solo JSON
+    if uses_localhost:
+        command.cmd.extend(localhost_extra_vars(vault_password))
+
+    return command
+
+
+def build_batch_playbook_command(
+    hostnames: List[str],
+    playbook_path: str,
+    vault_password: Optional[str] = None,
+    extra_vars: Optional[Dict[str, str]] = None,
+    forks: int = 10,
+    resolved_ips: Optional[Dict[str, Optional[str]]] = None,
+    transports: Optional[Dict[str, Optional[str]]] = None
+) -> PlaybookCommand:
+    """
+    Construye un único comando ansible-playbook para varios hosts.
+
+    Todos los targets van en el grupo [target] de un mismo inventario y el
+    playbook recibe target_host=target, de modo que hosts: "{{ target_host }}"
+    selecciona el grupo completo. El vault se descifra una sola vez.
+
+    Args:
+        hostnames: Lista de hostnames del batch
+        playbook_path: Ruta al playbook relativa a playbooks/
+        vault_password: Password del vault (opcional)
+        extra_vars: Variables extra para el playbook
+        forks: Paralelismo de Ansible para el batch
+        resolved_ips: IPs ya resueltas por hostname (ej: por el preflight)
+        transports: Transporte WinRM por hostname detectado por el preflight
+            (los que solo responden por https se conectan al 5986)
+
+    Returns:
+        PlaybookCommand con comando, entorno y archivos temporales
+    """
+    full_playbook_path = BASE_DIR / "playbooks" / playbook_path
+    command = PlaybookCommand(cmd=["ansible-playbook"], env=_base_env(), uses_localhost=False)
+
+    vault_vars = decrypt_vault(vault_password) if vault_password else {}
+    inventory_path = attach_inventory(
+        command.cmd, command.env, hostnames, vault_vars, resolved_ips, transports
+    )
+    if inventory_path:
+        command.temp_files.append(inventory_path)
+    command.cmd.extend([
+        "--forks", str(forks),
+        str(full_playbook_path),
+        "--extra-vars", "target_host=target",
+    ])
+
+    for key, value in (extra_vars or {}).items():
+        command.cmd.extend(["--extra-vars", f"{key}={value}"])
+
+    command.vault_password = vault_password or None
+
+    return command
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/event_stream.py
+======================================
+Consumidor del stream de eventos del callback itops_jsonl.
+
+El callback (plugins/callback/itops_jsonl.py) emite un objeto JSON por línea a
+medida que avanza la ejecución. EventAccumulator recibe esas líneas una a una
+y construye el resultado de forma incremental, con la misma estructura que
+producía el callback json (plays -> tasks -> hosts, stats), sin necesidad de
+guardar todo el stdout en memoria. En las ejecuciones en segundo plano,
+publish_progress_event reenvía el avance al bus de eventos.
+"""
+
+import json
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from ...shared.event_bus import publish_progress
+
+# Líneas de salida que no son eventos (warnings, mensajes de Ansible) que se conservan
+MAX_TAIL_LINES = 200
+
+
+def publish_progress_event(event: Dict[str, Any]) -> None:
+    """
+    Publica como progress del trabajo actual el inicio de cada tarea y el resultado por host.
+
+    Args:
+        event: Evento del callback (usar como on_event de EventAccumulator)
+    """
+    kind = event.get("event")
+    if kind == "task_start":
+        publish_progress(task=event["task"].get("name") or "(sin nombre)")
+    elif kind == "host_result":
+        publish_progress(host=event.get("host"), status=event.get("status"))
+
+
+class EventAccumulator:
+    """
+    Construye el resultado de un playbook a partir de líneas JSONL.
+
+    Args:
+        on_event: Función opcional que recibe cada evento parseado (ej: progreso en vivo)
+    """
+
+    def __init__(self, on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_event = on_event
+        self.plays = []
+        self.stats: Dict[str, Any] = {}
+        self.custom_stats: Dict[str, Any] = {}
+        self.global_custom_stats: Dict[str, Any] = {}
+        self.event_count = 0
+        self._tail = deque(maxlen=MAX_TAIL_LINES)
+
+    def feed(self, line: str) -> None:
+        """
+        Procesa una línea de salida de ansible-playbook.
+
+        Args:
+            line: Línea de stdout (evento JSON u otro texto)
+        """
+        line = line.strip()
+        if not line:
+            return
+        event = None
+        if line.startswith("{"):
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                pass
+        if not isinstance(event, dict) or "event" not in event:
+            self._tail.append(line)
+            return
+
+        self.event_count += 1
+        self._apply(event)
+        if self.on_event:
+            self.on_event(event)
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        """Incorpora un evento al resultado."""
+        kind = event["event"]
+        if kind == "play_start":
+            play = dict(event["play"], duration={"start": event.get("time")})
+            self.plays.append({"play": play, "tasks": []})
+        elif kind == "task_start" and self.plays:
+            task = dict(event["task"], duration={"start": event.get("time")})
+            self.plays[-1]["tasks"].append({"task": task, "hosts": {}})
+        elif kind == "host_result" and self.plays:
+            entry = self._find_task(event["task"])
+            entry["hosts"][event["host"]] = event["result"]
+            entry["task"]["duration"]["end"] = event.get("time")
+            self.plays[-1]["play"]["duration"]["end"] = event.get("time")
+        elif kind == "stats":
+            self.stats = event.get("stats") or {}
+            self.custom_stats = event.get("custom_stats") or {}
+            self.global_custom_stats = event.get("global_custom_stats") or {}
+
+    def _find_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Busca la entrada de la tarea en el play actual (la crea si no existe)."""
+        tasks = self.plays[-1]["tasks"]
+        for entry in reversed(tasks):
+            if entry["task"]["id"] == task["id"]:
+                return entry
+        entry = {"task": dict(task, duration={"start": None}), "hosts": {}}
+        tasks.append(entry)
+        return entry
+
+    @property
+    def data(self) -> Optional[Dict[str, Any]]:
+        """Resultado con la estructura del callback json, o None si no hubo eventos."""
+        if not self.event_count:
+            return None
+        return {
+            "plays": self.plays,
+            "stats": self.stats,
+            "custom_stats": self.custom_stats,
+            "global_custom_stats": self.global_custom_stats,
+        }
+
+    @property
+    def output(self) -> str:
+        """Últimas líneas de salida que no eran eventos."""
+        return "\n".join(self._tail)
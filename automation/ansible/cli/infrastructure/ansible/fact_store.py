@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/fact_store.py
+====================================
+Fact store: últimos datos estructurados recolectados de cada host.
+
+ansible.cfg habilita el fact cache jsonfile, pero los playbooks corren con
+gather_facts: no y nadie lo consulta. Este módulo guarda, por host y con la
+hora de recolección, los resultados de hardware/specs.yml,
+hardware/unified_inventory.yml y del snapshot rápido en .cache/facts/<host>.json.
+Mientras no venzan (FACT_STORE_TTL / SNAPSHOT_TTL) se responden desde acá sin
+conectarse al equipo; force_refresh obliga a ir a buscarlos.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ...shared.config import BASE_DIR, logger, FACT_STORE_TTL, SNAPSHOT_TTL
+from ...domain.models import ExecutionResult
+
+FACTS_DIR = BASE_DIR / ".cache" / "facts"
+
+# Playbooks cuyo resultado se guarda: ruta relativa a playbooks/ -> tipo de dato
+FACT_PLAYBOOKS: Dict[str, str] = {
+    "hardware/specs.yml": "specs",
+    "hardware/unified_inventory.yml": "unified_inventory",
+}
+
+# Segundos de validez por tipo de dato
+FACT_TTLS: Dict[str, int] = {
+    "specs": FACT_STORE_TTL,
+    "unified_inventory": FACT_STORE_TTL,
+    "snapshot": SNAPSHOT_TTL,
+}
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^a-z0-9._-]")
+
+
+@dataclass
+class FactRecord:
+    """Datos de un tipo recolectados de un host."""
+    kind: str
+    data: Any
+    collected_at: float
+
+    @property
+    def age(self) -> float:
+        """Antigüedad en segundos."""
+        return time.time() - self.collected_at
+
+    @property
+    def is_fresh(self) -> bool:
+        """Si sigue dentro del TTL de su tipo."""
+        return self.age < FACT_TTLS.get(self.kind, FACT_STORE_TTL)
+
+
+# Serializa las lecturas-modificaciones-escrituras de los archivos
+_lock = threading.Lock()
+
+
+def _key(hostname: str) -> str:
+    return hostname.strip().lower()
+
+
+def _host_path(key: str) -> Path:
+    return FACTS_DIR / f"{_UNSAFE_FILENAME_RE.sub('_', key)}.json"
+
+
+def _load_host_locked(key: str) -> Dict[str, FactRecord]:
+    """
+    Registros de un host leídos de su archivo. Requiere _lock.
+
+    No se mantienen en memoria: un inventario unificado de miles de hosts
+    ocuparía cientos de MB y leer un archivo chico cuesta milisegundos.
+    """
+    records = {}
+    try:
+        with open(_host_path(key), encoding="utf-8") as f:
+            for kind, item in json.load(f).items():
+                records[kind] = FactRecord(kind, item["data"], item["collected_at"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+        logger.warning(f"Fact store de {key} ilegible, se descarta: {e}")
+    return records
+
+
+def _save_host_locked(key: str, records: Dict[str, FactRecord]) -> None:
+    """Escribe el archivo de un host de forma atómica. Requiere _lock."""
+    path = _host_path(key)
+    try:
+        FACTS_DIR.mkdir(parents=True, exist_ok=True)
+        if not records:
+            path.unlink(missing_ok=True)
+            return
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {kind: {"data": r.data, "collected_at": r.collected_at} for kind, r in records.items()},
+                f, default=str
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el fact store de {key}: {e}")
+
+
+def get_facts(hostname: str, kind: str, fresh_only: bool = True) -> Optional[FactRecord]:
+    """
+    Datos guardados de un host.
+
+    Args:
+        hostname: Hostname del equipo
+        kind: Tipo de dato ("specs", "unified_inventory", "snapshot")
+        fresh_only: Devolver None si los datos vencieron
+
+    Returns:
+        FactRecord o None si no hay datos (o están vencidos)
+    """
+    with _lock:
+        record = _load_host_locked(_key(hostname)).get(kind)
+    if record is None or (fresh_only and not record.is_fresh):
+        return None
+    return record
+
+
+def put_facts(hostname: str, kind: str, data: Any) -> FactRecord:
+    """
+    Guarda datos recién recolectados de un host.
+
+    Args:
+        hostname: Hostname del equipo
+        kind: Tipo de dato
+        data: Datos serializables a JSON
+
+    Returns:
+        Registro guardado
+    """
+    key = _key(hostname)
+    record = FactRecord(kind, data, time.time())
+    with _lock:
+        records = _load_host_locked(key)
+        records[kind] = record
+        _save_host_locked(key, records)
+    return record
+
+
+def invalidate_facts(hostname: str, kind: Optional[str] = None) -> None:
+    """
+    Descarta los datos de un host (de un tipo o todos).
+
+    Args:
+        hostname: Hostname del equipo
+        kind: Tipo de dato (None = todos)
+    """
+    key = _key(hostname)
+    with _lock:
+        records = _load_host_locked(key)
+        if kind is None:
+            records.clear()
+        else:
+            records.pop(kind, None)
+        _save_host_locked(key, records)
+
+
+def cached_playbook_result(hostname: str, playbook_path: str) -> Optional[ExecutionResult]:
+    """
+    Resultado vigente de un playbook guardado en el fact store.
+
+    Args:
+        hostname: Hostname del equipo
+        playbook_path: Ruta al playbook relativa a playbooks/
+
+    Returns:
+        ExecutionResult con cached_at, o None si el playbook no se guarda o no hay datos vigentes
+    """
+    kind = FACT_PLAYBOOKS.get(playbook_path)
+    record = get_facts(hostname, kind) if kind else None
+    if record is None:
+        return None
+    return ExecutionResult(True, record.data, "", "", 0, 0.0, cached_at=record.collected_at)
+
+
+def record_playbook_result(hostname: str, playbook_path: str, result: ExecutionResult) -> None:
+    """
+    Guarda el resultado de un playbook si es de los que alimentan el fact store.
+
+    Solo se guardan ejecuciones exitosas recién hechas y con JSON.
+
+    Args:
+        hostname: Hostname del equipo
+        playbook_path: Ruta al playbook relativa a playbooks/
+        result: Resultado de la ejecución
+    """
+    kind = FACT_PLAYBOOKS.get(playbook_path)
+    if kind and result.success and result.data and result.cached_at is None:
+        put_facts(hostname, kind, result.data)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/fork_server.py
+=====================================
+Servidor residente que ejecuta cada playbook en un fork copy-on-write.
+
+Se lanza como script independiente (python fork_server.py SOCKET), igual que
+api_worker.py. Al iniciar precarga ansible-core, el loader de plugins, los
+plugins de las colecciones ansible.windows / microsoft.ad, hace una ejecución
+vacía de calentamiento y parsea los group_vars (no cifrados) y los defaults
+de los roles; recién entonces escucha en un socket Unix. Por cada trabajo hace
+fork(): el hijo hereda todo lo cargado y solo paga la ejecución del playbook.
+
+Protocolo (una conexión por pedido, JSON por línea):
+
+    -> {"op": "ping"}                      <- {"ready": true, "ansible_version": ..., "pid": ..., "version": ...}
+    -> {"op": "run", "args": [...], "env": {...}, "stream": true}
+                                           <- {"pid": PID_DEL_HIJO}
+                                           <- {"line": "..."}   (si "stream")
+                                           <- {"returncode": 0, "stdout": ..., "stderr": ..., "duration": ...}
+    -> {"op": "shutdown"}                  <- {"stopped": true}
+
+El hijo corre en su propia sesión (os.setsid), así el cliente puede cancelar
+el trabajo matando su grupo de procesos sin afectar al servidor.
+"""
+
+import inspect
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from api_worker import preload, reset_cli_args, run_job
+
+# Versión del código del servidor: el cliente reinicia un servidor con código viejo
+CODE_VERSION = max(
+    os.path.getmtime(Path(__file__).parent / name) for name in ("fork_server.py", "api_worker.py")
+)
+
+# Plugins de colecciones que se cargan por adelantado (módulos y conexiones más usados)
+WARM_MODULES = (
+    "ansible.windows.win_ping", "ansible.windows.win_shell", "ansible.windows.win_powershell",
+    "ansible.windows.win_service", "ansible.windows.win_reboot", "microsoft.ad.user", "microsoft.ad.computer",
+)
+WARM_CONNECTIONS = ("winrm", "psrp", "local")
+
+# Playbook vacío para la ejecución de calentamiento
+WARM_PLAYBOOK = """---
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - ansible.builtin.meta: noop
+"""
+
+# Archivos de variables a precargar (globs relativos al directorio base del proyecto)
+VARS_GLOBS = ("inventory/group_vars/**/*", "inventory/host_vars/**/*", "roles/*/defaults/*")
+
+# path real -> (mtime, datos parseados o None si no se puede precargar)
+_vars_cache: Dict[str, Tuple[float, Any]] = {}
+
+
+def warm_plugins() -> None:
+    """Resuelve los plugins de colecciones para que sus imports queden en memoria."""
+    from ansible.plugins.loader import connection_loader, module_loader, action_loader
+    for name in WARM_MODULES:
+        try:
+            module_loader.find_plugin(name)
+            action_loader.get(name, class_only=True)
+        except Exception:
+            pass
+    for name in WARM_CONNECTIONS:
+        try:
+            connection_loader.get(name, class_only=True)
+        except Exception:
+            pass
+
+
+def warm_run() -> None:
+    """
+    Ejecuta un playbook vacío en el servidor.
+
+    Deja inicializados los caches que ansible-core llena en la primera
+    ejecución (loader de plugins, templates, module_utils), que los hijos heredan.
+    Los singletons de la ejecución (GlobalCLIArgs y, desde ansible-core 2.19,
+    VaultSecretsContext) se descartan: un hijo que los herede inicializados
+    no podría ejecutar su propio PlaybookCLI.
+    """
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
+        f.write(WARM_PLAYBOOK)
+    try:
+        run_job({"args": ["ansible-playbook", "-i", "localhost,", "-c", "local", f.name]})
+    finally:
+        os.unlink(f.name)
+        reset_cli_args()
+
+
+def refresh_vars_cache(base_dir: Path) -> None:
+    """
+    Parsea los archivos de variables nuevos o modificados (por mtime).
+
+    Los archivos con contenido de vault no se precargan: sin la password no se
+    pueden descifrar y el hijo debe leerlos con los secretos de su ejecución.
+    En ansible-core >= 2.19 se cargan marcados como templates confiables, como
+    los carga host_group_vars: si no, el cache sembrado dejaría sus {{ }} sin renderizar.
+    """
+    from ansible.parsing.dataloader import DataLoader
+    loader = DataLoader()
+    load_kwargs: Dict[str, Any] = {"cache": False, "unsafe": True}
+    if "trusted_as_template" in inspect.signature(loader.load_from_file).parameters:
+        load_kwargs["trusted_as_template"] = True
+    seen = set()
+    for pattern in VARS_GLOBS:
+        for path in base_dir.glob(pattern):
+            if path.suffix not in (".yml", ".yaml", ".json") or not path.is_file():
+                continue
+            real_path = os.path.realpath(path)
+            seen.add(real_path)
+            mtime = path.stat().st_mtime
+            cached = _vars_cache.get(real_path)
+            if cached and cached[0] == mtime:
+                continue
+            content = path.read_bytes()
+            parsed = None
+            if b"$ANSIBLE_VAULT" not in content and b"!vault" not in content:
+                try:
+                    parsed = loader.load_from_file(real_path, **load_kwargs)
+                except Exception:
+                    parsed = None
+            _vars_cache[real_path] = (mtime, parsed)
+    for real_path in set(_vars_cache) - seen:
+        del _vars_cache[real_path]
+
+
+def seed_dataloader() -> None:
+    """Hace que cada DataLoader nuevo arranque con los archivos de variables ya parseados."""
+    from ansible.parsing.dataloader import DataLoader
+    original_init = DataLoader.__init__
+
+    def seeded_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self._FILE_CACHE.update(
+            (path, parsed) for path, (_, parsed) in _vars_cache.items() if parsed is not None
+        )
+
+    DataLoader.__init__ = seeded_init
+
+
+def reap_children(signum, frame) -> None:
+    """Recoge los hijos terminados (evita procesos zombie)."""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def run_forked(conn: socket.socket, job: Dict[str, Any]) -> None:
+    """Proceso hijo: ejecuta el trabajo y responde por la conexión. No retorna."""
+    status = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.setsid()
+        reset_cli_args()
+        stream = conn.makefile("w", encoding="utf-8")
+
+        def send(message: Dict[str, Any]) -> None:
+            stream.write(json.dumps(message) + "\n")
+            stream.flush()
+
+        send({"pid": os.getpid()})
+        send(run_job(job, send))
+    except Exception:
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def serve(socket_path: str) -> int:
+    """Precarga todo, abre el socket y atiende pedidos hasta recibir shutdown."""
+    warnings.filterwarnings("ignore", message="AnsibleCollectionFinder has already been configured")
+    base_dir = Path.cwd()
+    info = preload()
+    warm_plugins()
+    warm_run()
+    refresh_vars_cache(base_dir)
+    seed_dataloader()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    signal.signal(signal.SIGCHLD, reap_children)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                line = conn.makefile("r", encoding="utf-8").readline()
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                op = request.get("op")
+                if op == "ping":
+                    conn.sendall((json.dumps({"ready": True, "pid": os.getpid(), "version": CODE_VERSION, **info}) + "\n").encode())
+                elif op == "shutdown":
+                    conn.sendall(b'{"stopped": true}\n')
+                    return 0
+                elif op == "run":
+                    refresh_vars_cache(base_dir)
+                    if os.fork() == 0:
+                        server.close()
+                        run_forked(conn, request)
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python fork_server.py SOCKET_PATH", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(serve(sys.argv[1]))
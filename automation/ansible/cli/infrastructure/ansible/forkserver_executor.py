@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/forkserver_executor.py
+=============================================
+Backend de ejecución "forkserver": cliente del servidor fork_server.py.
+
+app.py inicia el servidor al arrancar (si el backend configurado es
+"forkserver"); cada ejecución se conecta al socket Unix, el servidor hace fork
+de un hijo con ansible-core, colecciones y group_vars ya cargados, y la salida
+vuelve línea a línea. A diferencia del backend "api", admite varios trabajos
+simultáneos (un hijo por trabajo).
+"""
+
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...shared.config import BASE_DIR, logger, STDOUT_CALLBACK, CALLBACK_PLUGINS_DIR, INVENTORY_PLUGINS_DIR
+from ...shared.cancellation import on_cancel, process_group_kwargs, kill_process_group, kill_process_tree
+from ..ansible.api_executor import WORKER_STARTUP_TIMEOUT
+
+SERVER_SCRIPT = Path(__file__).parent / "fork_server.py"
+SOCKET_PATH = BASE_DIR / ".cache" / "itops-forkserver.sock"
+
+# Estado global del módulo
+_server_proc: Optional[subprocess.Popen] = None
+_lock = threading.Lock()
+
+
+def is_fork_server_available() -> bool:
+    """
+    Indica si el backend forkserver puede usarse.
+
+    Requiere POSIX (fork y sockets Unix: Linux/WSL), ansible-core importable
+    y no estar ejecutando desde un .exe de PyInstaller.
+
+    Returns:
+        True si el backend está disponible
+    """
+    if os.name != "posix" or getattr(sys, 'frozen', False):
+        return False
+    return importlib.util.find_spec("ansible") is not None
+
+
+def _request(message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Envía un pedido de una sola respuesta al servidor."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(SOCKET_PATH))
+        sock.sendall((json.dumps(message) + "\n").encode())
+        return json.loads(sock.makefile("r", encoding="utf-8").readline())
+
+
+def _code_version() -> float:
+    """Versión esperada del servidor (mtime de sus scripts)."""
+    return max(os.path.getmtime(SERVER_SCRIPT.parent / name) for name in ("fork_server.py", "api_worker.py"))
+
+
+def ping_fork_server() -> Optional[Dict[str, Any]]:
+    """
+    Consulta si hay un servidor escuchando.
+
+    Returns:
+        Respuesta del servidor (ansible_version, pid, version) o None si no responde
+    """
+    try:
+        return _request({"op": "ping"}, timeout=2)
+    except (OSError, ValueError):
+        return None
+
+
+def start_fork_server() -> bool:
+    """
+    Inicia el servidor si no hay uno respondiendo (lo reutiliza si existe).
+
+    Returns:
+        True si el servidor quedó listo
+    """
+    global _server_proc
+    with _lock:
+        info = ping_fork_server()
+        if info and info.get("version") == _code_version():
+            return True
+        if info:
+            # Servidor de otra sesión con código viejo: reemplazarlo
+            logger.info(f"Reiniciando servidor fork de Ansible desactualizado (pid {info.get('pid')})")
+            try:
+                _request({"op": "shutdown"}, timeout=2)
+            except (OSError, ValueError):
+                pass
+        start_time = time.time()
+        _server_proc = subprocess.Popen(
+            [sys.executable, str(SERVER_SCRIPT), str(SOCKET_PATH)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=str(BASE_DIR),
+            env={
+                **os.environ,
+                "ANSIBLE_STDOUT_CALLBACK": STDOUT_CALLBACK,
+                "ANSIBLE_CALLBACK_PLUGINS": str(CALLBACK_PLUGINS_DIR),
+                "ANSIBLE_INVENTORY_PLUGINS": str(INVENTORY_PLUGINS_DIR),
+                "ANSIBLE_HOST_KEY_CHECKING": "False",
+            },
+            **process_group_kwargs(),
+        )
+        while time.time() - start_time < WORKER_STARTUP_TIMEOUT:
+            if _server_proc.poll() is not None:
+                logger.error(f"El servidor fork de Ansible terminó al iniciar (rc={_server_proc.returncode})")
+                _server_proc = None
+                return False
+            info = ping_fork_server()
+            if info:
+                logger.info(
+                    f"Servidor fork de Ansible {info.get('ansible_version')} listo en "
+                    f"{time.time() - start_time:.2f}s (pid {info.get('pid')})"
+                )
+                return True
+            time.sleep(0.1)
+        logger.error("Timeout iniciando el servidor fork de Ansible")
+        kill_process_group(_server_proc)
+        _server_proc = None
+        return False
+
+
+def stop_fork_server() -> None:
+    """Detiene el servidor si lo inició esta sesión."""
+    global _server_proc
+    with _lock:
+        if _server_proc is None:
+            return
+        try:
+            _request({"op": "shutdown"}, timeout=2)
+            _server_proc.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            kill_process_group(_server_proc)
+        _server_proc = None
+
+
+def _kill_job(pid: Optional[int]) -> None:
+    """Mata el hijo de un trabajo (corre en su propia sesión) y todos sus descendientes."""
+    if pid:
+        kill_process_tree(pid)
+
+
+def run_playbook_in_fork_server(
+    cmd: List[str],
+    env: Dict[str, str],
+    timeout: float,
+    on_line: Optional[Callable[[str], None]] = None,
+    vault_password: Optional[str] = None
+) -> Tuple[int, str, str]:
+    """
+    Ejecuta un playbook en un hijo del servidor fork.
+
+    Args:
+        cmd: Argumentos de ansible-playbook
+        env: Entorno de la ejecución
+        timeout: Timeout en segundos
+        on_line: Si se indica, recibe cada línea de stdout a medida que llega
+        vault_password: Password del vault (viaja por el socket Unix, no por disco)
+
+    Returns:
+        Tupla (returncode, stdout, stderr)
+
+    Raises:
+        subprocess.TimeoutExpired: Si la ejecución excede el timeout (se mata el hijo)
+        RuntimeError: Si el servidor no está disponible o el hijo termina sin responder
+    """
+    if not ping_fork_server() and not start_fork_server():
+        raise RuntimeError("El servidor fork de Ansible no está disponible")
+
+    deadline = time.time() + timeout
+    # pid del hijo (llega en el primer mensaje) y si se pidió cancelar antes de conocerlo
+    state: Dict[str, Any] = {"pid": None, "cancelled": False}
+    state_lock = threading.Lock()
+
+    def cancel() -> None:
+        with state_lock:
+            state["cancelled"] = True
+            pid = state["pid"]
+        _kill_job(pid)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(SOCKET_PATH))
+        job = {"op": "run", "args": cmd, "env": env, "stream": on_line is not None, "vault_password": vault_password}
+        sock.sendall((json.dumps(job) + "\n").encode())
+        reader = sock.makefile("r", encoding="utf-8")
+        with on_cancel(cancel):
+            while True:
+                # Tras un timeout el buffer del reader queda indefinido: no se vuelve
+                # a leer, se mata el hijo y se cierra la conexión (si el pid todavía
+                # no llegó, el hijo muere al no poder enviarlo)
+                sock.settimeout(max(deadline - time.time(), 0.001))
+                try:
+                    line = reader.readline()
+                except socket.timeout:
+                    cancel()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if not line:
+                    raise RuntimeError("El trabajo del servidor fork terminó sin responder")
+                message = json.loads(line)
+                if "pid" in message:
+                    with state_lock:
+                        state["pid"] = message["pid"]
+                        cancelled = state["cancelled"]
+                    if cancelled:
+                        _kill_job(message["pid"])
+                elif "line" in message:
+                    on_line(message["line"])
+                else:
+                    return message["returncode"], message["stdout"], message["stderr"]
@@ -5,36 +5,192 @@ infrastructure/ansible/health_checker.py
 Verificador de salud de hosts.
 
 Contiene funciones para verificar conectividad y obtener información rápida de hosts.
+Ambas salen de un mismo probe (probe_host): una sola conexión que ejecuta el
+script de snapshot y, si responde, deja el host online y su snapshot guardado.
 """
 
 import os
 import json
 import subprocess
 import socket
-import tempfile
-from typing import Optional
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
 
-import questionary
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from ...shared.config import BASE_DIR, logger, console
+from ...shared.config import BASE_DIR, logger, console, PROBE_TIMEOUT
 from ...domain.models import HostSnapshot, ExecutionResult
-from ..ansible.vault_manager import decrypt_vault
-from ..ansible.inventory_builder import build_dynamic_inventory
+from ..ansible.vault_manager import decrypt_vault, vault_password_pipe
+from ..ansible.inventory_builder import resolve_target_ip, DEFAULT_WINRM_VARS
+from ..ansible.command_builder import attach_inventory
+from ..ansible.reachability_cache import ReachabilityEntry, get_cached, record_probe
+from ..ansible.fact_store import get_facts, put_facts
+from ..remote.preflight import preflight_hosts
+from ..remote.session_pool import WinRMCredentials, is_pool_available, run_powershell
 from ...domain.services.validation_service import validate_hostname
 
+# PowerShell para obtener Snapshot rápido
+SNAPSHOT_PS_SCRIPT = (
+    "$user = (Get-CimInstance Win32_ComputerSystem).UserName; "
+    "$os = (Get-CimInstance Win32_OperatingSystem).Caption; "
+    "$disk = Get-CimInstance Win32_LogicalDisk -Filter \"DeviceID='C:'\"; "
+    "$free = [math]::round($disk.FreeSpace / 1GB, 1); "
+    "$total = [math]::round($disk.Size / 1GB, 1); "
+    "@{ user=$user; os=$os; disk_free=$free; disk_total=$total } | ConvertTo-Json"
+)
 
-def check_host_online(hostname: str, vault_password: Optional[str] = None) -> bool:
+
+# Error del probe que superó PROBE_TIMEOUT (conexión + script de snapshot)
+PROBE_TIMEOUT_ERROR = f"Timeout ({PROBE_TIMEOUT}s)"
+
+
+@dataclass
+class HostProbe:
+    """Resultado de probe_host: conectividad y snapshot de una misma conexión."""
+    hostname: str
+    reachability: ReachabilityEntry
+    snapshot: Optional[HostSnapshot] = None
+    error: str = ""
+
+    @property
+    def online(self) -> bool:
+        return self.reachability.reachable
+
+
+def _pool_credentials(vault_vars: dict) -> Optional[WinRMCredentials]:
+    """Credenciales para el pool de sesiones WinRM (None si no se puede usar)."""
+    if not is_pool_available():
+        return None
+    return WinRMCredentials.from_vault_vars(vault_vars)
+
+
+def _pool_transport(hostname: str) -> Tuple[str, Optional[str], str]:
+    """
+    Dirección y transporte WinRM con los que abrir la sesión del pool.
+
+    Usa el transporte del cache de alcanzabilidad si el host está online en
+    él; si no, hace el preflight del host (Identify en 5985 y luego 5986):
+    los hosts que solo responden por https no se dan por offline.
+
+    Returns:
+        Tupla (dirección, transporte o None si no responde, error del preflight)
+    """
+    entry = get_cached(hostname)
+    if entry and entry.reachable and entry.transport:
+        return entry.address or resolve_target_ip(hostname) or hostname, entry.transport, ""
+    probe = preflight_hosts([hostname])[hostname]
+    return probe.address or hostname, probe.transport if probe.reachable else None, probe.error
+
+
+def _run_snapshot_with_deadline(address: str, credentials: WinRMCredentials) -> Tuple[int, str, str]:
+    """
+    Ejecuta el script de snapshot con el pool, con PROBE_TIMEOUT como plazo total.
+
+    pywinrm reintenta las operaciones WS-Man que vencen y run_powershell
+    reintenta una vez con sesión nueva: sin un plazo total un host colgado
+    podía tardar varias veces PROBE_TIMEOUT. Al vencer, el hilo sigue hasta
+    que pywinrm termine y la sesión se descarta en el pool.
+
+    Raises:
+        TimeoutError: Si no terminó en PROBE_TIMEOUT segundos
+        Exception: Errores de run_powershell
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = run_powershell(address, credentials, SNAPSHOT_PS_SCRIPT)
+        except Exception as e:
+            outcome["error"] = e
+
+    # Hilo daemon: uno colgado no bloquea la salida de la aplicación
+    thread = threading.Thread(target=target, name=f"probe-{address}", daemon=True)
+    thread.start()
+    thread.join(PROBE_TIMEOUT)
+    if thread.is_alive():
+        raise TimeoutError(PROBE_TIMEOUT_ERROR)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def _connect_progress(hostname: str) -> Progress:
+    """Spinner de "Conectando a ..." (transitorio)."""
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+        transient=True
+    )
+    progress.add_task(f"[cyan]Conectando a {hostname}...", total=None)
+    return progress
+
+
+def _report_offline(hostname: str, error_msg: str) -> None:
+    """Muestra el panel de host offline (y ofrece reparar WinRM si es el equipo local)."""
+    console.print(Panel(
+        f"[yellow]El host {hostname} no responde a WinRM[/yellow]\n\n"
+        f"[dim]Verificar:\n"
+        f"  • WinRM habilitado (Enable-PSRemoting -Force)\n"
+        f"  • Puertos abiertos (5985/5986)\n"
+        f"  • Firewall configurado\n"
+        f"  • Hostname/IP correcta\n"
+        f"  • Resolución DNS funciona[/dim]\n\n"
+        f"[red dim]Error: {error_msg if error_msg else 'Sin detalles'}[/red dim]",
+        title=f"[red]❌ Host {hostname} Offline[/red]",
+        border_style="red"
+    ))
+    
+    # Si el host es localhost, ofrecer reparación
+    my_hostname = socket.gethostname().lower()
+    if hostname.lower() in [my_hostname, "localhost", "127.0.0.1"]:
+        import questionary
+        if questionary.confirm("¿Deseas ver los comandos para reparar WinRM localmente?", default=True).ask():
+            # Importar aquí para evitar dependencia circular
+            from ..ansible.winrm_repair import repair_winrm_local
+            repair_winrm_local()
+
+
+def _report_cached(hostname: str) -> Optional[bool]:
+    """Informa el resultado vigente del cache de alcanzabilidad (None si hay que probar)."""
+    entry = get_cached(hostname)
+    if entry is None:
+        return None
+    now = time.time()
+    if entry.reachable:
+        console.print(
+            f"[green]✅ Host {hostname} online[/green] [dim](verificado hace {now - entry.checked_at:.0f}s)[/dim]\n"
+        )
+        return True
+    console.print(
+        f"[yellow]Host {hostname} offline según el cache ({entry.failures} fallas seguidas, "
+        f"próximo intento en {entry.expires_at - now:.0f}s)[/yellow]\n"
+        f"[red dim]Último error: {entry.error or 'Sin detalles'}[/red dim]\n"
+    )
+    return False
+
+
+def check_host_online(
+    hostname: str,
+    vault_password: Optional[str] = None,
+    force_refresh: bool = False
+) -> bool:
     """
     Verifica si el host responde a WinRM antes de ejecutar tareas.
     
-    Ejecuta ansible -m win_ping para verificar conectividad.
-    Usa inventario dinámico para no depender del archivo estático.
+    Hace un probe_host: la misma conexión trae el snapshot, que queda en el
+    fact store, así un get_host_snapshot posterior no vuelve a conectarse.
+    
+    Un resultado vigente del cache de alcanzabilidad evita el probe (hosts
+    offline conocidos no vuelven a esperar el timeout hasta su backoff).
     
     Args:
         hostname: Hostname del equipo a verificar
         vault_password: Password del vault (opcional)
+        force_refresh: Ignorar el cache y probar el host
     
     Returns:
         bool: True si el host está online
@@ -44,198 +200,183 @@ def check_host_online(hostname: str, vault_password: Optional[str] = None) -> bo
     
     console.print(f"\n[cyan]🔍 Verificando conectividad con {hostname}...[/cyan]")
     
-    env = os.environ.copy()
-    env["ANSIBLE_STDOUT_CALLBACK"] = "json"
-    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
-    
-    if vault_password:
-        env["ANSIBLE_VAULT_PASSWORD"] = vault_password
-    
-    # Descifrar variables del vault si hay password
-    vault_vars = {}
-    if vault_password:
-        vault_vars = decrypt_vault(vault_password)
-    
-    # Crear inventario dinámico temporal en inventory/
-    inventory_content = build_dynamic_inventory(hostname, vault_vars=vault_vars)
-    inventory_file = tempfile.NamedTemporaryFile(
-        mode='w', suffix='.ini', dir=str(BASE_DIR / "inventory"), delete=False
-    )
-    inventory_file.write(inventory_content)
-    inventory_file.close()
-    
-    cmd = [
-        "ansible",
-        "-i", inventory_file.name,
-        hostname,
-        "-m", "win_ping"
-    ]
-    
-    # Manejo de Vault
-    vault_file = None
-    if vault_password:
-        vault_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        vault_file.write(vault_password)
-        vault_file.close()
-        cmd.extend(["--vault-password-file", vault_file.name])
+    if not force_refresh:
+        cached = _report_cached(hostname)
+        if cached is not None:
+            return cached
     
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-            transient=True
-        ) as progress:
-            progress.add_task(f"[cyan]Conectando a {hostname}...", total=None)
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=15,
-                cwd=str(BASE_DIR)
-            )
-        
-        if result.returncode == 0:
-            console.print(f"[green]✅ Host {hostname} online y accesible[/green]\n")
-            return True
-        else:
-            # Intentar extraer error de stdout si stderr está vacío (común en Ansible)
-            error_msg = result.stderr.strip() if result.stderr else ""
-            if not error_msg and result.stdout:
-                if "msg" in result.stdout:
-                    try:
-                        data = json.loads(result.stdout)
-                        error_msg = data.get("plays", [{}])[0].get("tasks", [{}])[0].get("hosts", {}).get(hostname, {}).get("msg", "")
-                    except:
-                        error_msg = result.stdout[:200].strip()
-                else:
-                    error_msg = result.stdout[:200].strip()
-
-            console.print(Panel(
-                f"[yellow]El host {hostname} no responde a WinRM[/yellow]\n\n"
-                f"[dim]Verificar:\n"
-                f"  • WinRM habilitado (Enable-PSRemoting -Force)\n"
-                f"  • Puertos abiertos (5985/5986)\n"
-                f"  • Firewall configurado\n"
-                f"  • Hostname/IP correcta\n"
-                f"  • Resolución DNS funciona[/dim]\n\n"
-                f"[red dim]Error: {error_msg if error_msg else 'Sin detalles'}[/red dim]",
-                title=f"[red]❌ Host {hostname} Offline[/red]",
-                border_style="red"
-            ))
-            
-            # Si el host es localhost, ofrecer reparación
-            my_hostname = socket.gethostname().lower()
-            if hostname.lower() in [my_hostname, "localhost", "127.0.0.1"]:
-                if questionary.confirm("¿Deseas ver los comandos para reparar WinRM localmente?", default=True).ask():
-                    # Importar aquí para evitar dependencia circular
-                    from ..ansible.winrm_repair import repair_winrm_local
-                    repair_winrm_local()
-                    
-            return False
-            
-    except subprocess.TimeoutExpired:
+        with _connect_progress(hostname):
+            probe = probe_host(hostname, vault_password)
+    except Exception as e:
         console.print(Panel(
-            f"[yellow]Timeout conectando a {hostname}[/yellow]\n\n"
-            "[dim]El host no respondió en 15 segundos.[/dim]",
-            title=f"[red]⏱️ Timeout[/red]",
+            f"[red]Error ejecutando health check: {e}[/red]",
+            title="Error",
             border_style="red"
         ))
         return False
-    except Exception as e:
+    
+    if probe.online:
+        console.print(f"[green]✅ Host {hostname} online y accesible[/green]\n")
+        return True
+    if probe.error == PROBE_TIMEOUT_ERROR:
         console.print(Panel(
-            f"[red]Error ejecutando health check: {e}[/red]",
-            title="Error",
+            f"[yellow]Timeout conectando a {hostname}[/yellow]\n\n"
+            f"[dim]El host no respondió en {PROBE_TIMEOUT} segundos.[/dim]",
+            title=f"[red]⏱️ Timeout[/red]",
             border_style="red"
         ))
         return False
-    finally:
-        # Limpiar archivos temporales
-        if os.path.exists(inventory_file.name):
-            os.unlink(inventory_file.name)
-        if vault_file and os.path.exists(vault_file.name):
-            os.unlink(vault_file.name)
+    _report_offline(hostname, probe.error)
+    return False
 
 
-def get_host_snapshot(hostname: str, vault_password: Optional[str] = None) -> Optional[HostSnapshot]:
+def get_host_snapshot(
+    hostname: str,
+    vault_password: Optional[str] = None,
+    force_refresh: bool = False
+) -> Optional[HostSnapshot]:
     """
     Obtiene información rápida del host (Usuario, OS, Disco).
     
-    Se ejecuta como un paso rápido tras verificar que el host está online.
+    Dentro de SNAPSHOT_TTL (ej: justo después de check_host_online) se
+    responde desde el fact store sin conectarse; si no, hace un probe_host.
     
     Args:
         hostname: Hostname del equipo
         vault_password: Password del vault (opcional)
+        force_refresh: Consultar el equipo aunque haya un snapshot vigente
         
     Returns:
         HostSnapshot con información del host o None si falla
     """
-    env = os.environ.copy()
-    env["ANSIBLE_STDOUT_CALLBACK"] = "json"
-    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
-    if vault_password:
-        env["ANSIBLE_VAULT_PASSWORD"] = vault_password
-
-    # Descifrar variables del vault si hay password
-    vault_vars = {}
-    if vault_password:
-        vault_vars = decrypt_vault(vault_password)
-
-    # PowerShell para obtener Snapshot rápido
-    ps_script = (
-        "$user = (Get-CimInstance Win32_ComputerSystem).UserName; "
-        "$os = (Get-CimInstance Win32_OperatingSystem).Caption; "
-        "$disk = Get-CimInstance Win32_LogicalDisk -Filter \\\"DeviceID='C:'\\\"; "
-        "$free = [math]::round($disk.FreeSpace / 1GB, 1); "
-        "$total = [math]::round($disk.Size / 1GB, 1); "
-        "@{ user=$user; os=$os; disk_free=$free; disk_total=$total } | ConvertTo-Json"
-    )
+    if not force_refresh:
+        record = get_facts(hostname, "snapshot")
+        if record:
+            return HostSnapshot(**{**record.data, "cached_at": record.collected_at})
+    
+    try:
+        return probe_host(hostname, vault_password).snapshot
+    except Exception as e:
+        logger.error(f"Error obteniendo snapshot: {e}")
+        return None
+
 
-    inventory_content = build_dynamic_inventory(hostname, vault_vars=vault_vars)
-    # Crear inventario en inventory/ para que Ansible encuentre group_vars/
-    inventory_file = tempfile.NamedTemporaryFile(
-        mode='w', suffix='.ini', dir=str(BASE_DIR / "inventory"), delete=False
+def probe_host(hostname: str, vault_password: Optional[str] = None) -> HostProbe:
+    """
+    Verifica la conectividad y obtiene el snapshot del host en una sola conexión.
+    
+    Ejecuta el script de snapshot con una sesión del pool de WinRM (pywinrm y
+    credenciales del vault) o con ansible -m win_shell: si el host responde
+    está online y la misma respuesta trae usuario, OS y disco. Registra el
+    resultado en el cache de alcanzabilidad y el snapshot en el fact store.
+    
+    La sesión del pool usa el transporte del cache o del preflight (5986/https
+    si el host solo responde ahí) y tiene PROBE_TIMEOUT como plazo total.
+    
+    Args:
+        hostname: Hostname del equipo
+        vault_password: Password del vault (opcional)
+        
+    Returns:
+        HostProbe con el registro de alcanzabilidad y el snapshot (si se obtuvo)
+    
+    Raises:
+        OSError: Si no se puede lanzar ansible
+    """
+    vault_vars = decrypt_vault(vault_password) if vault_password else {}
+    credentials = _pool_credentials(vault_vars)
+    start = time.perf_counter()
+    if credentials:
+        address, transport, error = _pool_transport(hostname)
+        online, stdout = False, ""
+        if transport:
+            try:
+                returncode, stdout, stderr = _run_snapshot_with_deadline(
+                    address, credentials.for_transport(transport)
+                )
+                # El host respondió aunque el script falle (ej: CIM roto)
+                online, error = True, "" if returncode == 0 else stderr.strip()
+                if returncode != 0:
+                    stdout = ""
+            except Exception as e:
+                online, stdout, error = False, "", str(e)
+    else:
+        address = None
+        transport = DEFAULT_WINRM_VARS["ansible_winrm_scheme"]
+        online, stdout, error = _probe_with_ansible(hostname, vault_password, vault_vars)
+    latency = time.perf_counter() - start
+    
+    snapshot = None
+    if stdout:
+        try:
+            snapshot = _parse_snapshot(hostname, stdout)
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Snapshot de {hostname} ilegible: {e}")
+    
+    reachability = record_probe(
+        hostname, online, latency=latency if online else None, transport=transport,
+        address=address, error="" if online else error[:200]
     )
-    inventory_file.write(inventory_content)
-    inventory_file.close()
+    if snapshot:
+        put_facts(hostname, "snapshot", asdict(snapshot))
+    return HostProbe(hostname, reachability, snapshot, error)
 
-    cmd = [
-        "ansible",
-        "-i", inventory_file.name,
-        hostname,
-        "-m", "win_shell",
-        "-a", ps_script
-    ]
 
+def _probe_with_ansible(hostname: str, vault_password: Optional[str], vault_vars: dict) -> Tuple[bool, str, str]:
+    """
+    Ejecuta el script de snapshot con ansible -m win_shell.
+    
+    Returns:
+        Tupla (online, stdout del script, error)
+    """
+    env = os.environ.copy()
+    env["ANSIBLE_STDOUT_CALLBACK"] = "json"
+    # Los comandos ad-hoc ignoran el stdout callback si no se habilita
+    env["ANSIBLE_LOAD_CALLBACK_PLUGINS"] = "1"
+    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+    
+    # Para el argumento -a de ansible las comillas dobles van escapadas
+    cmd = ["ansible", hostname, "-m", "win_shell", "-a", SNAPSHOT_PS_SCRIPT.replace('"', '\\"')]
+    # Inventario dinámico en memoria
+    inventory_path = attach_inventory(cmd, env, [hostname], vault_vars)
     try:
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, env=env, timeout=30, cwd=str(BASE_DIR)
-        )
-        if result.returncode == 0:
-            output = result.stdout
-            if "{" in output:
-                json_start = output.find("{")
-                json_end = output.rfind("}") + 1
-                data = json.loads(output[json_start:json_end])
-                
-                # Extraer de la estructura de Ansible
-                if "plays" in data:
-                    res = data["plays"][0]["tasks"][0]["hosts"][hostname]
-                    if "stdout" in res:
-                        shot = json.loads(res["stdout"])
-                        return HostSnapshot(
-                            hostname=hostname,
-                            user=shot.get("user", "N/A"),
-                            os=shot.get("os", "N/A"),
-                            disk_free=shot.get("disk_free", 0),
-                            disk_total=shot.get("disk_total", 0)
-                        )
-    except Exception as e:
-        logger.error(f"Error obteniendo snapshot: {e}")
+        # Manejo de Vault: la password viaja por un pipe, no por un archivo
+        with vault_password_pipe(vault_password) as (password_args, pass_fds):
+            result = subprocess.run(
+                cmd + password_args, capture_output=True, text=True, env=env,
+                timeout=PROBE_TIMEOUT, cwd=str(BASE_DIR), pass_fds=pass_fds
+            )
+    except subprocess.TimeoutExpired:
+        return False, "", PROBE_TIMEOUT_ERROR
     finally:
-        if os.path.exists(inventory_file.name):
-            os.unlink(inventory_file.name)
+        if inventory_path and os.path.exists(inventory_path):
+            os.unlink(inventory_path)
     
-    return None
+    host_result = None
+    if "{" in result.stdout:
+        try:
+            data = json.loads(result.stdout[result.stdout.find("{"):result.stdout.rfind("}") + 1])
+            host_result = data["plays"][0]["tasks"][0]["hosts"][hostname]
+        except (ValueError, KeyError, IndexError):
+            pass
+    if host_result is None:
+        return False, "", result.stderr.strip() or result.stdout[:200].strip()
+    if host_result.get("unreachable") or "rc" not in host_result:
+        # Sin rc el módulo no llegó a ejecutarse en el host (ej: variables de conexión indefinidas)
+        return False, "", host_result.get("msg", "")
+    if host_result.get("failed"):
+        return True, "", host_result.get("stderr") or host_result.get("msg", "")
+    return True, host_result.get("stdout", ""), ""
+
+
+def _parse_snapshot(hostname: str, output: str) -> HostSnapshot:
+    """Convierte el JSON del script de snapshot en un HostSnapshot."""
+    shot = json.loads(output)
+    return HostSnapshot(
+        hostname=hostname,
+        user=shot.get("user", "N/A"),
+        os=shot.get("os", "N/A"),
+        disk_free=shot.get("disk_free", 0),
+        disk_total=shot.get("disk_total", 0)
+    )
@@ -4,13 +4,17 @@ infrastructure/ansible/inventory_builder.py
 ==========================================
 Constructor de inventarios dinámicos de Ansible.
 
-Construye inventarios dinámicos en formato INI para conectar a hosts sin necesidad
-de tenerlos en el inventario estático.
+Construye inventarios dinámicos para conectar a hosts sin necesidad de tenerlos
+en el inventario estático: en memoria para el plugin itops_targets (payload en
+una variable de entorno) o en formato INI.
 """
 
+import base64
+import json
 import socket
+import zlib
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import logging
 
 from ...shared.config import BASE_DIR, logger
@@ -30,6 +34,25 @@ DEFAULT_WINRM_VARS = {
     "ansible_password": "{{ vault_ansible_password }}",
 }
 
+# Variables por host según el transporte WinRM que detectó el preflight
+# (infrastructure/remote/preflight.py): http usa las del grupo target
+WINRM_TRANSPORT_VARS = {
+    "https": {"ansible_port": "5986", "ansible_winrm_scheme": "https"},
+}
+
+
+def transport_vars(transport: Optional[str]) -> Dict[str, str]:
+    """
+    Variables de conexión de un host que solo responde en otro transporte.
+
+    Args:
+        transport: "http", "https" o None (sin preflight)
+
+    Returns:
+        Dict variable -> valor (vacío si alcanzan las del grupo)
+    """
+    return WINRM_TRANSPORT_VARS.get(transport or "", {})
+
 
 def ensure_cache_setup() -> Path:
     """
@@ -63,6 +86,127 @@ def ensure_cache_setup() -> Path:
     return cache_dir
 
 
+def resolve_target_ip(hostname: str) -> Optional[str]:
+    """
+    Resuelve la IP a usar como ansible_host para un target.
+    
+    Si el hostname es la propia máquina usa el gateway de WSL; si el DNS
+    falla (o resuelve a localhost) prueba el gateway como último recurso.
+    
+    Args:
+        hostname: El hostname o IP del equipo
+        
+    Returns:
+        IP resuelta o None
+    """
+    # TRUCO: Si el hostname ingresado es el de tu propia máquina, 
+    # forzamos el uso de la IP del Gateway de WSL automáticamente.
+    my_hostname = socket.gethostname().lower()
+    if hostname.lower() in [my_hostname, "localhost", "127.0.0.1", "127.0.1.1"]:
+        gateway = get_wsl_gateway()
+        if gateway:
+            logger.info(f"Target es local, forzando IP de Gateway: {gateway}")
+            return gateway
+    
+    # Si aún no hay IP, intentar resolver normalmente
+    resolved_ip, msg = resolve_hostname(hostname)
+    
+    # Si el DNS falla (resuelve a localhost), intentar con el gateway como último recurso
+    if not resolved_ip:
+        gateway = get_wsl_gateway()
+        if gateway and test_port(gateway, 5985):
+            logger.info(f"DNS resuelve mal para {hostname}, usando gateway WSL: {gateway}")
+            resolved_ip = gateway
+    return resolved_ip
+
+
+def connection_vars(vault_vars: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Variables de conexión WinRM del grupo target.
+    
+    Args:
+        vault_vars: Variables del vault descifradas (opcional)
+        
+    Returns:
+        Dict variable -> valor
+    """
+    # Usar variables del vault si están disponibles, sino usar referencias {{ }} 
+    # para que Ansible las cargue desde group_vars/all/vault.yml cuando se proporcione --vault-password-file
+    vault_vars = vault_vars or {}
+    debug_logger.log(
+        "infrastructure/ansible/inventory_builder.py:95",
+        "Construyendo inventario dinámico",
+        {
+            "has_vault_vars": bool(vault_vars),
+            "vault_keys": list(vault_vars.keys()) if vault_vars else [],
+            "has_user": "vault_ansible_user" in vault_vars,
+            "has_password": "vault_ansible_password" in vault_vars
+        },
+        hypothesis_id="E"
+    )
+    
+    has_user = "vault_ansible_user" in vault_vars
+    has_password = "vault_ansible_password" in vault_vars
+    
+    # Para ansible_user y ansible_password:
+    # 1. Si tenemos valores del vault descifrados, usar los valores directamente
+    # 2. Si no, usar referencias {{ }} para que Ansible las cargue desde group_vars/all/vault.yml
+    variables = dict(DEFAULT_WINRM_VARS)
+    if has_user:
+        variables["ansible_user"] = vault_vars["vault_ansible_user"]
+    if has_password:
+        variables["ansible_password"] = vault_vars["vault_ansible_password"]
+    return variables
+
+
+def render_connection_vars(vault_vars: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Genera las líneas de variables de conexión WinRM del grupo [target:vars].
+    
+    Args:
+        vault_vars: Variables del vault descifradas (opcional)
+        
+    Returns:
+        Lista de líneas key=value
+    """
+    return [f"{key}={value}" for key, value in connection_vars(vault_vars).items()]
+
+
+def build_inventory_payload(
+    hostnames: List[str],
+    vault_vars: Optional[Dict[str, str]] = None,
+    resolved_ips: Optional[Dict[str, Optional[str]]] = None,
+    transports: Optional[Dict[str, Optional[str]]] = None
+) -> str:
+    """
+    Construye el inventario para el plugin itops_targets (variable ITOPS_INVENTORY).
+    
+    Mismos grupos y variables que build_batch_inventory, como JSON comprimido
+    con zlib y en base64: miles de hosts entran en una variable de entorno.
+    
+    Args:
+        hostnames: Lista de hostnames o IPs
+        vault_vars: Variables del vault descifradas (opcional)
+        resolved_ips: IPs ya resueltas por hostname (opcional)
+        transports: Transporte WinRM detectado por hostname (opcional, ver transport_vars)
+        
+    Returns:
+        str: Payload para la variable de entorno
+    """
+    resolved_ips = resolved_ips or {}
+    transports = transports or {}
+    data = {
+        "hosts": {hostname: resolved_ips.get(hostname) or resolve_target_ip(hostname) for hostname in hostnames},
+        "vars": connection_vars(vault_vars),
+    }
+    for hostname in hostnames:
+        host_vars = transport_vars(transports.get(hostname))
+        if host_vars:
+            data.setdefault("host_vars", {})[hostname] = host_vars
+    compressed = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+    return base64.b64encode(compressed).decode("ascii")
+
+
 def build_dynamic_inventory(
     hostname: str, 
     resolved_ip: Optional[str] = None,
@@ -87,25 +231,7 @@ def build_dynamic_inventory(
     """
     # Si no tenemos IP resuelta, intentar resolver
     if not resolved_ip:
-        # TRUCO: Si el hostname ingresado es el de tu propia máquina, 
-        # forzamos el uso de la IP del Gateway de WSL automáticamente.
-        my_hostname = socket.gethostname().lower()
-        if hostname.lower() in [my_hostname, "localhost", "127.0.0.1", "127.0.1.1"]:
-            gateway = get_wsl_gateway()
-            if gateway:
-                resolved_ip = gateway
-                logger.info(f"Target es local, forzando IP de Gateway: {gateway}")
-        
-        # Si aún no hay IP, intentar resolver normalmente
-        if not resolved_ip:
-            resolved_ip, msg = resolve_hostname(hostname)
-            
-            # Si el DNS falla (resuelve a localhost), intentar con el gateway como último recurso
-            if not resolved_ip:
-                gateway = get_wsl_gateway()
-                if gateway and test_port(gateway, 5985):
-                    logger.info(f"DNS resuelve mal para {hostname}, usando gateway WSL: {gateway}")
-                    resolved_ip = gateway
+        resolved_ip = resolve_target_ip(hostname)
     
     lines = [
         "[target]",
@@ -121,43 +247,7 @@ def build_dynamic_inventory(
     if resolved_ip and resolved_ip != hostname:
         lines.append(f"ansible_host={resolved_ip}")
     
-    # Usar variables del vault si están disponibles, sino usar referencias {{ }} 
-    # para que Ansible las cargue desde group_vars/all/vault.yml cuando se proporcione --vault-password-file
-    vault_vars = vault_vars or {}
-    debug_logger.log(
-        "infrastructure/ansible/inventory_builder.py:95",
-        "Construyendo inventario dinámico",
-        {
-            "has_vault_vars": bool(vault_vars),
-            "vault_keys": list(vault_vars.keys()) if vault_vars else [],
-            "has_user": "vault_ansible_user" in vault_vars,
-            "has_password": "vault_ansible_password" in vault_vars
-        },
-        hypothesis_id="E"
-    )
-    
-    has_user = "vault_ansible_user" in vault_vars
-    has_password = "vault_ansible_password" in vault_vars
-    
-    for key, default_value in DEFAULT_WINRM_VARS.items():
-        # Para ansible_user y ansible_password:
-        # 1. Si tenemos valores del vault descifrados, usar los valores directamente
-        # 2. Si no, usar referencias {{ }} para que Ansible las cargue desde group_vars/all/vault.yml
-        if key == "ansible_user":
-            if has_user:
-                lines.append(f"ansible_user={vault_vars['vault_ansible_user']}")
-            else:
-                # Usar referencia para que Ansible la cargue del vault
-                lines.append(f"ansible_user={default_value}")
-        elif key == "ansible_password":
-            if has_password:
-                lines.append(f"ansible_password={vault_vars['vault_ansible_password']}")
-            else:
-                # Usar referencia para que Ansible la cargue del vault
-                lines.append(f"ansible_password={default_value}")
-        else:
-            # Para las demás variables, siempre agregar
-            lines.append(f"{key}={default_value}")
+    lines.extend(render_connection_vars(vault_vars))
     
     inventory_content = "\n".join(lines)
     debug_logger.log(
@@ -167,3 +257,39 @@ def build_dynamic_inventory(
         hypothesis_id="E"
     )
     return inventory_content
+
+
+def build_batch_inventory(
+    hostnames: List[str],
+    vault_vars: Optional[Dict[str, str]] = None,
+    resolved_ips: Optional[Dict[str, Optional[str]]] = None,
+    transports: Optional[Dict[str, Optional[str]]] = None
+) -> str:
+    """
+    Construye un único inventario INI con todos los targets de un batch.
+    
+    Cada host va en el grupo [target] con su propio ansible_host (y puerto y
+    esquema si solo responde por https); las variables de conexión se
+    comparten en [target:vars].
+    
+    Args:
+        hostnames: Lista de hostnames o IPs
+        vault_vars: Variables del vault descifradas (opcional)
+        resolved_ips: IPs ya resueltas por hostname (opcional)
+        transports: Transporte WinRM detectado por hostname (opcional, ver transport_vars)
+        
+    Returns:
+        str: Contenido del inventario en formato INI
+    """
+    resolved_ips = resolved_ips or {}
+    transports = transports or {}
+    lines = ["[target]"]
+    for hostname in hostnames:
+        resolved_ip = resolved_ips.get(hostname) or resolve_target_ip(hostname)
+        host_vars = dict(transport_vars(transports.get(hostname)))
+        if resolved_ip and resolved_ip != hostname:
+            host_vars = {"ansible_host": resolved_ip, **host_vars}
+        lines.append(" ".join([hostname] + [f"{key}={value}" for key, value in host_vars.items()]))
+    lines.extend(["", "[windows_hosts:children]", "target", "", "[target:vars]"])
+    lines.extend(render_connection_vars(vault_vars))
+    return "\n".join(lines)
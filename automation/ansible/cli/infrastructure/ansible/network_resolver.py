@@ -5,16 +5,31 @@ infrastructure/ansible/network_resolver.py
 Resolución de red y DNS.
 
 Contiene funciones para resolver hostnames, detectar WSL gateway y probar conectividad.
+
+Las resoluciones se cachean en memoria: las exitosas durante DNS_CACHE_TTL y
+las fallidas o que apuntan a localhost (127.x) durante DNS_NEGATIVE_TTL, así
+un hostname que no resuelve no vuelve a esperar el timeout del resolver en
+el health check, el snapshot y el playbook de una misma acción.
 """
 
-import subprocess
+import asyncio
 import socket
-from typing import Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import logging
 
+from ...shared.config import DNS_CACHE_TTL, DNS_NEGATIVE_TTL, DNS_RESOLVE_CONCURRENCY
+from ..ansible.routing_info import get_default_gateway
+
 logger = logging.getLogger(__name__)
 
+# hostname (minúsculas) -> (vence, ip o None, mensaje)
+_dns_cache: Dict[str, Tuple[float, Optional[str], str]] = {}
+_dns_lock = threading.Lock()
+
 
 def get_wsl_gateway() -> Optional[str]:
     """
@@ -23,14 +38,7 @@ def get_wsl_gateway() -> Optional[str]:
     Returns:
         IP del gateway o None si no se puede obtener
     """
-    try:
-        result = subprocess.check_output(
-            "ip route show | grep default | awk '{print $3}'",
-            shell=True, stderr=subprocess.DEVNULL
-        ).decode().strip()
-        return result if result else None
-    except Exception:
-        return None
+    return get_default_gateway()
 
 
 def resolve_hostname(hostname: str) -> Tuple[Optional[str], str]:
@@ -38,7 +46,7 @@ def resolve_hostname(hostname: str) -> Tuple[Optional[str], str]:
     Intenta resolver un hostname a una IP válida.
     
     Detecta si el hostname resuelve a localhost (problema común en WSL)
-    y sugiere alternativas.
+    y sugiere alternativas. El resultado (también el negativo) se cachea.
     
     Args:
         hostname: El hostname a resolver
@@ -53,7 +61,21 @@ def resolve_hostname(hostname: str) -> Tuple[Optional[str], str]:
     except socket.error:
         pass
     
-    # Intentar resolver con socket
+    key = hostname.lower()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+    if cached and time.time() < cached[0]:
+        return cached[1], cached[2]
+    
+    ip, msg = _lookup(hostname)
+    ttl = DNS_CACHE_TTL if ip else DNS_NEGATIVE_TTL
+    with _dns_lock:
+        _dns_cache[key] = (time.time() + ttl, ip, msg)
+    return ip, msg
+
+
+def _lookup(hostname: str) -> Tuple[Optional[str], str]:
+    """Consulta el resolver del sistema (sin cache)."""
     try:
         result = socket.getaddrinfo(hostname, None, socket.AF_INET)
         if result:
@@ -68,6 +90,73 @@ def resolve_hostname(hostname: str) -> Tuple[Optional[str], str]:
     return None, "No se pudo resolver el hostname"
 
 
+async def resolve_hostnames_async(
+    hostnames: List[str],
+    concurrency: int = DNS_RESOLVE_CONCURRENCY
+) -> Dict[str, Tuple[Optional[str], str]]:
+    """
+    Resuelve muchos hostnames en paralelo (llenando el cache).
+    
+    getaddrinfo es bloqueante: las consultas corren en un pool de hilos
+    propio de tamaño concurrency, sin ocupar el executor por defecto del loop.
+    
+    Args:
+        hostnames: Hostnames o IPs
+        concurrency: Consultas simultáneas como máximo
+        
+    Returns:
+        Dict hostname -> (ip o None, mensaje), como resolve_hostname
+    """
+    unique = list(dict.fromkeys(hostnames))
+    if not unique:
+        return {}
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(unique))), thread_name_prefix="dns") as pool:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, resolve_hostname, hostname) for hostname in unique)
+        )
+    return dict(zip(unique, results))
+
+
+def resolve_hostnames(
+    hostnames: List[str],
+    concurrency: int = DNS_RESOLVE_CONCURRENCY
+) -> Dict[str, Tuple[Optional[str], str]]:
+    """
+    Versión sincrónica de resolve_hostnames_async (crea su propio event loop).
+    
+    Args:
+        hostnames: Hostnames o IPs
+        concurrency: Consultas simultáneas como máximo
+        
+    Returns:
+        Dict hostname -> (ip o None, mensaje)
+    """
+    start = time.time()
+    results = asyncio.run(resolve_hostnames_async(hostnames, concurrency))
+    resolved = sum(1 for ip, _ in results.values() if ip)
+    logger.info(f"DNS: {resolved}/{len(results)} hostnames resueltos en {time.time() - start:.1f}s")
+    return results
+
+
+def cached_addresses() -> Dict[str, str]:
+    """
+    Resoluciones exitosas vigentes del cache (sin consultar al resolver).
+
+    Returns:
+        Dict hostname (minúsculas) -> IP
+    """
+    now = time.time()
+    with _dns_lock:
+        return {key: ip for key, (expires, ip, _) in _dns_cache.items() if ip and now < expires}
+
+
+def clear_dns_cache() -> None:
+    """Descarta todas las resoluciones cacheadas."""
+    with _dns_lock:
+        _dns_cache.clear()
+
+
 def test_port(host: str, port: int, timeout: float = 2.0) -> bool:
     """
     Verifica si un puerto está abierto en un host.
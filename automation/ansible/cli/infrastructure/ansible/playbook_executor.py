@@ -5,20 +5,27 @@ infrastructure/ansible/playbook_executor.py
 Ejecutor de playbooks de Ansible.
 
 Contiene la lógica de bajo nivel para ejecutar playbooks de Ansible.
+Soporta tres backends: "subprocess" (un ansible-playbook por ejecución),
+"api" (worker residente, ver api_executor.py) y "forkserver" (fork por trabajo
+de un servidor precargado, ver forkserver_executor.py). En todos la salida del
+callback itops_jsonl se consume línea a línea (ver event_stream.py).
 """
 
-import os
 import json
 import subprocess
-import tempfile
+import threading
 import time
-from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Callable
 
-from ...shared.config import BASE_DIR, logger, console
+from ...shared.config import BASE_DIR, logger, console, EXECUTION_BACKEND, PLAYBOOK_TIMEOUT
+from ...shared.cancellation import on_cancel, process_group_kwargs, kill_process_group
 from ...domain.models import ExecutionResult
-from ..ansible.vault_manager import decrypt_vault, load_common_vars
-from ..ansible.inventory_builder import build_dynamic_inventory
+from ..ansible.command_builder import build_playbook_command
+from ..ansible.vault_manager import vault_password_pipe
+from ..ansible.api_executor import is_api_backend_available, run_playbook_in_worker
+from ..ansible.forkserver_executor import is_fork_server_available, run_playbook_in_fork_server
+from ..ansible.event_stream import EventAccumulator, publish_progress_event
+from ..ansible.progress_view import PlaybookProgress
 from ...infrastructure.logging.debug_logger import debug_logger
 
 
@@ -28,7 +35,8 @@ def execute_playbook(
     vault_password: Optional[str] = None,
     extra_vars: Optional[Dict[str, str]] = None,
     show_progress: bool = True,
-    interactive: bool = False
+    interactive: bool = False,
+    backend: Optional[str] = None
 ) -> ExecutionResult:
     """
     Ejecuta un playbook de Ansible con inventario dinámico.
@@ -38,8 +46,9 @@ def execute_playbook(
         playbook_path: Ruta al playbook relativa a playbooks/
         vault_password: Password del vault (opcional)
         extra_vars: Variables extra para el playbook
-        show_progress: Mostrar barra de progreso con Rich
+        show_progress: Mostrar el progreso por tarea en vivo con Rich
         interactive: Si es True, no captura output para permitir interacción
+        backend: "subprocess", "api" o "forkserver" (None = EXECUTION_BACKEND de la configuración)
         
     Returns:
         ExecutionResult: Objeto con los resultados de la ejecución
@@ -69,97 +78,17 @@ def execute_playbook(
         logger.error(f"Playbook no encontrado: {full_playbook_path}")
         return ExecutionResult(False, None, "", f"Playbook no encontrado: {playbook_path}", 1)
 
-    # Configurar entorno
-    env = os.environ.copy()
-    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
-    if not interactive:
-        env["ANSIBLE_STDOUT_CALLBACK"] = "json"
-    
-    # Leer contenido del playbook para determinar si usa localhost
-    playbook_content = full_playbook_path.read_text()
-    uses_localhost = "hosts: localhost" in playbook_content or "'localhost'" in playbook_content or '"localhost"' in playbook_content
-    
-    # Descifrar variables del vault si hay password
-    vault_vars = {}
-    if vault_password:
-        vault_vars = decrypt_vault(vault_password)
-        debug_logger.log(
-            "infrastructure/ansible/playbook_executor.py:72",
-            "Vault variables descifradas",
-            {
-                "has_user": "vault_ansible_user" in vault_vars,
-                "has_password": "vault_ansible_password" in vault_vars,
-                "keys": list(vault_vars.keys())
-            },
-            hypothesis_id="E"
-        )
-    
-    # Crear inventario dinámico solo si NO usa localhost
-    inventory_file = None
-    if not uses_localhost:
-        inventory_content = build_dynamic_inventory(hostname, vault_vars=vault_vars)
-        inventory_file = tempfile.NamedTemporaryFile(
-            mode='w', suffix='.ini', dir=str(BASE_DIR / "inventory"), delete=False
-        )
-        inventory_file.write(inventory_content)
-        inventory_file.close()
-    
-    # Construir comando base
-    if uses_localhost:
-        # Para playbooks que usan localhost, forzar conexión local explícitamente
-        cmd = [
-            "ansible-playbook",
-            "-i", "localhost,",
-            "-c", "local",  # Forzar conexión local para evitar SSH
-            str(full_playbook_path)
-        ]
-    else:
-        # Para playbooks que se conectan al host, usar inventario dinámico
-        cmd = [
-            "ansible-playbook",
-            "-i", inventory_file.name,
-            str(full_playbook_path)
-        ]
-    
-    # Pasar target_host universalmente si existe hostname (solución genérica)
-    if hostname and hostname != "localhost":
-        cmd.extend(["--extra-vars", f"target_host={hostname}"])
-        
-        # Para playbooks SCCM que también esperan sccm_device_name
-        if "sccm" in playbook_path:
-            cmd.extend(["--extra-vars", f"sccm_device_name={hostname}"])
-    
-    # Agregar variables extra del usuario
-    if extra_vars:
-        for key, value in extra_vars.items():
-            cmd.extend(["--extra-vars", f"{key}={value}"])
-    
-    # Manejo de Vault mediante archivo temporal
-    vault_file = None
-    if vault_password:
-        vault_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        vault_file.write(vault_password)
-        vault_file.close()
-        cmd.extend(["--vault-password-file", vault_file.name])
-        
-        # Para playbooks localhost, pasar vault vars como extra vars (necesario para delegate_to)
-        if uses_localhost and vault_vars:
-            for key, value in vault_vars.items():
-                cmd.extend(["--extra-vars", f"{key}={value}"])
-    
-    # Para playbooks localhost, también pasar common vars (sccm_server, domain_controller, etc.)
-    if uses_localhost:
-        common_vars = load_common_vars()
-        for key, value in common_vars.items():
-            cmd.extend(["--extra-vars", f"{key}={value}"])
-
-    logger.info(f"Ejecutando: {' '.join([c for c in cmd if 'password' not in c.lower()])}")
+    command = build_playbook_command(hostname, playbook_path, vault_password, extra_vars, interactive)
+    cmd, env = command.cmd, command.env
+    runner = select_backend(backend)
+    logger.info(f"Ejecutando: {command.safe_repr()}")
 
     start_time = time.time()
     try:
         if interactive:
             # En modo interactivo, ejecutamos directamente para que el usuario vea/escriba en la consola
-            result_proc = subprocess.run(cmd, cwd=str(BASE_DIR), env=env)
+            with vault_password_pipe(command.vault_password) as (password_args, pass_fds):
+                result_proc = subprocess.run(cmd + password_args, cwd=str(BASE_DIR), env=env, pass_fds=pass_fds)
             duration = time.time() - start_time
             return ExecutionResult(
                 success=result_proc.returncode == 0,
@@ -170,44 +99,41 @@ def execute_playbook(
                 duration=duration
             )
 
-        # Modo normal con progreso (simplificado para evitar múltiples mensajes)
-        if show_progress:
-            console.print(f"[cyan]🔄 Ejecutando {playbook_path} en {hostname}...[/cyan]")
-            result_proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=1200, cwd=str(BASE_DIR))
-            console.print(f"[dim]✓ Completado[/dim]")
-        else:
-            result_proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=1200, cwd=str(BASE_DIR))
+        # Modo normal: los eventos se procesan a medida que llegan
+        # (si la tarea se cancela, los archivos temporales se borran en ese momento)
+        events = EventAccumulator()
+        with on_cancel(command.cleanup):
+            if show_progress:
+                console.print(f"[cyan]🔄 Ejecutando {playbook_path} en {hostname}...[/cyan]")
+                with PlaybookProgress(hostname) as progress:
+                    events.on_event = progress.on_event
+                    returncode, _, stderr = runner(cmd, env, PLAYBOOK_TIMEOUT, events.feed, command.vault_password)
+                console.print(f"[dim]✓ Completado[/dim]")
+            else:
+                # En segundo plano el progreso va al bus de eventos
+                events.on_event = publish_progress_event
+                returncode, _, stderr = runner(cmd, env, PLAYBOOK_TIMEOUT, events.feed, command.vault_password)
 
         duration = time.time() - start_time
+        stdout = events.output
         
         # Registrar logs
-        if result_proc.stdout:
-            logger.debug(f"STDOUT: {result_proc.stdout[:500]}...")
-        if result_proc.stderr:
-            logger.error(f"STDERR: {result_proc.stderr}")
-
-        # Parsear JSON
-        json_data = None
-        if result_proc.stdout:
-            try:
-                # Buscar el bloque JSON balanceado
-                output = result_proc.stdout
-                if "{" in output and "}" in output:
-                    json_start = output.find("{")
-                    json_end = output.rfind("}") + 1
-                    json_str = output[json_start:json_end]
-                    json_data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                logger.warning(f"No se pudo parsear el output como JSON: {e}")
-                if result_proc.returncode != 0:
-                    logger.error(f"Error de ejecución sin JSON válido. Return code: {result_proc.returncode}")
+        if stdout:
+            logger.debug(f"STDOUT: {stdout[:500]}...")
+        if stderr:
+            logger.error(f"STDERR: {stderr}")
+
+        # Resultado construido a partir de los eventos (o JSON completo si otro callback lo generó)
+        json_data = events.data or parse_json_output(stdout)
+        if json_data is None and returncode != 0:
+            logger.error(f"Error de ejecución sin eventos JSON. Return code: {returncode}")
 
         result_obj = ExecutionResult(
-            success=result_proc.returncode == 0,
+            success=returncode == 0,
             data=json_data,
-            stdout=result_proc.stdout,
-            stderr=result_proc.stderr,
-            returncode=result_proc.returncode,
+            stdout=stdout,
+            stderr=stderr,
+            returncode=returncode,
             duration=duration
         )
         debug_logger.log_function_result(
@@ -233,7 +159,7 @@ def execute_playbook(
             {"duration": duration},
             hypothesis_id="B"
         )
-        return ExecutionResult(False, None, "", "Timeout de ejecución (20 min)", 1, duration)
+        return ExecutionResult(False, None, "", f"Timeout de ejecución ({PLAYBOOK_TIMEOUT // 60} min)", 1, duration)
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Error inesperado ejecutando playbook: {e}")
@@ -246,7 +172,102 @@ def execute_playbook(
         return ExecutionResult(False, None, "", str(e), 1, duration)
     finally:
         # Limpiar archivos temporales
-        if inventory_file and os.path.exists(inventory_file.name):
-            os.unlink(inventory_file.name)
-        if vault_file and os.path.exists(vault_file.name):
-            os.unlink(vault_file.name)
+        command.cleanup()
+
+
+def run_subprocess(
+    cmd: List[str],
+    env: Dict[str, str],
+    timeout: float,
+    on_line: Optional[Callable[[str], None]] = None,
+    vault_password: Optional[str] = None
+) -> Tuple[int, str, str]:
+    """
+    Backend "subprocess": lanza un proceso ansible-playbook por ejecución.
+    
+    Args:
+        cmd: Argumentos de ansible-playbook
+        env: Entorno del proceso
+        timeout: Timeout en segundos
+        on_line: Si se indica, recibe cada línea de stdout a medida que llega
+            (el stdout devuelto queda vacío)
+        vault_password: Password del vault (se pasa al proceso por un pipe)
+        
+    Returns:
+        Tupla (returncode, stdout, stderr)
+    """
+    with vault_password_pipe(vault_password) as (password_args, pass_fds):
+        if on_line is None:
+            result_proc = subprocess.run(
+                cmd + password_args, capture_output=True, text=True, env=env, timeout=timeout,
+                cwd=str(BASE_DIR), pass_fds=pass_fds
+            )
+            return result_proc.returncode, result_proc.stdout, result_proc.stderr
+
+        proc = subprocess.Popen(
+            cmd + password_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+            text=True, bufsize=1, env=env, cwd=str(BASE_DIR), pass_fds=pass_fds, **process_group_kwargs()
+        )
+        stderr_chunks: List[str] = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+        stderr_reader.start()
+        timed_out = threading.Event()
+
+        def kill_on_timeout() -> None:
+            timed_out.set()
+            kill_process_group(proc)
+
+        watchdog = threading.Timer(timeout, kill_on_timeout)
+        watchdog.start()
+        try:
+            # Cancelar la tarea (task_manager.cancel_task) mata el grupo de procesos
+            with on_cancel(lambda: kill_process_group(proc)):
+                for line in proc.stdout:
+                    on_line(line)
+                proc.wait()
+        finally:
+            watchdog.cancel()
+            if proc.poll() is None:
+                # Ctrl+C u otra excepción: no dejar ansible-playbook huérfano
+                kill_process_group(proc)
+                proc.wait()
+            stderr_reader.join()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return proc.returncode, "", "".join(stderr_chunks)
+
+
+def select_backend(backend: Optional[str]) -> Callable[..., Tuple[int, str, str]]:
+    """Devuelve la función de ejecución del backend pedido (o el configurado)."""
+    backend = (backend or EXECUTION_BACKEND).lower()
+    if backend == "api":
+        if is_api_backend_available():
+            return run_playbook_in_worker
+        logger.warning("Backend 'api' no disponible (ansible-core no importable), usando subprocess")
+    elif backend == "forkserver":
+        if is_fork_server_available():
+            return run_playbook_in_fork_server
+        logger.warning("Backend 'forkserver' no disponible (requiere POSIX y ansible-core), usando subprocess")
+    return run_subprocess
+
+
+def parse_json_output(stdout: str) -> Optional[Dict]:
+    """
+    Extrae el documento JSON del callback json de Ansible.
+    
+    Args:
+        stdout: Salida estándar de ansible-playbook
+        
+    Returns:
+        Dict parseado o None si no hay JSON válido
+    """
+    if not stdout or "{" not in stdout or "}" not in stdout:
+        return None
+    try:
+        # Buscar el bloque JSON balanceado
+        json_start = stdout.find("{")
+        json_end = stdout.rfind("}") + 1
+        return json.loads(stdout[json_start:json_end])
+    except json.JSONDecodeError as e:
+        logger.warning(f"No se pudo parsear el output como JSON: {e}")
+        return None
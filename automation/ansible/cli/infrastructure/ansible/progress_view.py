@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/progress_view.py
+=======================================
+Progreso en vivo de un playbook en primer plano.
+
+Recibe los eventos del callback itops_jsonl (vía EventAccumulator.on_event) y
+muestra con Rich la tarea actual, el host, las tareas completadas sobre el
+total del play y el tiempo transcurrido. Cada tarea terminada queda impresa
+con su duración, para ver dónde se va el tiempo en los playbooks largos.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from rich.progress import (
+    Progress, ProgressColumn, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
+)
+from rich.markup import escape
+from rich.text import Text
+
+from ...shared.config import console
+
+# Tareas que tardan más que esto se resaltan al imprimir su duración (segundos)
+SLOW_TASK_SECONDS = 60
+
+
+class TaskElapsedColumn(ProgressColumn):
+    """Tiempo transcurrido de la tarea de Ansible actual (campo task_start)."""
+
+    def render(self, task) -> Text:
+        task_start = task.fields.get("task_start")
+        if not task_start:
+            return Text("")
+        return Text(f"tarea {time.time() - task_start:.0f}s", style="progress.elapsed")
+
+
+class PlaybookProgress:
+    """
+    Vista de progreso por tarea (context manager).
+
+    Args:
+        hostname: Host objetivo (se muestra hasta recibir el host real de los eventos)
+    """
+
+    def __init__(self, hostname: str):
+        self.hostname = hostname
+        self._progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(bar_width=20),
+            MofNCompleteColumn(),
+            TaskElapsedColumn(),
+            TimeElapsedColumn(),
+            console=console,
+            transient=True
+        )
+        self._row = None
+        self._current_name: Optional[str] = None
+        self._current_host: Optional[str] = None
+        self._current_start = 0.0
+        self._current_handler = False
+        self._current_failed = False
+        self._total: Optional[int] = 0
+        self._done = 0
+
+    def __enter__(self) -> "PlaybookProgress":
+        self._progress.start()
+        self._row = self._progress.add_task(f"[cyan]{self.hostname}[/cyan] Iniciando...", total=None, task_start=None)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._finish_current()
+        self._progress.stop()
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Actualiza la vista con un evento del callback."""
+        kind = event.get("event")
+        if kind == "play_start":
+            self._finish_current()
+            task_count = event.get("task_count")
+            self._total = self._total + task_count if self._total is not None and task_count is not None else None
+            self._progress.update(self._row, total=self._total)
+        elif kind == "task_start":
+            self._finish_current()
+            self._start_task(event["task"].get("name") or "(sin nombre)", event.get("handler", False))
+        elif kind == "host_result" and self._current_name:
+            self._current_host = event.get("host")
+            self._current_failed = self._current_failed or event.get("status") in ("failed", "unreachable")
+            self._progress.update(self._row, description=self._describe())
+        elif kind == "stats":
+            self._finish_current()
+
+    def _describe(self) -> str:
+        host = self._current_host or self.hostname
+        return f"[cyan]{escape(host)}[/cyan] {escape(self._current_name)}"
+
+    def _start_task(self, name: str, handler: bool) -> None:
+        self._current_name = name
+        self._current_host = None
+        self._current_start = time.time()
+        self._current_handler = handler
+        self._current_failed = False
+        self._progress.update(self._row, description=self._describe(), task_start=self._current_start)
+
+    def _finish_current(self) -> None:
+        """Cierra la tarea actual: la imprime con su duración y avanza el contador."""
+        if self._current_name is None:
+            return
+        elapsed = time.time() - self._current_start
+        if self._current_failed:
+            style, icon = "red", "✗"
+        else:
+            style, icon = ("yellow" if elapsed >= SLOW_TASK_SECONDS else "dim"), "✓"
+        self._progress.console.print(f"[{style}]  {icon} {escape(self._current_name)} ({elapsed:.1f}s)[/{style}]")
+        self._current_name = None
+        if not self._current_handler:
+            self._done += 1
+        total = max(self._total, self._done) if self._total is not None else None
+        self._progress.update(self._row, completed=self._done, total=total, task_start=None)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/reachability_cache.py
+============================================
+Cache de alcanzabilidad de hosts.
+
+Guarda el último resultado de cada probe (online/offline, latencia,
+transporte y dirección usada) en .cache/reachability.json, para que las
+corridas repetidas sobre el mismo parque no vuelvan a esperar el timeout
+completo por cada notebook apagada:
+
+- Un host online se da por bueno durante REACHABILITY_TTL segundos.
+- Un host offline no se vuelve a probar hasta que pase su backoff, que se
+  duplica con cada falla consecutiva (REACHABILITY_BACKOFF_BASE, 2x, 4x...
+  hasta REACHABILITY_BACKOFF_MAX).
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from ...shared.config import (
+    BASE_DIR, logger, REACHABILITY_TTL, REACHABILITY_BACKOFF_BASE, REACHABILITY_BACKOFF_MAX
+)
+
+CACHE_FILE = BASE_DIR / ".cache" / "reachability.json"
+
+
+@dataclass
+class ReachabilityEntry:
+    """Último probe de un host."""
+    hostname: str
+    reachable: bool
+    checked_at: float
+    latency: Optional[float] = None
+    transport: Optional[str] = None
+    address: Optional[str] = None
+    error: str = ""
+    failures: int = 0
+
+    @property
+    def expires_at(self) -> float:
+        """Momento hasta el que el resultado es válido (TTL o backoff)."""
+        if self.reachable:
+            return self.checked_at + REACHABILITY_TTL
+        backoff = REACHABILITY_BACKOFF_BASE * 2 ** max(0, self.failures - 1)
+        return self.checked_at + min(backoff, REACHABILITY_BACKOFF_MAX)
+
+
+# Estado global del módulo
+_entries: Dict[str, ReachabilityEntry] = {}
+_loaded = False
+_lock = threading.Lock()
+
+
+def _load_locked() -> None:
+    """Carga el archivo de cache la primera vez. Requiere _lock."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    try:
+        with open(CACHE_FILE, encoding="utf-8") as f:
+            for item in json.load(f):
+                entry = ReachabilityEntry(**item)
+                _entries[entry.hostname] = entry
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Cache de alcanzabilidad ilegible, se descarta: {e}")
+
+
+def _save_locked() -> None:
+    """Escribe el cache de forma atómica. Requiere _lock."""
+    try:
+        CACHE_FILE.parent.mkdir(exist_ok=True)
+        tmp_path = CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(entry) for entry in _entries.values()], f)
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el cache de alcanzabilidad: {e}")
+
+
+def _key(hostname: str) -> str:
+    return hostname.strip().lower()
+
+
+def get_cached(hostname: str) -> Optional[ReachabilityEntry]:
+    """
+    Resultado cacheado de un host, si sigue vigente.
+
+    Args:
+        hostname: Hostname o IP
+
+    Returns:
+        ReachabilityEntry vigente o None si hay que probar el host
+    """
+    with _lock:
+        _load_locked()
+        entry = _entries.get(_key(hostname))
+    if entry and time.time() < entry.expires_at:
+        return entry
+    return None
+
+
+def known_addresses() -> Dict[str, str]:
+    """
+    Última dirección con la que se alcanzó cada host (vigente o no).
+
+    Returns:
+        Dict hostname (minúsculas) -> dirección usada en el probe
+    """
+    with _lock:
+        _load_locked()
+        return {key: entry.address for key, entry in _entries.items() if entry.address}
+
+
+def record_probes(results: List[dict]) -> List[ReachabilityEntry]:
+    """
+    Registra varios probes y guarda el cache una sola vez.
+
+    Args:
+        results: Dicts con hostname, reachable y opcionalmente latency,
+            transport, address y error
+
+    Returns:
+        Entradas registradas
+    """
+    if not results:
+        return []
+    now = time.time()
+    recorded = []
+    with _lock:
+        _load_locked()
+        for result in results:
+            key = _key(result["hostname"])
+            previous = _entries.get(key)
+            failures = 0 if result["reachable"] else (previous.failures if previous else 0) + 1
+            entry = ReachabilityEntry(
+                hostname=key,
+                reachable=result["reachable"],
+                checked_at=now,
+                latency=result.get("latency"),
+                transport=result.get("transport"),
+                address=result.get("address"),
+                error=result.get("error", ""),
+                failures=failures,
+            )
+            _entries[key] = entry
+            recorded.append(entry)
+        _save_locked()
+    return recorded
+
+
+def record_probe(hostname: str, reachable: bool, **details) -> ReachabilityEntry:
+    """
+    Registra el resultado de un probe.
+
+    Args:
+        hostname: Hostname o IP
+        reachable: Si el host respondió
+        **details: latency, transport, address, error
+
+    Returns:
+        Entrada registrada
+    """
+    return record_probes([{"hostname": hostname, "reachable": reachable, **details}])[0]
+
+
+def invalidate(hostname: Optional[str] = None) -> None:
+    """
+    Olvida el resultado de un host (o de todos si hostname es None).
+
+    Args:
+        hostname: Hostname o IP (opcional)
+    """
+    with _lock:
+        _load_locked()
+        if hostname is None:
+            _entries.clear()
+        else:
+            _entries.pop(_key(hostname), None)
+        _save_locked()
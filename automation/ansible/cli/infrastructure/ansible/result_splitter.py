@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/result_splitter.py
+=========================================
+Separación de resultados de una ejecución multi-host.
+
+Toma el documento del callback json de una corrida batch y lo divide en un
+documento por host con la misma estructura (plays -> tasks -> hosts, stats),
+para que los formateadores existentes funcionen sin cambios.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from ...domain.models import ExecutionResult
+
+# Códigos de retorno de ansible-playbook
+RC_OK = 0
+RC_HOST_FAILED = 2
+RC_HOST_UNREACHABLE = 4
+
+
+def filter_data_for_host(data: Dict[str, Any], hostname: str) -> Dict[str, Any]:
+    """
+    Filtra el documento JSON de Ansible dejando solo los resultados de un host.
+
+    Args:
+        data: Documento del callback json (plays, stats, ...)
+        hostname: Host a conservar
+
+    Returns:
+        Documento con la misma estructura, restringido al host
+    """
+    plays = []
+    for play in data.get("plays", []):
+        tasks = []
+        for task in play.get("tasks", []):
+            host_result = task.get("hosts", {}).get(hostname)
+            if host_result is not None:
+                tasks.append({**task, "hosts": {hostname: host_result}})
+        plays.append({**play, "tasks": tasks})
+
+    filtered = {key: value for key, value in data.items() if key not in ("plays", "stats")}
+    filtered["plays"] = plays
+    filtered["stats"] = {hostname: data.get("stats", {}).get(hostname, {})}
+    return filtered
+
+
+def split_batch_result(
+    hostnames: List[str],
+    data: Optional[Dict[str, Any]],
+    stderr: str,
+    returncode: int,
+    duration: float
+) -> Dict[str, ExecutionResult]:
+    """
+    Divide el resultado de una corrida batch en un ExecutionResult por host.
+
+    El éxito de cada host se decide con sus stats (failures/unreachable); si
+    no hay JSON (ej: error de sintaxis o timeout) todos los hosts heredan el
+    resultado global.
+
+    El stdout de cada host queda vacío: los formateadores leen data, y
+    serializarlo duplicaba en memoria el documento de cada host.
+
+    Args:
+        hostnames: Hosts del batch
+        data: Documento JSON parseado (o None)
+        stderr: Stderr de la corrida
+        returncode: Código de retorno global
+        duration: Duración total de la corrida
+
+    Returns:
+        Dict hostname -> ExecutionResult
+    """
+    results = {}
+    stats = (data or {}).get("stats", {})
+
+    for hostname in hostnames:
+        if not data:
+            results[hostname] = ExecutionResult(
+                returncode == RC_OK, None, "", stderr, returncode, duration
+            )
+            continue
+
+        host_stats = stats.get(hostname)
+        host_data = filter_data_for_host(data, hostname)
+        if host_stats is None:
+            rc = RC_HOST_FAILED
+            host_stderr = f"El host {hostname} no aparece en los resultados del batch\n{stderr}".strip()
+        elif host_stats.get("unreachable", 0):
+            rc = RC_HOST_UNREACHABLE
+            host_stderr = stderr
+        elif host_stats.get("failures", 0):
+            rc = RC_HOST_FAILED
+            host_stderr = stderr
+        else:
+            rc = RC_OK
+            host_stderr = ""
+
+        results[hostname] = ExecutionResult(
+            success=rc == RC_OK,
+            data=host_data,
+            stdout="",
+            stderr=host_stderr,
+            returncode=rc,
+            duration=duration
+        )
+    return results
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/routing_info.py
+======================================
+Información de ruteo local: gateway por defecto (en WSL, el host Windows).
+
+Lee /proc/net/route directamente en lugar de lanzar un pipeline de shell
+(ip route | grep | awk) en cada construcción de inventario. El gateway se
+cachea por sesión; la tabla se vuelve a leer cada GATEWAY_RECHECK_SECONDS
+(es un archivo de /proc, no un proceso) y se reparsea solo si cambió, así
+un cambio de red (VPN, wifi, reinicio de WSL) invalida el cache.
+"""
+
+import socket
+import struct
+import threading
+import time
+from typing import Optional
+
+ROUTE_TABLE_PATH = "/proc/net/route"
+
+# Segundos entre relecturas de la tabla de rutas
+GATEWAY_RECHECK_SECONDS = 30.0
+
+# Flags de ruta (linux/route.h)
+RTF_UP = 0x0001
+RTF_GATEWAY = 0x0002
+
+# Estado global del módulo
+_lock = threading.Lock()
+_cached_table: Optional[str] = None
+_cached_gateway: Optional[str] = None
+_checked_at = 0.0
+
+
+def parse_default_gateway(route_table: str) -> Optional[str]:
+    """
+    Obtiene el gateway por defecto de una tabla con el formato de /proc/net/route.
+
+    Si hay varias rutas por defecto activas gana la de menor métrica.
+
+    Args:
+        route_table: Contenido de /proc/net/route
+
+    Returns:
+        IP del gateway o None si no hay ruta por defecto
+    """
+    best = None
+    for line in route_table.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        try:
+            destination, gateway, flags, metric, mask = (
+                int(fields[1], 16), int(fields[2], 16), int(fields[3], 16), int(fields[6]), int(fields[7], 16)
+            )
+        except ValueError:
+            continue
+        if destination or mask or flags & (RTF_UP | RTF_GATEWAY) != RTF_UP | RTF_GATEWAY:
+            continue
+        if best is None or metric < best[0]:
+            # Las direcciones están en el orden de bytes nativo del kernel
+            best = (metric, socket.inet_ntoa(struct.pack("=I", gateway)))
+    return best[1] if best else None
+
+
+def _read_route_table() -> Optional[str]:
+    try:
+        with open(ROUTE_TABLE_PATH, encoding="ascii") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def get_default_gateway(refresh: bool = False) -> Optional[str]:
+    """
+    Gateway por defecto de la máquina (cacheado).
+
+    Args:
+        refresh: Releer la tabla de rutas ya
+
+    Returns:
+        IP del gateway o None (sin ruta por defecto o sin /proc, ej: Windows)
+    """
+    global _cached_table, _cached_gateway, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if not refresh and _checked_at and now - _checked_at < GATEWAY_RECHECK_SECONDS:
+            return _cached_gateway
+        _checked_at = now
+        route_table = _read_route_table()
+        if route_table != _cached_table:
+            _cached_table = route_table
+            _cached_gateway = parse_default_gateway(route_table) if route_table else None
+        return _cached_gateway
+
+
+def invalidate_gateway_cache() -> None:
+    """Fuerza a releer la tabla de rutas en la próxima consulta."""
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/ansible/vars_cache.py
+====================================
+Cache de archivos de variables del proyecto.
+
+Los YAML de variables (group_vars/all/common.yml) se parsean una vez y
+quedan en memoria hasta que cambia el archivo (mtime/tamaño).
+
+Los playbooks localhost reciben sus variables (comunes y del vault) en un
+único JSON pasado con --extra-vars @archivo en lugar de un --extra-vars por
+variable. El archivo se guarda en .cache/vars/ con un nombre derivado de su
+contenido, así se escribe una sola vez y se reutiliza entre ejecuciones; si
+lleva variables del vault se escribe cifrado con la password del vault. Los
+archivos de versiones anteriores se borran recién cuando ningún playbook en
+curso puede estar leyéndolos (más viejos que PLAYBOOK_TIMEOUT).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from ...shared.config import BASE_DIR, PLAYBOOK_TIMEOUT, logger
+from ..ansible.vault_manager import decrypt_vault, encrypt_with_password
+from ...infrastructure.logging.debug_logger import debug_logger
+
+GROUP_VARS_DIR = BASE_DIR / "inventory" / "group_vars"
+COMMON_VARS_FILE = GROUP_VARS_DIR / "all" / "common.yml"
+VARS_CACHE_DIR = BASE_DIR / ".cache" / "vars"
+
+# path -> ((mtime_ns, tamaño), variables parseadas)
+_file_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+
+def load_vars_file(path: Path) -> Dict[str, Any]:
+    """
+    Carga un archivo YAML de variables (cacheado por mtime y tamaño).
+
+    Args:
+        path: Ruta al archivo
+
+    Returns:
+        Dict con las variables (vacío si no existe o no es un mapping).
+        Es una copia superficial: no modificar los valores anidados.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _file_cache.get(str(path))
+    if cached and cached[0] == version:
+        return dict(cached[1])
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"Error cargando {path.name}: {e}")
+        data = None
+    if not isinstance(data, dict):
+        data = {}
+    with _lock:
+        _file_cache[str(path)] = (version, data)
+    return dict(data)
+
+
+def load_common_vars() -> Dict[str, Any]:
+    """
+    Carga las variables de group_vars/all/common.yml.
+
+    Returns:
+        Dict con las variables comunes (sccm_server, domain_controller, etc.)
+    """
+    if not COMMON_VARS_FILE.exists():
+        logger.warning("Archivo common.yml no encontrado")
+        return {}
+    common_vars = load_vars_file(COMMON_VARS_FILE)
+    debug_logger.log(
+        "infrastructure/ansible/vars_cache.py:88",
+        "Common vars cargadas",
+        {"keys": list(common_vars.keys())},
+        hypothesis_id="E"
+    )
+    return common_vars
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Escribe un archivo (solo legible por el usuario) de forma atómica."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale(keep: Path) -> None:
+    """Borra los localhost-*.json (salvo keep) sin modificar hace más de PLAYBOOK_TIMEOUT."""
+    cutoff = time.time() - PLAYBOOK_TIMEOUT
+    for stale in VARS_CACHE_DIR.glob("localhost-*.json"):
+        if stale == keep:
+            continue
+        try:
+            if stale.stat().st_mtime < cutoff:
+                stale.unlink()
+        except OSError:
+            pass
+
+
+def localhost_extra_vars(vault_password: Optional[str] = None) -> List[str]:
+    """
+    Argumentos --extra-vars con las variables de un playbook localhost.
+
+    Reúne las variables del vault (necesarias para delegate_to) y las de
+    common.yml en un JSON. Sin ansible-core importable para cifrar, las
+    variables del vault viajan como un único JSON en la línea de comandos.
+
+    Args:
+        vault_password: Password del vault (opcional)
+
+    Returns:
+        Argumentos a agregar al comando (vacío si no hay variables)
+    """
+    vault_vars = decrypt_vault(vault_password) if vault_password else {}
+    # Las comunes van después: ante una clave repetida ganan, como con --extra-vars sueltos
+    localhost_vars = {**vault_vars, **load_common_vars()}
+    if not localhost_vars:
+        return []
+
+    payload = json.dumps(localhost_vars, sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    if vault_vars:
+        digest.update(hashlib.sha256(vault_password.encode()).digest())
+    path = VARS_CACHE_DIR / f"localhost-{digest.hexdigest()[:16]}.json"
+    if path.exists():
+        # El mtime marca el último uso: otra sesión no lo borra mientras se lee
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return ["--extra-vars", f"@{path}"]
+
+    try:
+        content = encrypt_with_password(payload, vault_password) if vault_vars else payload
+        _write_atomic(path, content)
+    except ImportError:
+        return ["--extra-vars", payload]
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el archivo de variables localhost: {e}")
+        return ["--extra-vars", payload]
+
+    # Los archivos de versiones anteriores (otra password, common.yml editado) ya
+    # no sirven, pero un playbook lanzado hace poco (otra sesión, otro worker)
+    # puede seguir leyendo el suyo: solo se borran los que superan el timeout
+    _remove_stale(keep=path)
+    return ["--extra-vars", f"@{path}"]
@@ -4,26 +4,130 @@ infrastructure/ansible/vault_manager.py
 ======================================
 Gestor de Vault de Ansible.
 
-Contiene funciones para descifrar variables del vault de Ansible.
+Contiene funciones para descifrar variables del vault de Ansible (y cifrar
+con la misma password los archivos de variables que se le pasan a Ansible).
 """
 
+import hashlib
 import os
 import subprocess
 import tempfile
+import threading
 import yaml
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, List, Tuple
 
 from ...shared.config import BASE_DIR, logger
 from ...shared.exceptions import VaultDecryptionError
 from ...infrastructure.logging.debug_logger import debug_logger
 
+VAULT_FILE = BASE_DIR / "inventory" / "group_vars" / "all" / "vault.yml"
+
+# (hash de la password, mtime_ns, tamaño) -> variables descifradas
+_vault_cache: Dict[Tuple[str, int, int], Dict[str, str]] = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def vault_password_pipe(vault_password: Optional[str]) -> Iterator[Tuple[List[str], Tuple[int, ...]]]:
+    """
+    Pasa la password del vault a un proceso hijo sin escribirla en disco.
+    
+    En POSIX la password se escribe en un pipe y el hijo la lee de
+    /dev/fd/N (hay que pasarle el fd con pass_fds). En Windows, sin /dev/fd,
+    se usa un archivo temporal que se borra al salir del bloque.
+    
+    Args:
+        vault_password: Password del vault (None = sin vault)
+        
+    Yields:
+        Tupla (argumentos --vault-password-file, fds a heredar)
+    """
+    if not vault_password:
+        yield [], ()
+        return
+    if os.name != "posix":
+        vault_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
+        vault_file.write(vault_password)
+        vault_file.close()
+        try:
+            yield ["--vault-password-file", vault_file.name], ()
+        finally:
+            os.unlink(vault_file.name)
+        return
+    read_fd, write_fd = os.pipe()
+    try:
+        # Cabe holgada en el buffer del pipe: la escritura no bloquea
+        os.write(write_fd, vault_password.encode())
+    finally:
+        os.close(write_fd)
+    try:
+        yield ["--vault-password-file", f"/dev/fd/{read_fd}"], (read_fd,)
+    finally:
+        os.close(read_fd)
+
+
+def _decrypt_in_process(content: bytes, vault_password: str) -> str:
+    """Descifra el contenido con VaultLib de ansible-core (sin subprocesos)."""
+    from ansible.parsing.vault import VaultLib, VaultSecret, is_encrypted
+    if not is_encrypted(content):
+        return content.decode("utf-8")
+    vault = VaultLib([("default", VaultSecret(vault_password.encode()))])
+    return vault.decrypt(content).decode("utf-8")
+
+
+def encrypt_with_password(plaintext: str, vault_password: str) -> str:
+    """
+    Cifra un texto en formato vault con la password dada (VaultLib, sin subprocesos).
+    
+    Ansible lo descifra solo al leerlo (ej: --extra-vars @archivo) con la
+    misma password que recibe por --vault-password-file.
+    
+    Raises:
+        ImportError: Si ansible-core no es importable
+    """
+    from ansible.parsing.vault import VaultLib, VaultSecret
+    vault = VaultLib([("default", VaultSecret(vault_password.encode()))])
+    return vault.encrypt(plaintext.encode("utf-8")).decode("ascii")
+
+
+def _decrypt_with_cli(vault_password: str) -> str:
+    """
+    Descifra con ansible-vault view (si ansible-core no es importable).
+    
+    Raises:
+        VaultDecryptionError: Si ansible-vault falla
+    """
+    with vault_password_pipe(vault_password) as (password_args, pass_fds):
+        result = subprocess.run(
+            ["ansible-vault", "view", *password_args, str(VAULT_FILE)],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            cwd=str(BASE_DIR),
+            pass_fds=pass_fds
+        )
+    if result.returncode != 0:
+        debug_logger.log(
+            "infrastructure/ansible/vault_manager.py:47",
+            "Error descifrando vault",
+            {"returncode": result.returncode, "stderr": result.stderr[:200]},
+            hypothesis_id="E"
+        )
+        raise VaultDecryptionError(result.stderr.strip())
+    return result.stdout
+
 
 def decrypt_vault(vault_password: Optional[str] = None) -> Dict[str, str]:
     """
     Descifra el archivo vault.yml y retorna un diccionario con las variables.
     
+    Se descifra una vez por sesión, en el proceso (VaultLib de ansible-core),
+    y el resultado queda en memoria; cambiar el archivo (mtime/tamaño) o la
+    password invalida el cache.
+    
     Args:
         vault_password: Password del vault (opcional)
         
@@ -34,86 +138,25 @@ def decrypt_vault(vault_password: Optional[str] = None) -> Dict[str, str]:
     if not vault_password:
         return {}
     
-    vault_file = BASE_DIR / "inventory" / "group_vars" / "all" / "vault.yml"
-    if not vault_file.exists():
+    try:
+        stat = VAULT_FILE.stat()
+    except FileNotFoundError:
         logger.warning("Archivo vault.yml no encontrado")
         return {}
     
+    key = (hashlib.sha256(vault_password.encode()).hexdigest(), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _vault_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        # Usar ansible-vault view para leer contenido descifrado
-        vault_pass_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        vault_pass_file.write(vault_password)
-        vault_pass_file.close()
-        
-        cmd = [
-            "ansible-vault",
-            "view",
-            "--vault-password-file", vault_pass_file.name,
-            str(vault_file)
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10,
-            cwd=str(BASE_DIR)
-        )
-        
-        # Limpiar archivo temporal de password
-        if os.path.exists(vault_pass_file.name):
-            os.unlink(vault_pass_file.name)
-        
-        if result.returncode != 0:
-            logger.warning(f"No se pudo descifrar vault: {result.stderr}")
-            debug_logger.log(
-                "infrastructure/ansible/vault_manager.py:47",
-                "Error descifrando vault",
-                {"returncode": result.returncode, "stderr": result.stderr[:200]},
-                hypothesis_id="E"
-            )
-            return {}
-        
-        # Verificar si el output está vacío o solo tiene whitespace
-        if not result.stdout or not result.stdout.strip():
-            logger.warning("Vault descifrado está vacío - no hay variables definidas")
-            debug_logger.log(
-                "infrastructure/ansible/vault_manager.py:56",
-                "Vault vacío",
-                {"stdout_length": len(result.stdout) if result.stdout else 0},
-                hypothesis_id="E"
-            )
-            return {}
-        
-        # Parsear YAML del output
         try:
-            vault_vars = yaml.safe_load(result.stdout)
-            debug_logger.log(
-                "infrastructure/ansible/vault_manager.py:65",
-                "Vault descifrado",
-                {
-                    "has_vars": vault_vars is not None,
-                    "keys": list(vault_vars.keys()) if vault_vars else [],
-                    "has_user": "vault_ansible_user" in (vault_vars or {}),
-                    "has_password": "vault_ansible_password" in (vault_vars or {}),
-                    "stdout_preview": result.stdout[:200]
-                },
-                hypothesis_id="E"
-            )
-            if vault_vars and isinstance(vault_vars, dict):
-                return vault_vars
-        except Exception as e:
-            logger.warning(f"Error parseando vault YAML: {e}")
-            debug_logger.log(
-                "infrastructure/ansible/vault_manager.py:77",
-                "Error parseando vault YAML",
-                {"error": str(e), "stdout_preview": result.stdout[:200] if result.stdout else None},
-                hypothesis_id="E"
-            )
-            return {}
-            
+            plaintext = _decrypt_in_process(VAULT_FILE.read_bytes(), vault_password)
+        except ImportError:
+            plaintext = _decrypt_with_cli(vault_password)
     except Exception as e:
-        logger.error(f"Error descifrando vault: {e}")
+        logger.warning(f"No se pudo descifrar vault: {e}")
         debug_logger.log(
             "infrastructure/ansible/vault_manager.py:84",
             "Excepción en descifrado vault",
@@ -122,34 +165,38 @@ def decrypt_vault(vault_password: Optional[str] = None) -> Dict[str, str]:
         )
         return {}
     
-    return {}
-
-
-def load_common_vars() -> Dict[str, str]:
-    """
-    Carga las variables de group_vars/all/common.yml.
-    
-    Returns:
-        Dict con las variables comunes (sccm_server, domain_controller, etc.)
-    """
-    common_file = BASE_DIR / "inventory" / "group_vars" / "all" / "common.yml"
-    if not common_file.exists():
-        logger.warning("Archivo common.yml no encontrado")
+    # Verificar si el contenido está vacío o solo tiene whitespace
+    if not plaintext.strip():
+        logger.warning("Vault descifrado está vacío - no hay variables definidas")
         return {}
     
     try:
-        with open(common_file, 'r') as f:
-            common_vars = yaml.safe_load(f)
-            if common_vars and isinstance(common_vars, dict):
-                debug_logger.log(
-                    "infrastructure/ansible/vault_manager.py:108",
-                    "Common vars cargadas",
-                    {"keys": list(common_vars.keys())},
-                    hypothesis_id="E"
-                )
-                return common_vars
+        vault_vars = yaml.safe_load(plaintext)
     except Exception as e:
-        logger.warning(f"Error cargando common.yml: {e}")
+        logger.warning(f"Error parseando vault YAML: {e}")
+        return {}
+    debug_logger.log(
+        "infrastructure/ansible/vault_manager.py:65",
+        "Vault descifrado",
+        {
+            "has_vars": vault_vars is not None,
+            "keys": list(vault_vars.keys()) if isinstance(vault_vars, dict) else [],
+            "has_user": "vault_ansible_user" in (vault_vars or {}),
+            "has_password": "vault_ansible_password" in (vault_vars or {})
+        },
+        hypothesis_id="E"
+    )
+    if not vault_vars or not isinstance(vault_vars, dict):
+        return {}
     
-    return {}
+    with _lock:
+        # Una sola entrada: la password/versión anterior ya no sirve
+        _vault_cache.clear()
+        _vault_cache[key] = vault_vars
+    return dict(vault_vars)
+
 
+def clear_vault_cache() -> None:
+    """Descarta las variables del vault guardadas en memoria (al pedir la password y al salir)."""
+    with _lock:
+        _vault_cache.clear()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/persistence/blob_store.py
+========================================
+Blob store de salidas crudas de los playbooks.
+
+Un ExecutionResult guarda el stdout completo y el JSON parseado (data): el
+mismo contenido dos veces, durante toda la sesión. Con spill_result los
+campos grandes se escriben comprimidos (zlib) en BLOB_DIR con el sha256 del
+contenido como nombre, así salidas idénticas de distintos hosts ocupan un solo
+archivo, y el resultado se queda con un BlobRef que los carga recién cuando
+un formateador accede al campo. Los últimos blobs cargados quedan en un LRU
+chico para que un formateador que lee result.data varias veces no
+descomprima cada vez.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from ...shared.config import logger, BLOB_DIR, BLOB_SPILL_THRESHOLD, BLOB_RETENTION_DAYS
+from ...domain.models import ExecutionResult
+
+# Blobs cargados que se mantienen en memoria
+LOADED_CACHE_SIZE = 8
+
+# Estado global del módulo
+_loaded: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+_pruned = False
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """
+    Handle de un blob del store.
+
+    Attributes:
+        digest: sha256 del contenido sin comprimir
+        size: Tamaño sin comprimir (bytes)
+        kind: "text" (se carga como str) o "json" (se carga parseado)
+    """
+    digest: str
+    size: int
+    kind: str = "text"
+
+    @property
+    def path(self) -> Path:
+        return _blob_path(self.digest)
+
+    def read_bytes(self) -> bytes:
+        """
+        Contenido sin comprimir.
+
+        Raises:
+            OSError: Si el blob ya no existe (ej: se purgó)
+        """
+        with open(self.path, "rb") as f:
+            return zlib.decompress(f.read())
+
+    def load(self) -> Any:
+        """Contenido como str o JSON parseado según kind (cacheado en un LRU chico)."""
+        key = f"{self.kind}:{self.digest}"
+        with _lock:
+            if key in _loaded:
+                _loaded.move_to_end(key)
+                return _loaded[key]
+        try:
+            raw = self.read_bytes()
+        except (OSError, zlib.error) as e:
+            logger.error(f"Blob {self.digest[:12]} ilegible: {e}")
+            return None if self.kind == "json" else ""
+        value = json.loads(raw) if self.kind == "json" else raw.decode("utf-8")
+        with _lock:
+            _loaded[key] = value
+            while len(_loaded) > LOADED_CACHE_SIZE:
+                _loaded.popitem(last=False)
+        return value
+
+
+def _blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / f"{digest}.z"
+
+
+def put_blob(content: bytes, kind: str = "text") -> BlobRef:
+    """
+    Guarda contenido en el store (si ya existe solo renueva su fecha).
+
+    Args:
+        content: Contenido sin comprimir
+        kind: "text" o "json"
+
+    Returns:
+        BlobRef del contenido
+
+    Raises:
+        OSError: Si no se puede escribir
+    """
+    _prune_once()
+    digest = hashlib.sha256(content).hexdigest()
+    path = _blob_path(digest)
+    if path.exists():
+        os.utime(path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(content, 6))
+        os.replace(tmp_path, path)
+    return BlobRef(digest, len(content), kind)
+
+
+def spill_result(result: ExecutionResult, threshold: int = BLOB_SPILL_THRESHOLD) -> bool:
+    """
+    Descarga a disco el stdout y el JSON de un resultado si son grandes.
+
+    Los campos descargados dejan de ocupar memoria en el resultado; se leen
+    del store al accederlos (result.data / result.stdout siguen funcionando).
+
+    Args:
+        result: Resultado a descargar
+        threshold: Tamaño mínimo (bytes) de un campo para descargarlo
+
+    Returns:
+        True si se descargó algún campo
+    """
+    fields = result.__dict__
+    payloads = {}
+    stdout = fields.get("stdout")
+    if stdout and len(stdout) >= threshold:
+        payloads["stdout"] = (stdout.encode("utf-8"), "text")
+    data = fields.get("data")
+    if data:
+        raw = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+        if len(raw) >= threshold:
+            payloads["data"] = (raw, "json")
+
+    spilled = False
+    for name, (content, kind) in payloads.items():
+        try:
+            result.lazy_fields[name] = put_blob(content, kind)
+        except OSError as e:
+            logger.warning(f"No se pudo descargar {name} al blob store: {e}")
+            continue
+        del fields[name]
+        spilled = True
+    return spilled
+
+
+def _prune_once() -> None:
+    """Purga una vez por sesión (en segundo plano) los blobs sin usar hace BLOB_RETENTION_DAYS."""
+    global _pruned
+    with _lock:
+        if _pruned:
+            return
+        _pruned = True
+    threading.Thread(target=prune_blobs, name="blob-prune", daemon=True).start()
+
+
+def prune_blobs(max_age_days: Optional[int] = None) -> int:
+    """
+    Borra los blobs que no se escribieron ni reutilizaron en max_age_days días.
+
+    Args:
+        max_age_days: Antigüedad máxima (None = BLOB_RETENTION_DAYS)
+
+    Returns:
+        Cantidad de blobs borrados
+    """
+    cutoff = time.time() - 86400 * (BLOB_RETENTION_DAYS if max_age_days is None else max_age_days)
+    removed = 0
+    for path in BLOB_DIR.glob("*/*.z"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
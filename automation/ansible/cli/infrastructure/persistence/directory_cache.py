@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/persistence/directory_cache.py
+=============================================
+Cache local de las computadoras del directorio (Active Directory).
+
+Expandir "ou:...", "CIT-NB-*" o "cidr:10.1.0.0/22" no consulta al DC: usa un
+export de Get-ADComputer guardado en DIRECTORY_FILE, en CSV o JSON:
+
+    Get-ADComputer -Filter * -Properties DNSHostName,IPv4Address |
+        Select-Object Name,DNSHostName,DistinguishedName,IPv4Address,Enabled |
+        Export-Csv data/ad_computers.csv -NoTypeInformation
+
+(el JSON de ConvertTo-Json o los objects de microsoft.ad.object_info tienen
+las mismas propiedades). El archivo se parsea una vez y se indexa por nombre,
+por cada OU/contenedor que contiene al equipo y por IP; se vuelve a leer
+recién cuando cambia (mtime/tamaño), como los YAML de vars_cache.
+"""
+
+import bisect
+import csv
+import ipaddress
+import json
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ...shared.config import logger, DIRECTORY_FILE
+
+# Comas que separan los RDN de un DN (una coma escapada "\\," es parte del valor)
+_RDN_SPLIT_RE = re.compile(r"(?<!\\),")
+
+# Propiedades del export (sin distinguir mayúsculas) -> campo
+_FIELDS = {
+    "name": "name",
+    "dnshostname": "dns_hostname",
+    "distinguishedname": "distinguished_name",
+    "ipv4address": "ipv4",
+    "enabled": "enabled",
+}
+
+
+class DirectoryComputer(NamedTuple):
+    """Computadora del directorio (NamedTuple: se crean decenas de miles por carga)."""
+    name: str
+    dns_hostname: str = ""
+    distinguished_name: str = ""
+    ipv4: str = ""
+    enabled: bool = True
+
+
+@dataclass
+class DirectoryIndex:
+    """
+    Computadoras del directorio indexadas para expandir targets.
+
+    Attributes:
+        computers: NOMBRE -> DirectoryComputer
+        names: Nombres ordenados (búsqueda por prefijo para los globs)
+        aliases: FQDN (minúsculas) -> NOMBRE
+        by_container: DN normalizado de cada OU/contenedor -> nombres que contiene (subárbol)
+        addresses: (IP como entero, NOMBRE) ordenados por IP
+        disabled: Nombres de las cuentas deshabilitadas
+        source: Archivo del que se cargó (None si no hay cache)
+        loaded_at: Momento de la carga
+    """
+    computers: Dict[str, DirectoryComputer] = field(default_factory=dict)
+    names: List[str] = field(default_factory=list)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    by_container: Dict[str, List[str]] = field(default_factory=dict)
+    addresses: List[Tuple[int, str]] = field(default_factory=list)
+    disabled: Set[str] = field(default_factory=set)
+    source: Optional[Path] = None
+    loaded_at: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.computers)
+
+    def canonical_name(self, host: str) -> Optional[str]:
+        """
+        Nombre del directorio para un nombre corto o un FQDN.
+
+        Returns:
+            NOMBRE o None si el directorio no lo conoce
+        """
+        upper = host.upper()
+        if upper in self.computers:
+            return upper
+        return self.aliases.get(host.lower())
+
+    def in_container(self, dn: str) -> List[str]:
+        """Equipos dentro de una OU o contenedor (incluye sub-OUs)."""
+        return self.by_container.get(normalize_dn(dn), [])
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """Nombres que empiezan con prefix (en mayúsculas)."""
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + "\uffff") if prefix else len(self.names)
+        return self.names[start:end]
+
+    def in_network(self, network: ipaddress.IPv4Network) -> List[str]:
+        """Equipos cuya IPv4 registrada está dentro de la red."""
+        low = int(network.network_address)
+        high = int(network.broadcast_address)
+        start = bisect.bisect_left(self.addresses, (low, ""))
+        end = bisect.bisect_right(self.addresses, (high, "\uffff"))
+        return [name for _, name in self.addresses[start:end]]
+
+
+# Estado global del módulo: versión del archivo ((mtime_ns, tamaño)) e índice
+_version: Optional[Tuple[int, int]] = None
+_index = DirectoryIndex()
+_lock = threading.Lock()
+
+
+def normalize_dn(dn: str) -> str:
+    """
+    Forma canónica de un DN para compararlo: minúsculas y sin espacios alrededor de cada RDN.
+
+    Args:
+        dn: Distinguished name (ej: "OU=Notebooks, DC=corp,DC=local")
+
+    Returns:
+        DN normalizado (ej: "ou=notebooks,dc=corp,dc=local")
+    """
+    return ",".join(part.strip() for part in _RDN_SPLIT_RE.split(dn.strip().lower()) if part.strip())
+
+
+def _parent(dn: str) -> str:
+    """DN del contenedor directo de un objeto (sin normalizar)."""
+    if "\\" in dn:
+        parts = _RDN_SPLIT_RE.split(dn, maxsplit=1)
+        return parts[1] if len(parts) > 1 else ""
+    return dn.partition(",")[2]
+
+
+def _ancestors(dn: str) -> List[str]:
+    """DN normalizado de un contenedor y de todos los que lo contienen (hasta la raíz)."""
+    parts = normalize_dn(dn).split(",") if dn else []
+    return [",".join(parts[i:]) for i in range(len(parts))]
+
+
+def _ipv4_to_int(address: str) -> Optional[int]:
+    """IPv4 como entero (None si no es una IPv4 en notación a.b.c.d)."""
+    if address.count(".") != 3:
+        return None
+    try:
+        return int.from_bytes(socket.inet_aton(address), "big")
+    except OSError:
+        return None
+
+
+def _parse_enabled(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ("false", "0", "no")
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _read_computers(path: Path) -> List[DirectoryComputer]:
+    """Equipos del export (CSV de Export-Csv o JSON; propiedades sin distinguir mayúsculas)."""
+    if path.suffix.lower() == ".json":
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("objects") or data.get("computers") or [data]
+        rows = [item for item in data if isinstance(item, dict)]
+        header = list({key for item in rows for key in item})
+        rows = [[item.get(key) for key in header] for item in rows]
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            lines = [line for line in f if not line.startswith("#TYPE")]
+        try:
+            dialect = csv.Sniffer().sniff("".join(lines[:20]), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(lines, dialect=dialect)
+        header = next(reader, [])
+        rows = reader
+
+    # Posición de cada campo en la fila (-1 = el export no lo trae)
+    positions = {field_name: -1 for field_name in _FIELDS.values()}
+    for position, key in enumerate(header):
+        field_name = _FIELDS.get(str(key).strip().lower())
+        if field_name:
+            positions[field_name] = position
+    if positions["name"] < 0:
+        raise ValueError("el export no tiene la columna Name")
+
+    def value(row: list, field_name: str) -> Any:
+        position = positions[field_name]
+        return row[position] if 0 <= position < len(row) else None
+
+    computers = []
+    for row in rows:
+        name = _text(value(row, "name")).upper()
+        if not name:
+            continue
+        enabled = value(row, "enabled")
+        computers.append(DirectoryComputer(
+            name,
+            _text(value(row, "dns_hostname")).lower(),
+            _text(value(row, "distinguished_name")),
+            _text(value(row, "ipv4")),
+            True if enabled is None else _parse_enabled(enabled),
+        ))
+    return computers
+
+
+def _build_index(computers: Iterable[DirectoryComputer], source: Path) -> DirectoryIndex:
+    index = DirectoryIndex(source=source, loaded_at=time.time())
+    for computer in computers:
+        index.computers[computer.name] = computer
+    # Se agrupa por contenedor directo y cada grupo se suma a sus ancestros:
+    # hay muchos menos contenedores distintos que equipos
+    by_parent: Dict[str, List[str]] = {}
+    for name, computer in index.computers.items():
+        if computer.dns_hostname:
+            index.aliases[computer.dns_hostname] = name
+        if not computer.enabled:
+            index.disabled.add(name)
+        by_parent.setdefault(_parent(computer.distinguished_name), []).append(name)
+        address = _ipv4_to_int(computer.ipv4)
+        if address is not None:
+            index.addresses.append((address, name))
+    for parent, names in by_parent.items():
+        for container in _ancestors(parent):
+            index.by_container.setdefault(container, []).extend(names)
+    index.names = sorted(index.computers)
+    index.addresses.sort()
+    return index
+
+
+def get_directory(path: Optional[Path] = None) -> DirectoryIndex:
+    """
+    Índice del directorio (cacheado mientras el archivo no cambie).
+
+    Args:
+        path: Export a cargar (default: DIRECTORY_FILE)
+
+    Returns:
+        DirectoryIndex (vacío si no hay export o no se puede leer)
+    """
+    global _version, _index
+    path = path or DIRECTORY_FILE
+    try:
+        stat = path.stat()
+    except OSError:
+        return DirectoryIndex()
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        if _version == version and _index.source == path:
+            return _index
+        start = time.time()
+        try:
+            computers = _read_computers(path)
+        except (OSError, ValueError, csv.Error) as e:
+            logger.warning(f"Cache del directorio ilegible ({path}): {e}")
+            return DirectoryIndex()
+        _index = _build_index(computers, path)
+        _version = version
+        logger.info(f"Directorio: {len(_index)} equipos cargados de {path.name} en {time.time() - start:.2f}s")
+        return _index
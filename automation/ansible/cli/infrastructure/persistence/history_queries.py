@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/persistence/history_queries.py
+=============================================
+Consultas agregadas sobre el historial de ejecuciones.
+
+Responde preguntas como "último H1 exitoso por host", "tasa de fallas de SC3
+esta semana" o "p95 de duración de A13 por sitio" sin recorrer la tabla de
+ejecuciones: conteos, duraciones y últimas ejecuciones salen del resumen
+diario (daily_rollups) y los percentiles de un rango de ix_executions_option_cov,
+que cubre la consulta (no lee las filas).
+
+Los períodos son días completos: since se redondea al día (hora local) para
+leer el resumen diario.
+"""
+
+import math
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from ...shared.config import HISTORY_SITE_PATTERN
+from ...domain.models import HistoryAggregate
+from .history_store import reader
+
+# Agrupaciones soportadas por aggregate_executions
+GROUP_BY = ("option_key", "hostname", "site", "day")
+
+# Sitio de los hosts que no cumplen HISTORY_SITE_PATTERN
+UNKNOWN_SITE = "-"
+
+_SITE_RE = re.compile(HISTORY_SITE_PATTERN, re.IGNORECASE)
+
+
+def site_of(hostname: str) -> str:
+    """
+    Sitio de un host según HISTORY_SITE_PATTERN.
+
+    Args:
+        hostname: Hostname del equipo
+
+    Returns:
+        Sitio en mayúsculas o UNKNOWN_SITE
+    """
+    match = _SITE_RE.match(hostname.strip())
+    return match.group(1).upper() if match and match.groups() else UNKNOWN_SITE
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+def _group_key(group_by: str, value: Optional[str]) -> str:
+    """Clave de grupo de una fila (los hostnames se comparan sin distinguir mayúsculas)."""
+    if group_by == "site":
+        return site_of(value)
+    if group_by == "hostname":
+        return value.upper()
+    return value or UNKNOWN_SITE
+
+
+def _rollup_where(
+    option_key: Optional[str],
+    hostname: Optional[str],
+    since: Optional[float],
+    until: Optional[float]
+) -> tuple:
+    """Cláusula WHERE y parámetros de una consulta sobre daily_rollups."""
+    clauses, params = [], []
+    if option_key:
+        clauses.append("option_key = ?")
+        params.append(option_key)
+    if hostname:
+        clauses.append("hostname = ?")
+        params.append(hostname.strip())
+    if since is not None:
+        clauses.append("day >= ?")
+        params.append(_day(since))
+    if until is not None:
+        clauses.append("day <= ?")
+        params.append(_day(until))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def aggregate_executions(
+    group_by: str = "option_key",
+    option_key: Optional[str] = None,
+    hostname: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    with_p95: bool = False
+) -> List[HistoryAggregate]:
+    """
+    Métricas del historial agrupadas, desde el resumen diario.
+
+    Args:
+        group_by: "option_key", "hostname", "site" o "day"
+        option_key: Solo esta opción del menú (ej: "SC3")
+        hostname: Solo este host
+        since: Desde este timestamp (día completo)
+        until: Hasta este timestamp (día completo)
+        with_p95: Calcular también el percentil 95 de duración de cada grupo
+
+    Returns:
+        Lista de HistoryAggregate, de más a menos ejecuciones (por fecha si group_by="day")
+
+    Raises:
+        ValueError: Si group_by no es una agrupación soportada
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Agrupación no soportada: {group_by}")
+    column = "hostname" if group_by == "site" else group_by
+    where, params = _rollup_where(option_key, hostname, since, until)
+    rows = reader().execute(
+        f"SELECT {column} AS key, SUM(runs), SUM(failures), SUM(cached_runs), SUM(total_duration), "
+        f"MAX(max_duration), MAX(last_finished_at), MAX(last_success_at) "
+        f"FROM daily_rollups{where} GROUP BY {column}",
+        params
+    ).fetchall()
+
+    groups: Dict[str, HistoryAggregate] = {}
+    for key, runs, failures, cached_runs, total, max_duration, last_finished, last_success in rows:
+        key = _group_key(group_by, key)
+        agg = groups.setdefault(key, HistoryAggregate(key))
+        agg.runs += runs
+        agg.failures += failures
+        agg.cached_runs += cached_runs
+        agg.total_duration += total
+        agg.max_duration = max(agg.max_duration, max_duration)
+        agg.last_finished_at = max(agg.last_finished_at, last_finished)
+        if last_success:
+            agg.last_success_at = max(agg.last_success_at or 0.0, last_success)
+
+    if with_p95 and groups:
+        percentiles = duration_percentiles(
+            95, group_by=group_by, option_key=option_key, hostname=hostname,
+            since=since, until=until
+        )
+        for key, agg in groups.items():
+            agg.p95_duration = percentiles.get(key)
+
+    if group_by == "day":
+        return sorted(groups.values(), key=lambda agg: agg.key)
+    return sorted(groups.values(), key=lambda agg: (-agg.runs, agg.key))
+
+
+def last_success_by_host(
+    option_key: str,
+    hostnames: Optional[Iterable[str]] = None
+) -> Dict[str, float]:
+    """
+    Última ejecución exitosa de una opción en cada host.
+
+    Args:
+        option_key: Opción del menú (ej: "H1")
+        hostnames: Solo estos hosts (None = todos los que la ejecutaron)
+
+    Returns:
+        Dict hostname -> timestamp (los hosts sin éxitos no aparecen)
+    """
+    rows = reader().execute(
+        "SELECT hostname, MAX(last_success_at) FROM daily_rollups "
+        "WHERE option_key = ? AND last_success_at > 0 GROUP BY hostname",
+        (option_key,)
+    ).fetchall()
+    result = {hostname: last_success for hostname, last_success in rows}
+    if hostnames is None:
+        return result
+    wanted = {hostname.strip().lower() for hostname in hostnames}
+    return {hostname: ts for hostname, ts in result.items() if hostname.lower() in wanted}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada no vacía."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def duration_percentiles(
+    pct: float = 95,
+    group_by: Optional[str] = None,
+    option_key: Optional[str] = None,
+    hostname: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Percentil de duración de las ejecuciones reales (sin las del fact store).
+
+    Con option_key la consulta se resuelve solo con ix_executions_option_cov.
+
+    Args:
+        pct: Percentil (0-100)
+        group_by: None (un solo grupo "*"), "option_key", "hostname", "site" o "day"
+        option_key: Solo esta opción del menú
+        hostname: Solo este host
+        since: Desde este timestamp (día completo, como aggregate_executions)
+        until: Hasta este timestamp (día completo)
+
+    Returns:
+        Dict grupo -> duración en segundos
+
+    Raises:
+        ValueError: Si group_by no es una agrupación soportada
+    """
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValueError(f"Agrupación no soportada: {group_by}")
+    clauses, params = ["cached = 0"], []
+    if option_key:
+        clauses.append("option_key = ?")
+        params.append(option_key)
+    if hostname:
+        clauses.append("hostname = ?")
+        params.append(hostname.strip())
+    if since is not None:
+        clauses.append("finished_at >= ?")
+        params.append(datetime.strptime(_day(since), "%Y-%m-%d").timestamp())
+    if until is not None:
+        clauses.append("finished_at < ?")
+        params.append(datetime.strptime(_day(until), "%Y-%m-%d").timestamp() + 86400)
+    rows = reader().execute(
+        f"SELECT option_key, hostname, finished_at, duration FROM executions WHERE {' AND '.join(clauses)}",
+        params
+    )
+
+    durations: Dict[str, List[float]] = {}
+    for row_option, row_host, finished_at, duration in rows:
+        if group_by == "option_key":
+            key = _group_key(group_by, row_option)
+        elif group_by in ("hostname", "site"):
+            key = _group_key(group_by, row_host)
+        elif group_by == "day":
+            key = _day(finished_at)
+        else:
+            key = "*"
+        durations.setdefault(key, []).append(duration)
+    return {key: _percentile(sorted(values), pct) for key, values in durations.items()}
+
+
+def period_start(days: int) -> float:
+    """
+    Timestamp de inicio de los últimos N días (hoy incluido).
+
+    Args:
+        days: Cantidad de días
+
+    Returns:
+        Medianoche local de hace days - 1 días
+    """
+    today = datetime.strptime(_day(time.time()), "%Y-%m-%d").timestamp()
+    return today - 86400 * (days - 1)
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/persistence/history_store.py
+===========================================
+Historial de ejecuciones persistente en SQLite.
+
+Cada ejecución (host, opción, playbook, tiempos, return code y resumen del
+resultado) se guarda en HISTORY_DB, en modo WAL para que las consultas no
+bloqueen las escrituras. Registrar una ejecución no toca el disco: la fila se
+encola y un hilo escritor las inserta en lotes (HISTORY_BATCH_SIZE filas o
+HISTORY_FLUSH_INTERVAL segundos, lo que ocurra primero) en una sola
+transacción, que también actualiza el resumen diario por opción y host
+(daily_rollups). Los índices por host, opción y fecha permiten consultar
+cientos de miles de filas sin recorrer la tabla; las consultas agregadas
+están en history_queries.py.
+"""
+
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ...shared.config import logger, HISTORY_DB, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL
+
+# Versión del esquema (PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+# Resumen diario por opción y host: se actualiza en la misma transacción que
+# inserta cada lote (ver _rollup), así las métricas por período no recorren
+# la tabla de ejecuciones. option_key vacío = ejecución sin opción del menú.
+ROLLUP_COLUMNS = (
+    "day", "option_key", "hostname", "runs", "failures", "cached_runs",
+    "total_duration", "max_duration", "last_finished_at", "last_success_at",
+)
+
+# Migraciones: versión -> script que lleva el esquema de la versión anterior a esa
+MIGRATIONS = {
+    1: """
+CREATE TABLE IF NOT EXISTS executions (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    hostname TEXT NOT NULL COLLATE NOCASE,
+    option_key TEXT,
+    task_name TEXT NOT NULL,
+    playbook TEXT,
+    success INTEGER NOT NULL,
+    returncode INTEGER,
+    duration REAL NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_executions_finished ON executions (finished_at);
+CREATE INDEX IF NOT EXISTS ix_executions_host ON executions (hostname, finished_at);
+CREATE INDEX IF NOT EXISTS ix_executions_option ON executions (option_key, finished_at);
+CREATE INDEX IF NOT EXISTS ix_executions_session ON executions (session_id, finished_at);
+""",
+    2: """
+DROP INDEX IF EXISTS ix_executions_option;
+CREATE INDEX IF NOT EXISTS ix_executions_option_cov
+    ON executions (option_key, finished_at, success, cached, duration, hostname);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    option_key TEXT NOT NULL,
+    hostname TEXT NOT NULL COLLATE NOCASE,
+    runs INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    cached_runs INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    max_duration REAL NOT NULL,
+    last_finished_at REAL NOT NULL,
+    last_success_at REAL NOT NULL,
+    PRIMARY KEY (day, option_key, hostname)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_rollups_option ON daily_rollups (option_key, day);
+CREATE INDEX IF NOT EXISTS ix_rollups_host ON daily_rollups (hostname, day);
+""",
+}
+
+# Acumula en daily_rollups las ejecuciones que cumplen {where}
+ROLLUP_SQL = f"""
+INSERT INTO daily_rollups ({', '.join(ROLLUP_COLUMNS)})
+SELECT date(finished_at, 'unixepoch', 'localtime'), COALESCE(option_key, ''), hostname,
+       COUNT(*), SUM(success = 0), SUM(cached), SUM(duration), MAX(duration), MAX(finished_at),
+       COALESCE(MAX(CASE WHEN success THEN finished_at END), 0)
+FROM executions WHERE {{where}}
+GROUP BY 1, 2, 3
+ON CONFLICT (day, option_key, hostname) DO UPDATE SET
+    runs = runs + excluded.runs,
+    failures = failures + excluded.failures,
+    cached_runs = cached_runs + excluded.cached_runs,
+    total_duration = total_duration + excluded.total_duration,
+    max_duration = MAX(max_duration, excluded.max_duration),
+    last_finished_at = MAX(last_finished_at, excluded.last_finished_at),
+    last_success_at = MAX(last_success_at, excluded.last_success_at)
+"""
+
+COLUMNS = (
+    "session_id", "started_at", "finished_at", "hostname", "option_key", "task_name",
+    "playbook", "success", "returncode", "duration", "cached", "summary",
+)
+
+# Identificador de esta sesión de la CLI
+SESSION_ID = uuid.uuid4().hex[:12]
+
+
+@dataclass
+class HistoryRecord:
+    """Una ejecución registrada en el historial."""
+    hostname: str
+    task_name: str
+    success: bool
+    started_at: float
+    finished_at: float
+    option_key: Optional[str] = None
+    playbook: Optional[str] = None
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    cached: bool = False
+    summary: Dict[str, Any] = field(default_factory=dict)
+    session_id: str = SESSION_ID
+
+    def to_row(self) -> tuple:
+        return (
+            self.session_id, self.started_at, self.finished_at, self.hostname, self.option_key,
+            self.task_name, self.playbook, int(self.success), self.returncode, self.duration,
+            int(self.cached), json.dumps(self.summary, default=str) if self.summary else None,
+        )
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "HistoryRecord":
+        return cls(
+            hostname=row["hostname"], task_name=row["task_name"], success=bool(row["success"]),
+            started_at=row["started_at"], finished_at=row["finished_at"], option_key=row["option_key"],
+            playbook=row["playbook"], returncode=row["returncode"], duration=row["duration"],
+            cached=bool(row["cached"]), summary=json.loads(row["summary"]) if row["summary"] else {},
+            session_id=row["session_id"],
+        )
+
+
+# Estado global del módulo
+_queue: "queue.Queue" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_local = threading.local()
+_schema_ready = False
+
+# Marcador de cola para cerrar el escritor
+_STOP = object()
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Abre una conexión a la base del historial (creando el esquema si falta).
+
+    Returns:
+        Conexión con row_factory sqlite3.Row
+    """
+    global _schema_ready
+    HISTORY_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(HISTORY_DB), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _lock:
+        if not _schema_ready:
+            _migrate(conn)
+            _schema_ready = True
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Aplica las migraciones pendientes según PRAGMA user_version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        with conn:
+            for statement in MIGRATIONS[target].split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            if target == 2:
+                # Resumen diario de las ejecuciones registradas antes de la v2
+                conn.execute(ROLLUP_SQL.format(where="1"))
+            conn.execute(f"PRAGMA user_version={target}")
+        if version:
+            logger.info(f"Historial migrado al esquema v{target}")
+
+
+def _rollup(conn: sqlite3.Connection, where: str, params: tuple = ()) -> None:
+    """Suma a daily_rollups las ejecuciones que cumplen where (dentro de la transacción del llamador)."""
+    conn.execute(ROLLUP_SQL.format(where=where), params)
+
+
+def reader() -> sqlite3.Connection:
+    """Conexión de lectura del hilo actual (sqlite3 no comparte conexiones entre hilos)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = connect()
+    return conn
+
+
+def _write_batch(conn: sqlite3.Connection, records: List[HistoryRecord]) -> None:
+    """
+    Inserta un lote de ejecuciones en una sola transacción.
+
+    BEGIN IMMEDIATE toma el lock de escritura antes de leer MAX(id): otro
+    proceso (otra CLI, el modo headless) no puede insertar entre esa lectura y
+    el rollup, que si no sumaría sus filas dos veces a daily_rollups.
+    """
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM executions").fetchone()[0]
+            conn.executemany(
+                f"INSERT INTO executions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [record.to_row() for record in records]
+            )
+            _rollup(conn, "id > ?", (last_id,))
+    except sqlite3.Error as e:
+        logger.error(f"No se pudieron guardar {len(records)} ejecuciones en el historial: {e}")
+
+
+def _writer_loop() -> None:
+    """Hilo escritor: junta filas hasta completar un lote o vencer el intervalo."""
+    conn = connect()
+    while True:
+        item = _queue.get()
+        batch: List[HistoryRecord] = []
+        flushes: List[threading.Event] = []
+        stop = False
+        deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL
+        while True:
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                flushes.append(item)
+            else:
+                batch.append(item)
+            if stop or flushes or len(batch) >= HISTORY_BATCH_SIZE:
+                break
+            try:
+                item = _queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        if batch:
+            _write_batch(conn, batch)
+        for event in flushes:
+            event.set()
+        if stop:
+            conn.close()
+            return
+
+
+def _ensure_writer() -> None:
+    """Inicia el hilo escritor bajo demanda (una sola vez por sesión)."""
+    global _writer
+    with _lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="history-writer", daemon=True)
+            _writer.start()
+
+
+def record_execution(record: HistoryRecord) -> None:
+    """
+    Registra una ejecución sin bloquear (la escribe el hilo escritor).
+
+    Args:
+        record: Ejecución a guardar
+    """
+    _ensure_writer()
+    _queue.put(record)
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """
+    Espera a que las ejecuciones encoladas queden escritas.
+
+    Args:
+        timeout: Segundos máximos de espera
+
+    Returns:
+        True si se escribieron dentro del timeout
+    """
+    if _writer is None:
+        return True
+    event = threading.Event()
+    _queue.put(event)
+    return event.wait(timeout)
+
+
+def close_history() -> None:
+    """Escribe lo pendiente y detiene el hilo escritor (al salir de la CLI)."""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.is_alive():
+        _queue.put(_STOP)
+        writer.join(timeout=10)
+
+
+atexit.register(close_history)
+
+
+def _where(
+    hostname: Optional[str],
+    option_key: Optional[str],
+    session_id: Optional[str],
+    since: Optional[float],
+    success: Optional[bool]
+) -> tuple:
+    """Cláusula WHERE y parámetros de los filtros de consulta."""
+    clauses, params = [], []
+    if hostname:
+        clauses.append("hostname = ?")
+        params.append(hostname.strip())
+    if option_key:
+        clauses.append("option_key = ?")
+        params.append(option_key)
+    if session_id:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    if since is not None:
+        clauses.append("finished_at >= ?")
+        params.append(since)
+    if success is not None:
+        clauses.append("success = ?")
+        params.append(int(success))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query_executions(
+    hostname: Optional[str] = None,
+    option_key: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[float] = None,
+    success: Optional[bool] = None,
+    limit: int = 500
+) -> List[HistoryRecord]:
+    """
+    Consulta las ejecuciones más recientes que cumplen los filtros.
+
+    Args:
+        hostname: Solo este host
+        option_key: Solo esta opción del menú (ej: "H1")
+        session_id: Solo esta sesión (ej: SESSION_ID)
+        since: Solo ejecuciones terminadas desde este timestamp
+        success: Solo exitosas (True) o fallidas (False)
+        limit: Máximo de filas
+
+    Returns:
+        Lista de HistoryRecord, de la más reciente a la más antigua
+    """
+    where, params = _where(hostname, option_key, session_id, since, success)
+    rows = reader().execute(
+        f"SELECT * FROM executions{where} ORDER BY finished_at DESC LIMIT ?", (*params, limit)
+    ).fetchall()
+    return [HistoryRecord.from_row(row) for row in rows]
+
+
+def count_executions(
+    hostname: Optional[str] = None,
+    option_key: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[float] = None,
+    success: Optional[bool] = None
+) -> int:
+    """Cantidad de ejecuciones que cumplen los filtros (mismos que query_executions)."""
+    where, params = _where(hostname, option_key, session_id, since, success)
+    return reader().execute(f"SELECT COUNT(*) FROM executions{where}", params).fetchone()[0]
+
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/remote/preflight.py
+==================================
+Preflight de conectividad WinRM para muchos hosts en paralelo.
+
+check_host_online verifica un host por vez con un proceso de Ansible y hasta
+20 segundos de espera. El preflight usa asyncio para, con concurrencia
+acotada, abrir TCP a 5985/5986 y enviar un Identify de WS-Man (anónimo, sin
+credenciales) a cientos de hosts a la vez; devuelve en pocos segundos qué
+hosts tienen un listener WinRM respondiendo y en qué transporte: los que
+solo responden en 5986 se ejecutan por https (ver
+inventory_builder.transport_vars), no con el 5985/http del grupo.
+"""
+
+import asyncio
+import ssl
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ...shared.config import logger, PREFLIGHT_CONCURRENCY, PREFLIGHT_TIMEOUT
+from ..ansible.inventory_builder import resolve_target_ip
+from ..ansible.network_resolver import resolve_hostnames_async
+
+# Puertos WinRM en orden de prueba: (puerto, transporte)
+WINRM_PORTS: Tuple[Tuple[int, str], ...] = ((5985, "http"), (5986, "https"))
+
+# Identify de WS-Man: lo responde el listener sin autenticar (header WSMANIDENTIFY)
+IDENTIFY_BODY = (
+    '<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope" '
+    'xmlns:wsmid="http://schemas.dmtf.org/wbem/wsman/identity/1/wsmanidentity.xsd">'
+    '<s:Header/><s:Body><wsmid:Identify/></s:Body></s:Envelope>'
+).encode()
+
+# Respuestas HTTP que confirman un listener WinRM (401: Identify anónimo deshabilitado)
+WINRM_HTTP_STATUS = (200, 401)
+
+# Contexto TLS compartido (se crea al primer uso)
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+@dataclass
+class ProbeResult:
+    """Resultado del preflight de un host."""
+    hostname: str
+    address: Optional[str]
+    reachable: bool
+    transport: Optional[str] = None
+    port: Optional[int] = None
+    latency: Optional[float] = None
+    error: str = ""
+
+
+def _identify_request(address: str) -> bytes:
+    """Pedido HTTP con el Identify de WS-Man."""
+    headers = (
+        f"POST /wsman HTTP/1.1\r\n"
+        f"Host: {address}\r\n"
+        f"Content-Type: application/soap+xml;charset=UTF-8\r\n"
+        f"WSMANIDENTIFY: unauthenticated\r\n"
+        f"Content-Length: {len(IDENTIFY_BODY)}\r\n"
+        f"Connection: close\r\n\r\n"
+    )
+    return headers.encode() + IDENTIFY_BODY
+
+
+def _tls_context() -> ssl.SSLContext:
+    """
+    Contexto TLS sin validar certificado (igual que server_cert_validation=ignore).
+
+    Se crea una sola vez: crearlo por conexión bloquea el event loop.
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        _ssl_context = context
+    return _ssl_context
+
+
+async def _identify(address: str, port: int, transport: str, timeout: float) -> int:
+    """
+    Abre TCP (TLS en 5986), envía el Identify y devuelve el código HTTP.
+
+    Raises:
+        OSError, asyncio.TimeoutError, ValueError: Puerto cerrado, sin respuesta o respuesta no HTTP
+    """
+    ssl_context = _tls_context() if transport == "https" else None
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(address, port, ssl=ssl_context), timeout
+    )
+    try:
+        writer.write(_identify_request(address))
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        parts = status_line.decode("latin-1").split()
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise ValueError("respuesta no HTTP")
+        return int(parts[1])
+    finally:
+        writer.close()
+
+
+async def _probe_host(hostname: str, semaphore: asyncio.Semaphore, timeout: float) -> ProbeResult:
+    """Resuelve el host y prueba los puertos WinRM hasta encontrar un listener."""
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        address = await loop.run_in_executor(None, resolve_target_ip, hostname) or hostname
+        errors = []
+        for port, transport in WINRM_PORTS:
+            start = time.perf_counter()
+            try:
+                status = await _identify(address, port, transport, timeout)
+            except asyncio.TimeoutError:
+                errors.append(f"{port}: timeout")
+                continue
+            except (OSError, ValueError) as e:
+                errors.append(f"{port}: {e}")
+                continue
+            if status in WINRM_HTTP_STATUS:
+                return ProbeResult(
+                    hostname, address, True, transport, port, time.perf_counter() - start
+                )
+            errors.append(f"{port}: HTTP {status}")
+        return ProbeResult(hostname, address, False, error="; ".join(errors))
+
+
+async def _probe_all(hostnames: List[str], concurrency: int, timeout: float) -> List[ProbeResult]:
+    # Resolver todo el lote de una vez: los probes encuentran el DNS ya en cache
+    await resolve_hostnames_async(hostnames)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(*(_probe_host(h, semaphore, timeout) for h in hostnames))
+
+
+def preflight_hosts(
+    hostnames: List[str],
+    concurrency: int = PREFLIGHT_CONCURRENCY,
+    timeout: float = PREFLIGHT_TIMEOUT
+) -> Dict[str, ProbeResult]:
+    """
+    Verifica en paralelo qué hosts tienen WinRM respondiendo.
+
+    Debe llamarse desde código sincrónico (crea su propio event loop).
+
+    Args:
+        hostnames: Hostnames o IPs a probar
+        concurrency: Hosts probados a la vez como máximo
+        timeout: Timeout por conexión/respuesta (segundos)
+
+    Returns:
+        Dict hostname -> ProbeResult
+    """
+    if not hostnames:
+        return {}
+    start = time.time()
+    results = asyncio.run(_probe_all(list(dict.fromkeys(hostnames)), concurrency, timeout))
+    reachable = sum(1 for r in results if r.reachable)
+    logger.info(
+        f"Preflight WinRM: {reachable}/{len(results)} hosts alcanzables en {time.time() - start:.1f}s"
+    )
+    return {result.hostname: result for result in results}
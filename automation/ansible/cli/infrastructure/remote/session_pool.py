@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+infrastructure/remote/session_pool.py
+=====================================
+Pool de sesiones WinRM reutilizables.
+
+Cada comando remoto fuera de Ansible (health check, snapshot) abría una
+conexión nueva: TCP, handshake NTLM y creación del shell remoto. El pool
+mantiene abiertas las sesiones (Protocol de pywinrm con su shell) por host y
+credenciales, las reutiliza mientras estén sanas, las cierra tras un tiempo
+sin uso y limita cuántas hay abiertas a la vez.
+
+pywinrm es opcional: sin él is_pool_available() devuelve False y los
+llamadores usan el camino con Ansible.
+"""
+
+import hashlib
+import threading
+import time
+from base64 import b64encode
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...shared.config import logger, PROBE_TIMEOUT, WINRM_POOL_MAX_SESSIONS, WINRM_POOL_IDLE_TIMEOUT
+from ..ansible.inventory_builder import DEFAULT_WINRM_VARS, transport_vars
+
+try:
+    from winrm.protocol import Protocol
+except ImportError:
+    Protocol = None
+
+# Timeouts de las operaciones WS-Man de una sesión (segundos), dentro del
+# presupuesto del probe: un host colgado falla en el pool igual que por Ansible.
+# pywinrm exige read > operation.
+READ_TIMEOUT = max(2, PROBE_TIMEOUT)
+OPERATION_TIMEOUT = max(1, min(READ_TIMEOUT - 1, PROBE_TIMEOUT - 5))
+
+
+@dataclass(frozen=True)
+class WinRMCredentials:
+    """Credenciales y parámetros de conexión WinRM."""
+    username: str
+    password: str
+    transport: str = DEFAULT_WINRM_VARS["ansible_winrm_transport"]
+    scheme: str = DEFAULT_WINRM_VARS["ansible_winrm_scheme"]
+    port: int = int(DEFAULT_WINRM_VARS["ansible_port"])
+
+    @classmethod
+    def from_vault_vars(cls, vault_vars: Dict[str, str]) -> Optional["WinRMCredentials"]:
+        """Credenciales a partir de las variables del vault (None si faltan)."""
+        if not vault_vars.get("vault_ansible_user") or not vault_vars.get("vault_ansible_password"):
+            return None
+        return cls(vault_vars["vault_ansible_user"], vault_vars["vault_ansible_password"])
+
+    def for_transport(self, transport: Optional[str]) -> "WinRMCredentials":
+        """
+        Las mismas credenciales con el esquema y puerto del transporte detectado.
+
+        Args:
+            transport: "http", "https" o None (los del grupo, 5985/http)
+
+        Returns:
+            WinRMCredentials con scheme y port del transporte
+        """
+        winrm_vars = {**DEFAULT_WINRM_VARS, **transport_vars(transport)}
+        return replace(self, scheme=winrm_vars["ansible_winrm_scheme"], port=int(winrm_vars["ansible_port"]))
+
+
+@dataclass
+class _Session:
+    """Sesión abierta: protocolo (conexión HTTP autenticada) y shell remoto."""
+    key: Tuple[str, int, str, str]
+    protocol: Any
+    shell_id: str
+    last_used: float
+    uses: int = 0
+    busy: bool = False
+
+
+# Estado global del módulo
+_sessions: List[_Session] = []
+_lock = threading.Lock()
+_stats = {"created": 0, "reused": 0, "closed_idle": 0, "discarded": 0, "overflow": 0}
+
+
+def is_pool_available() -> bool:
+    """
+    Indica si el pool puede usarse (pywinrm instalado).
+
+    Returns:
+        True si pywinrm es importable
+    """
+    return Protocol is not None
+
+
+def _session_key(address: str, credentials: WinRMCredentials) -> Tuple[str, int, str, str]:
+    """Clave del pool: host, puerto, usuario y hash de la password (nunca la password)."""
+    password_hash = hashlib.sha256(credentials.password.encode()).hexdigest()
+    return address.lower(), credentials.port, credentials.username.lower(), password_hash
+
+
+def _open_session(address: str, credentials: WinRMCredentials) -> _Session:
+    """Abre la conexión y el shell remoto (TCP + autenticación + shell)."""
+    protocol = Protocol(
+        endpoint=f"{credentials.scheme}://{address}:{credentials.port}/wsman",
+        transport=credentials.transport,
+        username=credentials.username,
+        password=credentials.password,
+        server_cert_validation=DEFAULT_WINRM_VARS["ansible_winrm_server_cert_validation"],
+        operation_timeout_sec=OPERATION_TIMEOUT,
+        read_timeout_sec=READ_TIMEOUT,
+    )
+    shell_id = protocol.open_shell()
+    return _Session(_session_key(address, credentials), protocol, shell_id, last_used=time.time())
+
+
+def _close_session(session: _Session) -> None:
+    """Cierra el shell remoto y la conexión (errores ignorados: el host puede no estar)."""
+    try:
+        session.protocol.close_shell(session.shell_id)
+    except Exception:
+        pass
+    try:
+        session.protocol.transport.close_session()
+    except Exception:
+        pass
+
+
+def _evict_idle_locked(now: float) -> List[_Session]:
+    """Saca del pool las sesiones ociosas vencidas. Requiere _lock."""
+    expired = [s for s in _sessions if not s.busy and now - s.last_used > WINRM_POOL_IDLE_TIMEOUT]
+    for session in expired:
+        _sessions.remove(session)
+    _stats["closed_idle"] += len(expired)
+    return expired
+
+
+def _acquire(address: str, credentials: WinRMCredentials) -> Tuple[_Session, bool]:
+    """
+    Toma una sesión libre para el host o abre una nueva.
+
+    Returns:
+        Tupla (sesión, pooled). pooled=False si el pool estaba lleno de
+        sesiones ocupadas: la sesión se cierra al liberarla.
+    """
+    key = _session_key(address, credentials)
+    with _lock:
+        to_close = _evict_idle_locked(time.time())
+        session = next((s for s in _sessions if s.key == key and not s.busy), None)
+        if session:
+            session.busy = True
+            session.uses += 1
+            _stats["reused"] += 1
+        elif len(_sessions) >= WINRM_POOL_MAX_SESSIONS:
+            idle = [s for s in _sessions if not s.busy]
+            if idle:
+                oldest = min(idle, key=lambda s: s.last_used)
+                _sessions.remove(oldest)
+                to_close.append(oldest)
+    for expired in to_close:
+        _close_session(expired)
+    if session:
+        return session, True
+
+    session = _open_session(address, credentials)
+    session.busy = True
+    session.uses = 1
+    with _lock:
+        _stats["created"] += 1
+        pooled = len(_sessions) < WINRM_POOL_MAX_SESSIONS
+        if pooled:
+            _sessions.append(session)
+        else:
+            _stats["overflow"] += 1
+    return session, pooled
+
+
+def _release(session: _Session, pooled: bool, healthy: bool) -> None:
+    """Devuelve una sesión al pool (o la cierra si falló o no estaba en el pool)."""
+    with _lock:
+        session.busy = False
+        session.last_used = time.time()
+        keep = pooled and healthy
+        if not keep and session in _sessions:
+            _sessions.remove(session)
+        if not healthy:
+            _stats["discarded"] += 1
+    if not keep:
+        _close_session(session)
+
+
+def run_powershell(address: str, credentials: WinRMCredentials, script: str) -> Tuple[int, str, str]:
+    """
+    Ejecuta un script de PowerShell en el host usando una sesión del pool.
+
+    Si una sesión reutilizada falló (shell vencido en el servidor, conexión
+    cortada) se descarta y se reintenta una vez con una sesión nueva.
+
+    Args:
+        address: IP o hostname al que conectar
+        credentials: Credenciales WinRM
+        script: Script de PowerShell
+
+    Returns:
+        Tupla (returncode, stdout, stderr)
+
+    Raises:
+        RuntimeError: Si pywinrm no está instalado
+        Exception: Errores de conexión/autenticación de pywinrm o requests
+    """
+    if not is_pool_available():
+        raise RuntimeError("pywinrm no está instalado")
+    encoded = b64encode(script.encode("utf_16_le")).decode("ascii")
+    for attempt in (1, 2):
+        session, pooled = _acquire(address, credentials)
+        try:
+            command_id = session.protocol.run_command(
+                session.shell_id, "powershell", ["-NoProfile", "-NonInteractive", "-EncodedCommand", encoded]
+            )
+            try:
+                stdout, stderr, returncode = session.protocol.get_command_output(session.shell_id, command_id)
+            finally:
+                session.protocol.cleanup_command(session.shell_id, command_id)
+        except Exception as e:
+            _release(session, pooled, healthy=False)
+            if session.uses > 1 and attempt == 1:
+                logger.info(f"Sesión WinRM reutilizada con {address} falló ({e}), reintentando con una nueva")
+                continue
+            raise
+        _release(session, pooled, healthy=True)
+        return returncode, stdout.decode("utf-8", errors="replace"), stderr.decode("utf-8", errors="replace")
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Contadores del pool.
+
+    Returns:
+        Diccionario con sesiones abiertas/ocupadas, creadas, reutilizadas,
+        cerradas por inactividad, descartadas por error, fuera del pool y
+        la tasa de reutilización (0 a 1)
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["open"] = len(_sessions)
+        stats["busy"] = sum(1 for s in _sessions if s.busy)
+    total = stats["created"] + stats["reused"]
+    stats["reuse_rate"] = stats["reused"] / total if total else 0.0
+    return stats
+
+
+def close_all_sessions() -> None:
+    """Cierra todas las sesiones libres del pool (al salir de la aplicación)."""
+    with _lock:
+        idle = [s for s in _sessions if not s.busy]
+        for session in idle:
+            _sessions.remove(session)
+    for session in idle:
+        _close_session(session)
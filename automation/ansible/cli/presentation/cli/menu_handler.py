@@ -35,6 +35,7 @@ from ..display.admin_formatters import (
     mostrar_ad_info,
     mostrar_audit_groups_resultado
 )
+from ...infrastructure.ansible.fact_store import FACT_PLAYBOOKS, get_facts
 from ...infrastructure.logging.debug_logger import debug_logger
 
 
@@ -87,6 +88,12 @@ def ejecutar_opcion(
         console.print("[yellow]Operación cancelada[/yellow]")
         return
     
+    # Datos vigentes en el fact store: ofrecer usarlos o volver a consultar
+    force_refresh = _solicitar_refresco(opcion, targets)
+    if force_refresh is None:
+        console.print("[yellow]Operación cancelada[/yellow]")
+        return
+    
     # Verificar si puede ejecutarse en nueva ventana
     can_new_window = False
     try:
@@ -107,7 +114,8 @@ def ejecutar_opcion(
         targets=targets,
         vault_password=vault_password,
         extra_vars=extra_vars,
-        execution_mode=execution_mode
+        execution_mode=execution_mode,
+        force_refresh=force_refresh
     )
     
     # Mostrar resultados
@@ -150,6 +158,31 @@ def _solicitar_extra_vars(opcion: MenuOption) -> Optional[Dict[str, str]]:
     return preparar_extra_vars(opcion, user_input)
 
 
+def _solicitar_refresco(opcion: MenuOption, targets: List[str]) -> Optional[bool]:
+    """
+    Pregunta si usar los datos guardados en el fact store o volver a consultarlos.
+    
+    Returns:
+        True para consultar los equipos, False para usar los datos guardados,
+        None si el usuario canceló
+    """
+    kind = FACT_PLAYBOOKS.get(opcion.playbook)
+    if not kind or not opcion.requires_hostname:
+        return False
+    ages = [record.age for record in (get_facts(t, kind) for t in targets if t) if record]
+    if not ages:
+        return False
+    
+    if len(targets) == 1:
+        message = f"Hay datos guardados de hace {int(ages[0] // 60)} min. ¿Usarlos?"
+    else:
+        message = f"{len(ages)} de {len(targets)} equipos tienen datos guardados. ¿Usarlos?"
+    use_cached = questionary.confirm(message, style=CUSTOM_STYLE, default=True).ask()
+    if use_cached is None:
+        return None
+    return not use_cached
+
+
 def _confirmar_ejecucion(opcion: MenuOption, targets: List[str]) -> bool:
     """Confirma la ejecución si no es read-only."""
     if opcion.action_type == "read-only":
@@ -172,9 +205,15 @@ def _mostrar_resultados(
     execution_mode: str
 ):
     """Muestra los resultados según el tipo de opción."""
-    if execution_mode == "background":
+    if execution_mode in ("background", "batch"):
+        from cli.task_scheduler import get_scheduler_stats
         active_count = len(targets)
-        console.print(f"\n[green]✅ {active_count} tarea(s) iniciada(s) en segundo plano[/green]")
+        stats = get_scheduler_stats()
+        console.print(f"\n[green]✅ {active_count} tarea(s) encolada(s) en segundo plano[/green]")
+        console.print(
+            f"[dim]Scheduler: {stats['running']}/{stats['workers']} trabajos en ejecución, "
+            f"{stats['queued']} en cola[/dim]"
+        )
         console.print(f"[dim]Monitoreando {active_count} equipo(s): {', '.join(targets)}[/dim]\n")
         return
     
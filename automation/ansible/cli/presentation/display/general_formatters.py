@@ -13,7 +13,7 @@ from typing import List
 from rich.panel import Panel
 
 from ...shared.config import BASE_DIR, console, logger
-from ...domain.models import ExecutionResult, HostSnapshot
+from ...domain.models import ExecutionResult, HistoryAggregate, HostSnapshot
 
 
 def mostrar_host_snapshot(snapshot: HostSnapshot):
@@ -30,6 +30,7 @@ def mostrar_host_snapshot(snapshot: HostSnapshot):
     console.print(Panel(
         content,
         title=f"📍 {snapshot.hostname}",
+        subtitle=f"[dim]datos de las {datetime.fromtimestamp(snapshot.cached_at):%H:%M}[/dim]" if snapshot.cached_at else None,
         border_style="blue",
         title_align="left"
     ))
@@ -107,16 +108,16 @@ def mostrar_dashboard_ejecucion(result: ExecutionResult, tarea: str):
     console.print(f"\n[dim]📊 {tarea}: {estado} en {duracion}[/dim]\n")
 
 
-def mostrar_historial_sesion(entries: List):
-    """Muestra el historial completo de la sesión en una tabla."""
+def mostrar_historial_sesion(entries: List, titulo: str = "📜 Historial de Ejecuciones"):
+    """Muestra las ejecuciones del historial en una tabla."""
     if not entries:
-        console.print("\n[yellow]No hay tareas registradas en esta sesión.[/yellow]\n")
+        console.print("\n[yellow]No hay ejecuciones registradas en el historial.[/yellow]\n")
         return
 
     from rich.table import Table
     from rich import box
     
-    table = Table(title="📜 Historial de Ejecuciones (Sesión Actual)", box=box.ROUNDED, show_lines=True)
+    table = Table(title=titulo, box=box.ROUNDED, show_lines=True)
     table.add_column("Hora", style="dim")
     table.add_column("Host", style="cyan")
     table.add_column("Tarea", style="white")
@@ -138,6 +139,48 @@ def mostrar_historial_sesion(entries: List):
     console.print("\n")
 
 
+# Encabezado de la columna de grupo según la agrupación de las métricas
+_GROUP_TITLES = {"option_key": "Opción", "hostname": "Host", "site": "Sitio", "day": "Día"}
+
+
+def mostrar_metricas_historial(
+    aggregates: List[HistoryAggregate],
+    group_by: str = "option_key",
+    titulo: str = "📈 Métricas del Historial"
+):
+    """Muestra métricas agregadas del historial (ejecuciones, fallas, duraciones, último éxito)."""
+    if not aggregates:
+        console.print("\n[yellow]No hay ejecuciones que cumplan los filtros.[/yellow]\n")
+        return
+
+    from rich.table import Table
+    from rich import box
+
+    table = Table(title=titulo, box=box.ROUNDED)
+    table.add_column(_GROUP_TITLES.get(group_by, "Grupo"), style="cyan")
+    table.add_column("Ejecuciones", justify="right")
+    table.add_column("Fallas", justify="right")
+    table.add_column("Promedio", justify="right", style="magenta")
+    table.add_column("p95", justify="right", style="magenta")
+    table.add_column("Máx.", justify="right", style="magenta")
+    table.add_column("Último OK", style="dim")
+
+    for agg in aggregates:
+        color = "red" if agg.failure_rate >= 0.5 else "yellow" if agg.failures else "green"
+        table.add_row(
+            agg.key,
+            str(agg.runs),
+            f"[{color}]{agg.failures} ({agg.failure_rate:.0%})[/{color}]",
+            f"{agg.avg_duration:.1f}s",
+            f"{agg.p95_duration:.1f}s" if agg.p95_duration is not None else "-",
+            f"{agg.max_duration:.1f}s",
+            datetime.fromtimestamp(agg.last_success_at).strftime("%d/%m %H:%M") if agg.last_success_at else "-"
+        )
+
+    console.print(table)
+    console.print("\n")
+
+
 def guardar_reporte(hostname: str):
     """Guarda el contenido actual de la consola en un archivo HTML."""
     (BASE_DIR / "reports").mkdir(exist_ok=True)
@@ -9,6 +9,7 @@ auditoría de salud, métricas y health checks.
 """
 
 import json
+from datetime import datetime
 from rich.table import Table
 from rich import box
 
@@ -86,6 +87,9 @@ def mostrar_specs_tabla(result: ExecutionResult, hostname: str):
         mostrar_resultado(result, f"Especificaciones - {hostname}")
         return
     
+    if result.cached_at:
+        table.caption = f"Datos guardados el {datetime.fromtimestamp(result.cached_at):%d/%m %H:%M}"
+    
     if rows_added > 0:
         console.print(table)
     else:
@@ -8,13 +8,18 @@ Contiene:
 - solicitar_hostname(): Pide el hostname al usuario
 - solicitar_vault_password(): Pide la password del vault
 - interactive_confirm(): Confirmación rápida sí/no
+- solicitar_tarea_a_cancelar(): Elige una tarea activa para cancelar
+- solicitar_filtros_historial(): Filtros y agrupación de la vista de historial
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 import questionary
 
 from .shared.config import console, CUSTOM_STYLE
 
+# Targets que se listan antes de confirmar una ejecución múltiple
+TARGETS_PREVIEW = 20
+
 
 def solicitar_hostname() -> Optional[str]:
     """
@@ -39,14 +44,17 @@ def solicitar_vault_password() -> Optional[str]:
     """
     Solicita la master password del Ansible Vault.
     
-    Si existe el archivo .vault_pass, ofrece usarlo automáticamente.
+    Si existe el archivo .vault_pass, ofrece usarlo automáticamente. Las
+    variables descifradas con la password anterior se descartan.
     
     Returns:
         str: La password ingresada o None si cancela/omite
     """
     from pathlib import Path
     from .shared.config import BASE_DIR
+    from .infrastructure.ansible.vault_manager import clear_vault_cache
     
+    clear_vault_cache()
     vault_pass_file = BASE_DIR / ".vault_pass"
     
     # Si existe .vault_pass, ofrecer usarlo automáticamente
@@ -111,8 +119,11 @@ def solicitar_targets() -> Optional[List[str]]:
     """
     Solicita uno o más hostnames al usuario.
     
+    Para múltiples equipos acepta una expresión de targets (archivos, CSV,
+    OUs, redes, globs; ver expandir_targets_use_case).
+    
     Returns:
-        List[str]: Lista de hostnames (en mayúsculas) o None si cancela
+        List[str]: Lista de hostnames canónicos o None si cancela
     """
     # Preguntar si quiere ejecutar en uno o múltiples equipos
     mode_choice = questionary.select(
@@ -133,40 +144,44 @@ def solicitar_targets() -> Optional[List[str]]:
         hostname = solicitar_hostname()
         return [hostname] if hostname else None
     else:
-        # Múltiples equipos
-        console.print("\n[dim]Ingresa los hostnames separados por comas, espacios o uno por línea.[/dim]")
-        console.print("[dim]Presiona Enter en una línea vacía para terminar.[/dim]\n")
+        # Múltiples equipos: expresión de targets (ver use_cases/expandir_targets.py)
+        console.print("\n[dim]Hostnames separados por comas o espacios, o bien:[/dim]")
+        console.print("[dim]  CIT-NB-*   @archivo.txt   csv:archivo.csv:Columna   ou:OU=...,DC=...   cidr:10.1.0.0/22[/dim]")
+        console.print("[dim]  &término intersecta y !término excluye (ej: CIT-NB-* !@baja.txt)[/dim]\n")
         
         targets_input = questionary.text(
-            "Hostnames (separados por comas o espacios):",
+            "Targets:",
             style=CUSTOM_STYLE
         ).ask()
         
         if targets_input is None or not targets_input.strip():
             return None
         
-        # Parsear hostnames (soporta comas, espacios, y múltiples líneas)
-        targets = []
-        for line in targets_input.split('\n'):
-            # Separar por comas y espacios
-            line_targets = [t.strip().upper() for t in line.replace(',', ' ').split() if t.strip()]
-            targets.extend(line_targets)
+        from .application.use_cases.expandir_targets import expandir_targets_use_case
+        from .shared.exceptions import ValidationError
+        try:
+            expansion = expandir_targets_use_case(targets_input)
+        except ValidationError as e:
+            console.print(f"[red]{e}[/red]")
+            return None
         
-        # Eliminar duplicados manteniendo orden
-        seen = set()
-        unique_targets = []
-        for target in targets:
-            if target not in seen:
-                seen.add(target)
-                unique_targets.append(target)
+        if expansion.invalid:
+            console.print(f"[yellow]Descartados (no son hostnames válidos): {', '.join(expansion.invalid[:10])}[/yellow]")
+        if expansion.unmatched:
+            console.print(f"[yellow]Sin coincidencias: {', '.join(expansion.unmatched)}[/yellow]")
+            if not expansion.directory_size:
+                console.print("[dim]No hay cache del directorio para globs, ou: y cidr: (ver ITOPS_DIRECTORY_FILE)[/dim]")
+        unique_targets = expansion.hosts
         
         if not unique_targets:
             console.print("[yellow]No se ingresaron hostnames válidos[/yellow]")
             return None
         
         console.print(f"\n[green]Se ejecutará en {len(unique_targets)} equipo(s):[/green]")
-        for target in unique_targets:
+        for target in unique_targets[:TARGETS_PREVIEW]:
             console.print(f"  • {target}")
+        if len(unique_targets) > TARGETS_PREVIEW:
+            console.print(f"  [dim]... y {len(unique_targets) - TARGETS_PREVIEW} más[/dim]")
         
         confirm = questionary.confirm(
             "¿Continuar?",
@@ -175,3 +190,109 @@ def solicitar_targets() -> Optional[List[str]]:
         ).ask()
         
         return unique_targets if confirm else None
+
+
+def solicitar_tarea_a_cancelar(active_tasks: list) -> Optional[str]:
+    """
+    Ofrece cancelar una de las tareas en cola o en ejecución.
+    
+    Args:
+        active_tasks: Lista de TaskStatus activas
+        
+    Returns:
+        str: task_id elegido o None si no quiere cancelar ninguna
+    """
+    if not active_tasks:
+        return None
+    
+    choices = [
+        questionary.Choice(
+            f"[{task.status}] {task.task_name} → {task.target} ({task.task_id})",
+            value=task.task_id
+        )
+        for task in active_tasks
+    ]
+    # Con value=None questionary devuelve el título ("Volver") como valor
+    choices.append(questionary.Choice("Volver", value=""))
+    
+    task_id = questionary.select(
+        "¿Cancelar alguna tarea activa?",
+        choices=choices,
+        style=CUSTOM_STYLE
+    ).ask()
+    
+    if task_id and interactive_confirm(f"¿Cancelar la tarea {task_id}?", default=False):
+        return task_id
+    return None
+
+
+def solicitar_filtros_historial() -> Optional[Dict[str, Any]]:
+    """
+    Pide los filtros de la vista de historial.
+
+    Returns:
+        Dict con hostname, option_key, days, success y group_by (None = sin filtro),
+        {} para ver las últimas ejecuciones sin filtros, o None si cancela
+    """
+    mode = questionary.select(
+        "Historial:",
+        choices=[
+            questionary.Choice("Últimas ejecuciones", value="recent"),
+            questionary.Choice("Filtrar y ver métricas", value="filter"),
+        ],
+        style=CUSTOM_STYLE
+    ).ask()
+    if mode is None:
+        return None
+    if mode == "recent":
+        return {}
+
+    hostname = questionary.text("Host (Enter = todos):", style=CUSTOM_STYLE).ask()
+    if hostname is None:
+        return None
+    option_key = questionary.text("Opción del menú, ej: H1 (Enter = todas):", style=CUSTOM_STYLE).ask()
+    if option_key is None:
+        return None
+    days = questionary.select(
+        "Período:",
+        choices=[
+            questionary.Choice("Hoy", value=1),
+            questionary.Choice("Últimos 7 días", value=7),
+            questionary.Choice("Últimos 30 días", value=30),
+            questionary.Choice("Todo", value=0),
+        ],
+        style=CUSTOM_STYLE
+    ).ask()
+    if days is None:
+        return None
+    success = questionary.select(
+        "Estado:",
+        choices=[
+            questionary.Choice("Todas", value="all"),
+            questionary.Choice("Solo fallidas", value=False),
+            questionary.Choice("Solo exitosas", value=True),
+        ],
+        style=CUSTOM_STYLE
+    ).ask()
+    if success is None:
+        return None
+    group_by = questionary.select(
+        "Agrupar métricas por:",
+        choices=[
+            questionary.Choice("Opción", value="option_key"),
+            questionary.Choice("Host", value="hostname"),
+            questionary.Choice("Sitio", value="site"),
+            questionary.Choice("Día", value="day"),
+        ],
+        style=CUSTOM_STYLE
+    ).ask()
+    if group_by is None:
+        return None
+
+    return {
+        "hostname": hostname.strip().upper() or None,
+        "option_key": option_key.strip().upper() or None,
+        "days": days or None,
+        "success": None if success == "all" else success,
+        "group_by": group_by,
+    }
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+shared/cancellation.py
+======================
+Tokens de cancelación para ejecuciones en segundo plano.
+
+El scheduler activa un CancelToken en el hilo que ejecuta cada trabajo; el
+código de más abajo (ejecutores de playbooks) registra en el token activo cómo
+detener lo que está haciendo (matar el grupo de procesos, borrar archivos
+temporales). task_manager.cancel_task() dispara el token.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import logger
+
+# Token activo del hilo actual
+_local = threading.local()
+
+# Segundos que se espera tras SIGTERM antes de forzar SIGKILL al grupo
+KILL_GRACE_SECONDS = 3.0
+
+
+class CancelToken:
+    """Señal de cancelación compartida por las tareas de un mismo trabajo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: List[Callable[[], None]] = []
+        self.cancelled = False
+
+    def add_handler(self, handler: Callable[[], None]) -> None:
+        """
+        Registra una acción de cancelación (se ejecuta ya si el token está cancelado).
+
+        Args:
+            handler: Función sin argumentos que detiene o limpia el trabajo
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._handlers.append(handler)
+                return
+        self._run(handler)
+
+    def remove_handler(self, handler: Callable[[], None]) -> None:
+        """Quita una acción registrada (el trabajo terminó por su cuenta)."""
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+    def cancel(self) -> None:
+        """Marca el token como cancelado y ejecuta las acciones registradas."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            handlers, self._handlers = self._handlers, []
+        for handler in reversed(handlers):
+            self._run(handler)
+
+    @staticmethod
+    def _run(handler: Callable[[], None]) -> None:
+        try:
+            handler()
+        except Exception as e:
+            logger.warning(f"Error ejecutando acción de cancelación: {e}")
+
+
+def current_token() -> Optional[CancelToken]:
+    """
+    Token activo en el hilo actual.
+
+    Returns:
+        CancelToken o None si el código no corre dentro de un trabajo cancelable
+    """
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def activate(token: CancelToken) -> Iterator[CancelToken]:
+    """Activa un token en el hilo actual durante el bloque."""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+@contextmanager
+def on_cancel(handler: Callable[[], None]) -> Iterator[None]:
+    """
+    Registra una acción en el token activo durante el bloque (no hace nada sin token).
+
+    Args:
+        handler: Función sin argumentos que detiene o limpia el trabajo
+    """
+    token = current_token()
+    if token is None:
+        yield
+        return
+    token.add_handler(handler)
+    try:
+        yield
+    finally:
+        token.remove_handler(handler)
+
+
+def process_group_kwargs() -> Dict[str, Any]:
+    """
+    Argumentos de Popen para lanzar un proceso en su propio grupo.
+
+    Así se pueden matar también sus hijos (forks de Ansible) y Ctrl+C en el
+    menú no deja procesos huérfanos a medias.
+
+    Returns:
+        Dict con start_new_session (POSIX) o creationflags (Windows)
+    """
+    if os.name == "posix":
+        return {"start_new_session": True}
+    return {"creationflags": getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)}
+
+
+def _descendants(pid: int) -> List[int]:
+    """
+    PIDs de todos los descendientes de un proceso (vacío si no hay /proc).
+
+    Los workers de ansible-core >= 2.19 hacen setsid(): salen del grupo del
+    ansible-playbook y killpg() no los alcanza.
+    """
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # El nombre del proceso va entre paréntesis y puede contener espacios
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    found: List[int] = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def _kill_all(pids: List[int]) -> None:
+    """SIGKILL a cada proceso y a su grupo (los que hicieron setsid() lideran el suyo)."""
+    for pid in pids:
+        for kill in (os.killpg, os.kill):
+            try:
+                kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+
+def kill_process_tree(pid: int) -> None:
+    """
+    Mata con SIGKILL el grupo de un proceso líder y todos sus descendientes.
+
+    Los descendientes se buscan antes de matar al líder: después quedan
+    huérfanos (ppid 1) y ya no se pueden asociar al trabajo.
+
+    Args:
+        pid: Proceso líder de su grupo (lanzado con process_group_kwargs() o setsid())
+    """
+    _kill_all([pid] + _descendants(pid))
+
+
+def kill_process_group(proc: subprocess.Popen) -> None:
+    """
+    Termina un proceso lanzado con process_group_kwargs() y todos sus hijos.
+
+    Args:
+        proc: Proceso líder del grupo
+    """
+    if os.name != "posix":
+        if proc.poll() is None:
+            proc.kill()
+        return
+    descendants = _descendants(proc.pid)
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=KILL_GRACE_SECONDS)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        pass
+    # Workers que salieron del grupo con setsid() (ansible-core >= 2.19)
+    _kill_all([proc.pid] + descendants)
@@ -9,17 +9,21 @@ Contiene:
 - logger: Logger configurado
 - console: Instancia de Rich Console
 - CUSTOM_STYLE: Estilo personalizado para Questionary
+- Parámetros de ejecución (sobrescribibles con variables de entorno ITOPS_*)
 """
 
 import os
 import sys
 import logging
+from importlib.util import find_spec
 from pathlib import Path
 
-# Verificar dependencias
+# Verificar dependencias (questionary se importa recién al usar CUSTOM_STYLE:
+# el modo headless no lo carga)
 try:
-    from questionary import Style
     from rich.console import Console
+    if find_spec("questionary") is None:
+        raise ImportError("No module named 'questionary'")
 except ImportError as e:
     print(f"Error: Falta dependencia - {e}")
     print("Ejecutar: pip install -r requirements.txt")
@@ -35,6 +39,10 @@ else:
     # Ejecutando como script Python
     BASE_DIR = Path(__file__).parent.parent.parent.absolute()
 
+# Directorio desde el que se lanzó la aplicación (las rutas que escribe el
+# usuario, como archivos de targets, son relativas a este y no a BASE_DIR)
+INVOCATION_DIR = Path.cwd()
+
 os.chdir(BASE_DIR)
 
 # Crear directorios necesarios
@@ -53,8 +61,8 @@ logger = logging.getLogger(__name__)
 # Consola Rich global con soporte para grabación HTML
 console = Console(record=True, width=120)
 
-# Estilo personalizado para Questionary
-CUSTOM_STYLE = Style([
+# Estilo personalizado para Questionary (CUSTOM_STYLE, se crea al primer uso)
+_CUSTOM_STYLE_RULES = [
     ('qmark', 'fg:cyan bold'),
     ('question', 'fg:white bold'),
     ('answer', 'fg:green bold'),
@@ -63,4 +71,105 @@ CUSTOM_STYLE = Style([
     ('selected', 'fg:green'),
     ('separator', 'fg:gray'),
     ('instruction', 'fg:gray'),
-])
+]
+
+
+def __getattr__(name):
+    if name == "CUSTOM_STYLE":
+        from questionary import Style
+        globals()["CUSTOM_STYLE"] = style = Style(_CUSTOM_STYLE_RULES)
+        return style
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ============================================================================
+# Parámetros de ejecución (sobrescribibles con variables de entorno)
+# ============================================================================
+# Backend de ejecución de playbooks:
+#   "subprocess" -> un proceso ansible-playbook por ejecución (por defecto)
+#   "api"        -> worker residente que usa la API Python de Ansible
+#   "forkserver" -> servidor precargado (iniciado por app.py) que hace fork por trabajo
+EXECUTION_BACKEND = os.environ.get("ITOPS_EXECUTION_BACKEND", "subprocess").strip().lower()
+
+# Timeout máximo de un playbook (segundos)
+PLAYBOOK_TIMEOUT = int(os.environ.get("ITOPS_PLAYBOOK_TIMEOUT", "1200"))
+
+# Paralelismo máximo (forks) de una corrida batch multi-host
+BATCH_MAX_FORKS = int(os.environ.get("ITOPS_BATCH_MAX_FORKS", "50"))
+
+# Scheduler de tareas en segundo plano: workers simultáneos y tamaño máximo de la cola
+MAX_CONCURRENT_TASKS = int(os.environ.get("ITOPS_MAX_CONCURRENT_TASKS", "5"))
+MAX_QUEUED_TASKS = int(os.environ.get("ITOPS_MAX_QUEUED_TASKS", "1000"))
+
+# Callback de stdout de Ansible: un evento JSON por línea (plugins/callback/itops_jsonl.py)
+STDOUT_CALLBACK = "itops_jsonl"
+CALLBACK_PLUGINS_DIR = BASE_DIR / "plugins" / "callback"
+
+# Inventario en memoria (plugins/inventory/itops_targets.py): los targets viajan
+# en la variable de entorno INVENTORY_ENV_VAR; por encima de MAX_INVENTORY_PAYLOAD
+# bytes (límite de una variable de entorno en exec) se usa un INI temporal
+INVENTORY_PLUGINS_DIR = BASE_DIR / "plugins" / "inventory"
+TARGETS_INVENTORY = BASE_DIR / "inventory" / "itops_targets.yml"
+INVENTORY_ENV_VAR = "ITOPS_INVENTORY"
+MAX_INVENTORY_PAYLOAD = 100_000
+
+# Presupuesto en segundos del probe de un host (health check y snapshot); los
+# timeouts WS-Man del pool de sesiones WinRM se derivan de este valor
+PROBE_TIMEOUT = int(os.environ.get("ITOPS_PROBE_TIMEOUT", "20"))
+
+# Pool de sesiones WinRM (health check y snapshot): máximo de sesiones abiertas
+# y segundos sin uso tras los que una sesión se cierra
+WINRM_POOL_MAX_SESSIONS = int(os.environ.get("ITOPS_WINRM_POOL_MAX_SESSIONS", "20"))
+WINRM_POOL_IDLE_TIMEOUT = int(os.environ.get("ITOPS_WINRM_POOL_IDLE_TIMEOUT", "300"))
+
+# Preflight WinRM de las corridas batch: hosts probados a la vez, timeout por
+# conexión (segundos) y si se omiten los hosts sin WinRM antes de ejecutar
+PREFLIGHT_CONCURRENCY = int(os.environ.get("ITOPS_PREFLIGHT_CONCURRENCY", "200"))
+PREFLIGHT_TIMEOUT = float(os.environ.get("ITOPS_PREFLIGHT_TIMEOUT", "3"))
+BATCH_PREFLIGHT = os.environ.get("ITOPS_BATCH_PREFLIGHT", "1").strip().lower() not in ("0", "false", "no")
+
+# Cache de alcanzabilidad: segundos que vale un host online y backoff de los
+# offline (se duplica con cada falla consecutiva hasta el máximo)
+REACHABILITY_TTL = int(os.environ.get("ITOPS_REACHABILITY_TTL", "300"))
+REACHABILITY_BACKOFF_BASE = int(os.environ.get("ITOPS_REACHABILITY_BACKOFF_BASE", "60"))
+REACHABILITY_BACKOFF_MAX = int(os.environ.get("ITOPS_REACHABILITY_BACKOFF_MAX", "3600"))
+
+# Cache de DNS: segundos que vale una resolución exitosa y una fallida (o que
+# apunta a localhost); consultas simultáneas del resolver masivo de los batch
+DNS_CACHE_TTL = int(os.environ.get("ITOPS_DNS_CACHE_TTL", "300"))
+DNS_NEGATIVE_TTL = int(os.environ.get("ITOPS_DNS_NEGATIVE_TTL", "60"))
+DNS_RESOLVE_CONCURRENCY = int(os.environ.get("ITOPS_DNS_RESOLVE_CONCURRENCY", "64"))
+
+# Fact store (.cache/facts): segundos que valen los resultados de specs e
+# inventario unificado por host (como fact_caching_timeout de ansible.cfg) y
+# los del snapshot rápido (usuario logueado y disco cambian más seguido)
+FACT_STORE_TTL = int(os.environ.get("ITOPS_FACT_STORE_TTL", "86400"))
+SNAPSHOT_TTL = int(os.environ.get("ITOPS_SNAPSHOT_TTL", "300"))
+
+# Historial de ejecuciones (SQLite en modo WAL): archivo, filas por transacción
+# y segundos máximos que una ejecución espera en memoria antes de escribirse
+HISTORY_DB = Path(os.environ.get("ITOPS_HISTORY_DB", str(BASE_DIR / "data" / "history.db")))
+HISTORY_BATCH_SIZE = int(os.environ.get("ITOPS_HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("ITOPS_HISTORY_FLUSH_INTERVAL", "2"))
+
+# Sitio de un host para las métricas del historial: regex cuyo primer grupo es
+# el sitio (por defecto, el prefijo del hostname antes del primer guion)
+HISTORY_SITE_PATTERN = os.environ.get("ITOPS_HISTORY_SITE_PATTERN", r"^([^-]+)-")
+
+# Tareas terminadas que el panel y el dashboard conservan en memoria (buffer
+# circular: al llenarse se descarta la más vieja; su resultado ya está en el
+# historial) y caracteres de error que se guardan por tarea
+TASK_HISTORY_SIZE = int(os.environ.get("ITOPS_TASK_HISTORY_SIZE", "500"))
+TASK_ERROR_MAX_CHARS = int(os.environ.get("ITOPS_TASK_ERROR_MAX_CHARS", "300"))
+
+# Blob store de salidas crudas (stdout y JSON de los playbooks, comprimidos y
+# deduplicados por hash): directorio, tamaño a partir del cual un resultado se
+# descarga a disco y días que se conserva un blob sin usar
+BLOB_DIR = Path(os.environ.get("ITOPS_BLOB_DIR", str(BASE_DIR / "data" / "blobs")))
+BLOB_SPILL_THRESHOLD = int(os.environ.get("ITOPS_BLOB_SPILL_THRESHOLD", "65536"))
+BLOB_RETENTION_DAYS = int(os.environ.get("ITOPS_BLOB_RETENTION_DAYS", "14"))
+
+# Cache local del directorio (AD) para expandir targets por OU, glob o rango de
+# red: export de Get-ADComputer en CSV o JSON (Name, DNSHostName,
+# DistinguishedName, IPv4Address, Enabled); se vuelve a leer cuando cambia
+DIRECTORY_FILE = Path(os.environ.get("ITOPS_DIRECTORY_FILE", str(BASE_DIR / "data" / "ad_computers.csv")))
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+shared/event_bus.py
+===================
+Bus de eventos (pub/sub) del ciclo de vida de las tareas.
+
+task_manager publica un evento en cada cambio de estado (queued, started,
+finished, cancelled) y el ejecutor de playbooks publica progress mientras un
+trabajo del scheduler corre (inicio de cada tarea de Ansible y resultado por
+host). El panel de tareas se suscribe para redibujar solo cuando algo cambió;
+cualquier otro consumidor (historial, exportador de métricas) puede
+suscribirse igual.
+
+Los callbacks corren en el hilo que publica, fuera de cualquier lock, y deben
+ser rápidos: un consumidor lento debería usar subscribe_queue y atender la
+cola en su propio hilo.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .config import logger
+
+# Tipos de evento
+EVENT_QUEUED = "queued"
+EVENT_STARTED = "started"
+EVENT_PROGRESS = "progress"
+EVENT_FINISHED = "finished"
+EVENT_CANCELLED = "cancelled"
+
+# Cambios de estado de una tarea (todo menos progress)
+LIFECYCLE_EVENTS = frozenset((EVENT_QUEUED, EVENT_STARTED, EVENT_FINISHED, EVENT_CANCELLED))
+ALL_EVENTS = LIFECYCLE_EVENTS | {EVENT_PROGRESS}
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """
+    Evento del ciclo de vida de una o varias tareas.
+
+    Attributes:
+        kind: Tipo de evento (EVENT_*)
+        task_ids: Tareas afectadas (progress de un batch afecta a todas las del trabajo)
+        data: Detalle (status, duration, error, task, host...)
+        timestamp: Momento del evento
+    """
+    kind: str
+    task_ids: Tuple[str, ...]
+    data: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+Subscriber = Tuple[Callable[[TaskEvent], None], Optional[frozenset]]
+
+# Estado global del módulo (la tupla se reemplaza entera: publish la lee sin lock)
+_subscribers: Tuple[Subscriber, ...] = ()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def subscribe(
+    callback: Callable[[TaskEvent], None],
+    kinds: Optional[Iterable[str]] = None
+) -> Callable[[], None]:
+    """
+    Suscribe una función a los eventos.
+
+    Args:
+        callback: Recibe cada TaskEvent (en el hilo que lo publica)
+        kinds: Solo estos tipos de evento (None = todos)
+
+    Returns:
+        Función sin argumentos que cancela la suscripción
+    """
+    global _subscribers
+    entry = (callback, frozenset(kinds) if kinds is not None else None)
+    with _lock:
+        _subscribers = _subscribers + (entry,)
+
+    def unsubscribe() -> None:
+        global _subscribers
+        with _lock:
+            _subscribers = tuple(sub for sub in _subscribers if sub is not entry)
+
+    return unsubscribe
+
+
+def subscribe_queue(
+    kinds: Optional[Iterable[str]] = None,
+    maxsize: int = 10000
+) -> Tuple["queue.Queue", Callable[[], None]]:
+    """
+    Suscribe una cola, para consumidores que procesan los eventos en su propio hilo.
+
+    Si la cola se llena, los eventos nuevos se descartan (no se bloquea a quien publica).
+
+    Args:
+        kinds: Solo estos tipos de evento (None = todos)
+        maxsize: Capacidad de la cola
+
+    Returns:
+        (cola de TaskEvent, función que cancela la suscripción)
+    """
+    events: "queue.Queue" = queue.Queue(maxsize=maxsize)
+
+    def enqueue(event: TaskEvent) -> None:
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            pass
+
+    return events, subscribe(enqueue, kinds)
+
+
+def publish(kind: str, task_ids: Iterable[str], **data: Any) -> None:
+    """
+    Publica un evento a los suscriptores de su tipo.
+
+    Args:
+        kind: Tipo de evento (EVENT_*)
+        task_ids: Tareas afectadas
+        **data: Detalle del evento
+    """
+    subscribers = _subscribers
+    if not subscribers:
+        return
+    event = TaskEvent(kind, tuple(task_ids), data)
+    for callback, kinds in subscribers:
+        if kinds is not None and kind not in kinds:
+            continue
+        try:
+            callback(event)
+        except Exception as e:
+            logger.warning(f"Error en suscriptor de eventos ({kind}): {e}")
+
+
+@contextmanager
+def job_context(task_ids: Iterable[str]) -> Iterator[None]:
+    """Marca las tareas del trabajo que corre en el hilo actual (para publish_progress)."""
+    previous = getattr(_local, "task_ids", None)
+    _local.task_ids = tuple(task_ids)
+    try:
+        yield
+    finally:
+        _local.task_ids = previous
+
+
+def current_task_ids() -> Optional[Tuple[str, ...]]:
+    """
+    Tareas del trabajo que corre en el hilo actual.
+
+    Returns:
+        IDs de las tareas o None si el código no corre dentro de un trabajo del scheduler
+    """
+    return getattr(_local, "task_ids", None)
+
+
+def publish_progress(**data: Any) -> None:
+    """
+    Publica progreso del trabajo del hilo actual (no hace nada fuera de un trabajo).
+
+    Args:
+        **data: Detalle del progreso (ej: task, host, status)
+    """
+    task_ids = current_task_ids()
+    if task_ids:
+        publish(EVENT_PROGRESS, task_ids, **data)
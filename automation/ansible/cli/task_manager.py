@@ -3,41 +3,151 @@
 cli/task_manager.py
 ===================
 Gestor de tareas simultáneas con estado centralizado usando funciones.
+
+Las tareas activas (QUEUED/RUNNING) viven en un dict; al terminar pasan a un
+buffer circular de TASK_HISTORY_SIZE tareas, y al llenarse se descarta la más
+vieja. Una tarea terminada no conserva su ExecutionResult (el resultado ya
+quedó en el historial y la salida cruda grande en el blob store): solo el
+return code y los hashes de la salida. Los registros usan __slots__ y los
+nombres de tarea, host y playbook se internan, porque se repiten en miles
+de tareas de un batch.
+
+Cada cambio de estado actualiza en O(1) los índices por estado (dicts que
+conservan el orden en que cada tarea entró al estado), los contadores y el
+buffer de terminadas (ordenado por fin). Así el panel, que se redibuja dos
+veces por segundo, toma con get_panel_snapshot una foto consistente de las k
+filas que muestra sin recorrer todas las tareas.
+
+Cada cambio de estado se publica en el bus de eventos (shared/event_bus.py)
+después de soltar el lock.
 """
 
+import sys
 import threading
-from typing import Dict, List, Optional
-from datetime import datetime
+import time
+from collections import deque
 from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Any
+from datetime import datetime
 
 from .domain.models import ExecutionResult
+from .shared.cancellation import CancelToken
+from .shared.event_bus import (
+    publish, EVENT_QUEUED, EVENT_STARTED, EVENT_FINISHED, EVENT_CANCELLED
+)
+from .shared.config import TASK_HISTORY_SIZE, TASK_ERROR_MAX_CHARS
+from .infrastructure.persistence.blob_store import spill_result
 
 
-@dataclass
 class TaskStatus:
-    """Estado de una tarea activa"""
-    task_id: str
-    task_name: str
-    target: str  # Hostname o targets múltiples
-    playbook: str
-    status: str  # RUNNING, SUCCESS, FAILED, CANCELLED
-    start_time: datetime
-    end_time: Optional[datetime] = None
-    duration: float = 0.0
-    error: Optional[str] = None
-    result: Optional[ExecutionResult] = None
+    """Estado de una tarea (activa o terminada)."""
+
+    __slots__ = (
+        "task_id", "task_name", "target", "playbook", "status",
+        "started", "ended", "duration", "error", "returncode", "blobs",
+    )
+
+    def __init__(self, task_id: str, task_name: str, target: str, playbook: str, status: str):
+        self.task_id = task_id
+        self.task_name = sys.intern(task_name)
+        self.target = sys.intern(target)  # Hostname o targets múltiples
+        self.playbook = sys.intern(playbook or "")
+        self.status = status  # QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED
+        self.started = time.time()
+        self.ended: Optional[float] = None
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.returncode: Optional[int] = None
+        # Hashes en el blob store de la salida cruda descargada (stdout/data)
+        self.blobs: Optional[Dict[str, str]] = None
+
+    @property
+    def start_time(self) -> datetime:
+        return datetime.fromtimestamp(self.started)
 
+    @property
+    def end_time(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.ended) if self.ended else None
+
+    def finish(self, now: float) -> None:
+        """Registra el fin de la tarea (el estado lo cambia _set_status_locked)."""
+        self.ended = now
+        self.duration = now - self.started
+
+    def set_error(self, error: str) -> None:
+        """Guarda el error recortado (el completo queda en el historial)."""
+        error = error.strip()
+        self.error = error if len(error) <= TASK_ERROR_MAX_CHARS else error[:TASK_ERROR_MAX_CHARS] + "…"
+
+    def copy(self) -> "TaskStatus":
+        """Copia del registro (para leerlo fuera del lock sin que cambie)."""
+        clone = TaskStatus.__new__(TaskStatus)
+        for name in TaskStatus.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def __repr__(self) -> str:
+        return f"TaskStatus({self.task_id}, {self.task_name!r}, {self.target!r}, {self.status})"
+
+
+@dataclass
+class PanelSnapshot:
+    """Foto consistente de lo que muestra el panel de tareas."""
+    tasks: List[TaskStatus]  # Copias: en ejecución, en cola y terminadas (más recientes primero)
+    summary: Dict[str, int]
+
+
+# Estados que todavía no terminaron
+ACTIVE_STATUSES = ("QUEUED", "RUNNING")
+ALL_STATUSES = ("QUEUED", "RUNNING", "SUCCESS", "FAILED", "CANCELLED")
 
 # Estado global del módulo
-_tasks: Dict[str, TaskStatus] = {}
+_active: Dict[str, TaskStatus] = {}
+_by_status: Dict[str, Dict[str, TaskStatus]] = {status: {} for status in ACTIVE_STATUSES}
+_finished: Deque[TaskStatus] = deque()
+_finished_by_id: Dict[str, TaskStatus] = {}
+# Tareas por estado en la sesión (las terminadas incluyen las descartadas del buffer)
+_counts: Dict[str, int] = dict.fromkeys(ALL_STATUSES, 0)
+_tokens: Dict[str, CancelToken] = {}
+_evicted = 0
 _lock = threading.Lock()
 
 
+def _set_status_locked(task: TaskStatus, status: str) -> None:
+    """Cambia el estado de una tarea activa actualizando índices y contadores. Requiere _lock."""
+    if task.status in _by_status:
+        _by_status[task.status].pop(task.task_id, None)
+    _counts[task.status] -= 1
+    task.status = status
+    _counts[status] = _counts.get(status, 0) + 1
+    if status in _by_status:
+        _by_status[status][task.task_id] = task
+
+
+def _retire_locked(task: TaskStatus) -> None:
+    """Pasa una tarea terminada al buffer circular, descartando la más vieja si está lleno. Requiere _lock."""
+    global _evicted
+    _active.pop(task.task_id, None)
+    _tokens.pop(task.task_id, None)
+    while len(_finished) >= max(TASK_HISTORY_SIZE, 1):
+        oldest = _finished.popleft()
+        _finished_by_id.pop(oldest.task_id, None)
+        _evicted += 1
+    _finished.append(task)
+    _finished_by_id[task.task_id] = task
+
+
+def _get_locked(task_id: str) -> Optional[TaskStatus]:
+    return _active.get(task_id) or _finished_by_id.get(task_id)
+
+
 def add_task(
     task_id: str,
     task_name: str,
     target: str,
-    playbook: str
+    playbook: str,
+    status: str = "RUNNING"
 ) -> None:
     """
     Agregar una nueva tarea al tracking.
@@ -47,16 +157,33 @@ def add_task(
         task_name: Nombre de la tarea
         target: Hostname o targets múltiples
         playbook: Ruta del playbook
+        status: Estado inicial (RUNNING, o QUEUED si espera en el scheduler)
     """
+    task = TaskStatus(task_id, task_name, target, playbook, status)
     with _lock:
-        _tasks[task_id] = TaskStatus(
-            task_id=task_id,
-            task_name=task_name,
-            target=target,
-            playbook=playbook,
-            status="RUNNING",
-            start_time=datetime.now()
-        )
+        _active[task_id] = task
+        _by_status[status][task_id] = task
+        _counts[status] += 1
+    publish(
+        EVENT_QUEUED if status == "QUEUED" else EVENT_STARTED, (task_id,),
+        task_name=task.task_name, target=task.target, playbook=task.playbook
+    )
+
+
+def start_task(task_id: str) -> None:
+    """
+    Marcar una tarea encolada como RUNNING (el tiempo se mide desde aquí).
+    
+    Args:
+        task_id: ID de la tarea
+    """
+    with _lock:
+        task = _active.get(task_id)
+        if not task or task.status != "QUEUED":
+            return
+        task.started = time.time()
+        _set_status_locked(task, "RUNNING")
+    publish(EVENT_STARTED, (task_id,))
 
 
 def update_task(
@@ -68,48 +195,128 @@ def update_task(
     """
     Actualizar estado de una tarea.
     
+    Una tarea CANCELLED conserva ese estado aunque el trabajo termine después.
+    Al terminar, la tarea pasa al buffer de terminadas sin el ExecutionResult:
+    se guardan el return code y los hashes de la salida descargada al blob store.
+    
     Args:
         task_id: ID de la tarea
-        status: Nuevo estado (RUNNING, SUCCESS, FAILED, CANCELLED)
+        status: Nuevo estado (QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED)
         result: Resultado de la ejecución
         error: Mensaje de error si falló
     """
+    if result:
+        # Las salidas grandes quedan en disco; el panel solo necesita el estado
+        spill_result(result)
     with _lock:
-        if task_id in _tasks:
-            task = _tasks[task_id]
-            task.status = status
-            task.end_time = datetime.now()
-            if task.start_time:
-                task.duration = (task.end_time - task.start_time).total_seconds()
-            if result:
-                task.result = result
-            if error:
-                task.error = error
+        task = _active.get(task_id)
+        if task is None:
+            return
+        if status in ACTIVE_STATUSES:
+            _set_status_locked(task, status)
+            return
+        task.finish(time.time())
+        _set_status_locked(task, status)
+        if result:
+            task.returncode = result.returncode
+            if result.lazy_fields:
+                task.blobs = {name: ref.digest for name, ref in result.lazy_fields.items()}
+        if error:
+            task.set_error(error)
+        _retire_locked(task)
+    publish(
+        EVENT_CANCELLED if status == "CANCELLED" else EVENT_FINISHED, (task_id,),
+        status=status, duration=task.duration, returncode=task.returncode, error=task.error
+    )
+
+
+def bind_cancel_token(task_ids: List[str], token: CancelToken) -> None:
+    """
+    Asociar las tareas de un trabajo a su token de cancelación.
+    
+    Args:
+        task_ids: IDs de las tareas del trabajo (un batch comparte un token)
+        token: Token que el scheduler activa al ejecutar el trabajo
+    """
+    with _lock:
+        for task_id in task_ids:
+            _tokens[task_id] = token
+
+
+def cancel_task(task_id: str) -> List[str]:
+    """
+    Cancelar una tarea en cola o en ejecución.
+    
+    Una tarea en cola no llega a ejecutarse. En una en ejecución se dispara su
+    token: se mata el grupo de procesos de ansible-playbook y se borran sus
+    archivos temporales (inventario y password del vault), liberando el worker.
+    Las tareas que comparten el trabajo (batch) se cancelan juntas.
+    
+    Args:
+        task_id: ID de la tarea
+        
+    Returns:
+        IDs de las tareas canceladas (vacía si la tarea no estaba activa)
+    """
+    with _lock:
+        task = _active.get(task_id)
+        if not task:
+            return []
+        token = _tokens.get(task_id)
+        related = [tid for tid, tok in _tokens.items() if token is not None and tok is token] or [task_id]
+        now = time.time()
+        cancelled = []
+        for tid in related:
+            other = _active.get(tid)
+            if other:
+                other.finish(now)
+                _set_status_locked(other, "CANCELLED")
+                other.error = "Cancelada por el usuario"
+                _retire_locked(other)
+                cancelled.append(tid)
+            _tokens.pop(tid, None)
+    if cancelled:
+        publish(EVENT_CANCELLED, cancelled, status="CANCELLED")
+    if token is not None:
+        token.cancel()
+    return cancelled
+
+
+def cancel_all_tasks() -> List[str]:
+    """
+    Cancelar todas las tareas activas (al salir de la aplicación).
+    
+    Returns:
+        IDs de las tareas canceladas
+    """
+    with _lock:
+        active_ids = list(_active)
+    cancelled = []
+    for task_id in active_ids:
+        cancelled.extend(cancel_task(task_id))
+    return cancelled
 
 
 def get_active_tasks() -> List[TaskStatus]:
     """
-    Obtener todas las tareas activas (RUNNING).
+    Obtener todas las tareas activas (QUEUED o RUNNING).
     
     Returns:
-        Lista de tareas con estado RUNNING
+        Lista de tareas que todavía no terminaron
     """
     with _lock:
-        return [
-            task for task in _tasks.values()
-            if task.status == "RUNNING"
-        ]
+        return list(_by_status["RUNNING"].values()) + list(_by_status["QUEUED"].values())
 
 
 def get_all_tasks() -> List[TaskStatus]:
     """
-    Obtener todas las tareas.
+    Obtener todas las tareas (las terminadas, solo las que siguen en el buffer).
     
     Returns:
-        Lista de todas las tareas
+        Lista de tareas: terminadas de la más vieja a la más nueva, luego las activas
     """
     with _lock:
-        return list(_tasks.values())
+        return list(_finished) + list(_active.values())
 
 
 def get_task(task_id: str) -> Optional[TaskStatus]:
@@ -123,29 +330,77 @@ def get_task(task_id: str) -> Optional[TaskStatus]:
         TaskStatus o None si no existe
     """
     with _lock:
-        return _tasks.get(task_id)
+        return _get_locked(task_id)
 
 
 def get_summary() -> Dict[str, int]:
     """
     Obtener resumen de tareas por estado.
     
+    Los estados terminados cuentan todas las tareas de la sesión, también
+    las que ya salieron del buffer de terminadas.
+    
     Returns:
         Diccionario con conteo por estado
     """
     with _lock:
-        summary = {"RUNNING": 0, "SUCCESS": 0, "FAILED": 0, "CANCELLED": 0}
-        for task in _tasks.values():
-            summary[task.status] = summary.get(task.status, 0) + 1
-        return summary
+        return dict(_counts)
+
+
+def get_panel_snapshot(max_tasks: int = 10, max_finished: int = 5) -> PanelSnapshot:
+    """
+    Tareas a mostrar en el panel y resumen, leídos juntos bajo el lock.
+    
+    Recorre solo las filas que devuelve: en ejecución y en cola (las que
+    empezaron o se encolaron más recientemente primero) y, si queda lugar,
+    las terminadas más recientes.
+    
+    Args:
+        max_tasks: Máximo de filas
+        max_finished: Máximo de tareas terminadas entre esas filas
+        
+    Returns:
+        PanelSnapshot con copias de las tareas y el resumen por estado
+    """
+    with _lock:
+        rows = list(islice(reversed(_by_status["RUNNING"].values()), max_tasks))
+        rows += islice(reversed(_by_status["QUEUED"].values()), max_tasks - len(rows))
+        rows += islice(reversed(_finished), min(max_finished, max_tasks - len(rows)))
+        return PanelSnapshot([task.copy() for task in rows], dict(_counts))
 
 
 def clear_completed() -> None:
     """Limpiar tareas completadas (SUCCESS, FAILED, CANCELLED)."""
-    global _tasks
     with _lock:
-        _tasks = {
-            task_id: task
-            for task_id, task in _tasks.items()
-            if task.status == "RUNNING"
-        }
+        _finished.clear()
+        _finished_by_id.clear()
+        for status in ALL_STATUSES:
+            if status not in ACTIVE_STATUSES:
+                _counts[status] = 0
+
+
+def get_memory_stats() -> Dict[str, Any]:
+    """
+    Uso de memoria del registro de tareas.
+    
+    Returns:
+        Dict con active, finished, capacity (TASK_HISTORY_SIZE), evicted
+        (tareas descartadas del buffer en la sesión) y approx_bytes
+    """
+    with _lock:
+        tasks = list(_finished) + list(_active.values())
+        active, finished, evicted = len(_active), len(_finished), _evicted
+    # Los nombres internados se comparten: se cuentan una sola vez
+    shared = {id(s): s for task in tasks for s in (task.task_name, task.target, task.playbook)}
+    approx = sum(
+        sys.getsizeof(task) + sys.getsizeof(task.task_id) + (sys.getsizeof(task.error) if task.error else 0)
+        + (sys.getsizeof(task.blobs) if task.blobs else 0)
+        for task in tasks
+    ) + sum(sys.getsizeof(s) for s in shared.values())
+    return {
+        "active": active,
+        "finished": finished,
+        "capacity": TASK_HISTORY_SIZE,
+        "evicted": evicted,
+        "approx_bytes": approx,
+    }
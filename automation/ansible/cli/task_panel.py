@@ -3,31 +3,45 @@
 cli/task_panel.py
 =================
 Panel lateral de seguimiento de tareas en tiempo real.
+
+Cada redibujo pide a task_manager una sola foto (get_panel_snapshot) con las
+filas a mostrar y el resumen, sin recorrer todas las tareas. El panel en vivo
+se redibuja solo cuando el bus de eventos avisa un cambio de estado.
 """
 
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 from rich.panel import Panel
 from rich.table import Table
 from rich.layout import Layout
 from rich.live import Live
 from rich import box
 from rich.align import Align
+from rich.console import Group
 
 from .shared.config import console
+from .shared.event_bus import subscribe, LIFECYCLE_EVENTS
 from .task_manager import (
     get_summary as task_get_summary,
-    get_active_tasks as task_get_active_tasks,
-    get_all_tasks as task_get_all_tasks,
+    get_panel_snapshot as task_get_panel_snapshot,
     TaskStatus
 )
 
+# Filas del panel y cuántas pueden ser tareas terminadas
+PANEL_ROWS = 10
+PANEL_FINISHED_ROWS = 5
+
+# Máximo de redibujos por segundo del panel en vivo
+PANEL_MAX_RENDERS_PER_SECOND = 4
 
-def render_task_panel(tasks: List[TaskStatus]) -> Panel:
+
+def render_task_panel(tasks: List[TaskStatus], summary: Optional[Dict[str, int]] = None) -> Panel:
     """
     Renderiza el panel lateral con las tareas activas.
     
     Args:
         tasks: Lista de tareas a mostrar
+        summary: Conteo por estado (None = consultarlo a task_manager)
         
     Returns:
         Panel: Panel de Rich con la información de tareas
@@ -56,6 +70,8 @@ def render_task_panel(tasks: List[TaskStatus]) -> Panel:
         # Determinar icono y color según estado
         if task.status == "RUNNING":
             status_icon = "[yellow]●[/yellow]"
+        elif task.status == "QUEUED":
+            status_icon = "[blue]◌[/blue]"
         elif task.status == "SUCCESS":
             status_icon = "[green]✓[/green]"
         elif task.status == "FAILED":
@@ -73,15 +89,16 @@ def render_task_panel(tasks: List[TaskStatus]) -> Panel:
             f"[dim]{target}[/dim]"
         )
     
-    summary = task_get_summary()
+    if summary is None:
+        summary = task_get_summary()
     summary_text = (
         f"[green]✓ {summary['SUCCESS']}[/green] | "
         f"[yellow]● {summary['RUNNING']}[/yellow] | "
+        f"[blue]◌ {summary['QUEUED']}[/blue] | "
         f"[red]✗ {summary['FAILED']}[/red]"
     )
     
-    content = table
-    content = f"{content}\n\n{summary_text}"
+    content = Group(table, "", summary_text)
     
     return Panel(
         content,
@@ -96,30 +113,38 @@ def show_task_panel_live(duration: Optional[float] = None) -> None:
     """
     Muestra el panel de tareas con actualización en tiempo real.
     
+    Solo se redibuja cuando llega un cambio de estado por el bus de eventos; los
+    eventos que llegan mientras tanto se juntan en un solo redibujo, como mucho
+    PANEL_MAX_RENDERS_PER_SECOND veces por segundo.
+    
     Args:
         duration: Duración en segundos para mostrar (None = hasta interrupción)
     """
     import time as time_module
     
-    start_time = time_module.time()
+    deadline = time_module.monotonic() + duration if duration else None
+    dirty = threading.Event()
+    unsubscribe = subscribe(lambda event: dirty.set(), LIFECYCLE_EVENTS)
     
-    def get_renderable():
-        active_tasks = task_get_active_tasks()
-        return render_task_panel(active_tasks)
+    def render():
+        snapshot = task_get_panel_snapshot(PANEL_ROWS, max_finished=0)
+        return render_task_panel(snapshot.tasks, snapshot.summary)
     
-    with Live(get_renderable(), refresh_per_second=2, console=console) as live:
-        while True:
-            if duration and (time_module.time() - start_time) >= duration:
-                break
-            
-            active_tasks = task_get_active_tasks()
-            if not active_tasks and duration:
-                # Si no hay tareas y hay duración, esperar un poco antes de salir
-                time_module.sleep(0.5)
-                continue
-            
-            live.update(get_renderable())
-            time_module.sleep(0.5)
+    try:
+        with Live(render(), auto_refresh=False, console=console) as live:
+            while True:
+                timeout = deadline - time_module.monotonic() if deadline else None
+                if timeout is not None and timeout <= 0:
+                    break
+                if not dirty.wait(timeout):
+                    continue
+                rendered_at = time_module.monotonic()
+                dirty.clear()
+                live.update(render(), refresh=True)
+                # Coalescing: los eventos de este intervalo se dibujan juntos en la próxima vuelta
+                time_module.sleep(max(0.0, 1 / PANEL_MAX_RENDERS_PER_SECOND - (time_module.monotonic() - rendered_at)))
+    finally:
+        unsubscribe()
 
 
 def get_task_panel() -> Panel:
@@ -129,15 +154,6 @@ def get_task_panel() -> Panel:
     Returns:
         Panel: Panel de tareas actualizado
     """
-    all_tasks = task_get_all_tasks()
-    # Mostrar solo las últimas 10 tareas (activas primero)
-    active_tasks = task_get_active_tasks()
-    completed_tasks = [t for t in all_tasks if t.status != "RUNNING"]
-    
-    # Ordenar: activas primero, luego completadas por tiempo (más recientes primero)
-    display_tasks = sorted(
-        active_tasks + completed_tasks[-5:],  # Mostrar 5 completadas recientes
-        key=lambda t: (t.status != "RUNNING", -(t.start_time.timestamp() if t.start_time else 0))
-    )
-    
-    return render_task_panel(display_tasks[:10])  # Máximo 10 tareas
+    # En ejecución, en cola y hasta 5 terminadas recientes (más recientes primero)
+    snapshot = task_get_panel_snapshot(PANEL_ROWS, PANEL_FINISHED_ROWS)
+    return render_task_panel(snapshot.tasks, snapshot.summary)
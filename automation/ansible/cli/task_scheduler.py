@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+cli/task_scheduler.py
+=====================
+Scheduler de tareas en segundo plano con pool de workers acotado.
+
+Las tareas se encolan (estado QUEUED en task_manager) en una cola con
+prioridad, FIFO dentro de cada prioridad, y un número fijo de workers las
+ejecuta. Encolar nunca bloquea: si la cola está llena la tarea se rechaza y
+queda FAILED (backpressure sin congelar el menú).
+
+Cada trabajo lleva un CancelToken que se activa en el hilo del worker mientras
+corre; los trabajos cancelados en cola se descartan al llegar su turno. Sus
+tareas quedan marcadas en el hilo (event_bus.job_context) para que el ejecutor
+publique el progreso del trabajo.
+"""
+
+import itertools
+import queue
+import threading
+from typing import Callable, Dict, List
+
+from .shared.cancellation import CancelToken, activate
+from .shared.event_bus import job_context
+from .shared.config import logger, MAX_CONCURRENT_TASKS, MAX_QUEUED_TASKS
+from .task_manager import start_task, update_task, bind_cancel_token
+
+# Prioridades (menor = se ejecuta antes)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+# Estado global del módulo
+_queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=MAX_QUEUED_TASKS)
+_sequence = itertools.count()
+_workers: List[threading.Thread] = []
+_lock = threading.Lock()
+_running = 0
+
+
+def _worker_loop() -> None:
+    """Bucle de un worker: toma el siguiente trabajo y lo ejecuta."""
+    global _running
+    while True:
+        _, _, task_ids, func, token = _queue.get()
+        # cancel_task dispara el token del trabajo: no depende de que las tareas
+        # sigan en el historial acotado de task_manager
+        if token.cancelled:
+            _queue.task_done()
+            continue
+        with _lock:
+            _running += 1
+        try:
+            for task_id in task_ids:
+                start_task(task_id)
+            with activate(token), job_context(task_ids):
+                func()
+        except Exception as e:
+            logger.error(f"Error en trabajo del scheduler {task_ids}: {e}", exc_info=True)
+            for task_id in task_ids:
+                update_task(task_id, "FAILED", error=str(e))
+        finally:
+            with _lock:
+                _running -= 1
+            _queue.task_done()
+
+
+def _ensure_workers() -> None:
+    """Inicia los workers bajo demanda (una sola vez por sesión)."""
+    with _lock:
+        while len(_workers) < MAX_CONCURRENT_TASKS:
+            worker = threading.Thread(
+                target=_worker_loop, name=f"task-worker-{len(_workers)}", daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def submit(func: Callable[[], None], task_ids: List[str], priority: int = PRIORITY_NORMAL) -> bool:
+    """
+    Encola un trabajo sin bloquear.
+
+    Las tareas de task_ids deben estar registradas con estado QUEUED; pasan a
+    RUNNING cuando un worker toma el trabajo. Un trabajo puede agrupar varias
+    tareas (ej: un batch multi-host ocupa un solo slot).
+
+    Args:
+        func: Función sin argumentos a ejecutar (debe actualizar sus tareas al terminar)
+        task_ids: IDs de las tareas asociadas al trabajo
+        priority: PRIORITY_HIGH, PRIORITY_NORMAL o PRIORITY_LOW
+
+    Returns:
+        True si se encoló, False si la cola está llena (las tareas quedan FAILED)
+    """
+    _ensure_workers()
+    token = CancelToken()
+    bind_cancel_token(task_ids, token)
+    try:
+        _queue.put_nowait((priority, next(_sequence), list(task_ids), func, token))
+        return True
+    except queue.Full:
+        logger.warning(f"Cola de tareas llena ({MAX_QUEUED_TASKS}), trabajo rechazado: {task_ids}")
+        for task_id in task_ids:
+            update_task(task_id, "FAILED", error="Cola de tareas llena, reintentar más tarde")
+        return False
+
+
+def priority_for_action(action_type: str) -> int:
+    """
+    Prioridad por defecto según el tipo de acción de la opción.
+
+    Las consultas (read-only) son cortas y se adelantan a las acciones que
+    modifican el equipo (instalaciones, mantenimiento), que suelen tardar más.
+
+    Args:
+        action_type: read-only, modify o destructive
+
+    Returns:
+        Prioridad para submit()
+    """
+    return PRIORITY_HIGH if action_type == "read-only" else PRIORITY_NORMAL
+
+
+def get_scheduler_stats() -> Dict[str, int]:
+    """
+    Obtener el estado del scheduler.
+
+    Returns:
+        Diccionario con workers, trabajos en ejecución y trabajos en cola
+    """
+    with _lock:
+        return {
+            "workers": MAX_CONCURRENT_TASKS,
+            "running": _running,
+            "queued": _queue.qsize(),
+        }
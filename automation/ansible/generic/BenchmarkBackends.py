@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BenchmarkBackends.py - Overhead por ejecución de los backends de playbooks
+===========================================================================
+Compara el costo fijo de ejecutar un playbook vacío (localhost, sin tareas
+remotas) con cada backend:
+
+1. subprocess: un proceso ansible-playbook por ejecución
+2. api: worker residente con ansible-core precargado
+3. forkserver: fork por ejecución de un servidor precargado (solo Linux/WSL)
+
+Uso:
+    python generic/BenchmarkBackends.py [iteraciones]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BASE_DIR))
+
+from cli.infrastructure.ansible.playbook_executor import run_subprocess  # noqa: E402
+from cli.infrastructure.ansible.api_executor import (  # noqa: E402
+    api_workers, is_api_backend_available, run_playbook_in_worker
+)
+from cli.infrastructure.ansible.forkserver_executor import (  # noqa: E402
+    is_fork_server_available, start_fork_server, stop_fork_server, run_playbook_in_fork_server
+)
+from cli.shared.config import STDOUT_CALLBACK, CALLBACK_PLUGINS_DIR  # noqa: E402
+
+NOOP_PLAYBOOK = """---
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - name: noop
+      ansible.builtin.meta: noop
+"""
+
+
+def print_section(title):
+    """Imprime un separador de sección."""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}")
+
+
+def measure(runner, cmd, env, iterations):
+    """Ejecuta el comando N veces y retorna la lista de duraciones."""
+    durations = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        returncode, _, stderr = runner(cmd, env, 120)
+        durations.append(time.perf_counter() - start)
+        if returncode != 0:
+            print(f"  ⚠️  Iteración {i + 1} falló (rc={returncode}): {stderr[:200]}")
+    return durations
+
+
+def print_stats(name, durations):
+    """Imprime estadísticas de una serie de duraciones."""
+    print(f"  {name:<12} media={statistics.mean(durations):.3f}s  "
+          f"mediana={statistics.median(durations):.3f}s  "
+          f"min={min(durations):.3f}s  max={max(durations):.3f}s")
+
+
+def main():
+    """Punto de entrada principal."""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
+        f.write(NOOP_PLAYBOOK)
+        playbook = f.name
+
+    cmd = ["ansible-playbook", "-i", "localhost,", "-c", "local", playbook]
+    env = os.environ.copy()
+    env["ANSIBLE_STDOUT_CALLBACK"] = STDOUT_CALLBACK
+    env["ANSIBLE_CALLBACK_PLUGINS"] = str(CALLBACK_PLUGINS_DIR)
+    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+
+    try:
+        print_section(f"BENCHMARK DE BACKENDS ({iterations} iteraciones)")
+        results = {"subprocess": measure(run_subprocess, cmd, env, iterations)}
+
+        if is_api_backend_available():
+            start = time.perf_counter()
+            api_workers.start()
+            print(f"  Arranque del worker API: {time.perf_counter() - start:.3f}s (una vez por sesión)")
+            results["api"] = measure(run_playbook_in_worker, cmd, env, iterations)
+        else:
+            print("  ❌ ansible-core no importable desde este intérprete: se omite el backend api")
+
+        if is_fork_server_available():
+            start = time.perf_counter()
+            start_fork_server()
+            print(f"  Arranque del servidor fork: {time.perf_counter() - start:.3f}s (una vez por sesión)")
+            results["forkserver"] = measure(run_playbook_in_fork_server, cmd, env, iterations)
+        else:
+            print("  ❌ Requiere POSIX y ansible-core: se omite el backend forkserver")
+
+        print_section("RESULTADOS")
+        for name, durations in results.items():
+            print_stats(name, durations)
+
+        for name in ("api", "forkserver"):
+            if name in results:
+                saved = statistics.mean(results["subprocess"]) - statistics.mean(results[name])
+                print(f"\n  Ahorro por ejecución con {name}: {saved:.3f}s")
+    finally:
+        api_workers.stop()
+        stop_fork_server()
+        os.unlink(playbook)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,18 +15,17 @@ Verifica:
 import subprocess
 import socket
 import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BASE_DIR))
+
+from cli.infrastructure.ansible.routing_info import get_default_gateway  # noqa: E402
 
 
 def get_wsl_gateway():
     """Obtiene la IP del gateway de WSL (tu Windows host)."""
-    try:
-        result = subprocess.check_output(
-            "ip route show | grep default | awk '{print $3}'",
-            shell=True
-        ).decode().strip()
-        return result
-    except Exception:
-        return None
+    return get_default_gateway()
 
 
 def resolve_hostname(hostname):
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# IT-Ops CLI - Callback de stdout en JSON por línea (JSONL)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: itops_jsonl
+    short_description: Eventos de ejecución como JSON por línea
+    description:
+        - Emite un objeto JSON por línea en cada evento (inicio de play, inicio de
+          tarea, resultado por host y estadísticas finales) a medida que ocurren.
+        - Lo consume infrastructure/ansible/event_stream.py para construir el
+          resultado de forma incremental y mostrar progreso en vivo.
+        - Cada línea tiene la clave "event"; el resultado final reconstruido tiene
+          la misma estructura que el callback json (plays -> tasks -> hosts, stats).
+    type: stdout
+    requirements:
+      - Set as stdout in config
+'''
+
+import datetime
+import json
+
+from ansible.constants import _ACTION_META
+from ansible.parsing.ajson import AnsibleJSONEncoder
+from ansible.plugins.callback import CallbackBase
+
+
+def current_time():
+    # utcnow() está deprecado desde Python 3.12; se mantiene el formato con Z
+    return datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def count_play_tasks(play):
+    """Cantidad de tareas explícitas del play (sin meta implícitas). None si no se puede calcular."""
+    try:
+        return sum(
+            1
+            for block in play.compile()
+            for task in block.get_tasks()
+            if not (task.action in _ACTION_META and task.implicit)
+        )
+    except Exception:
+        return None
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'stdout'
+    CALLBACK_NAME = 'itops_jsonl'
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display)
+        self.set_options()
+
+    def _emit(self, event, **data):
+        data['event'] = event
+        data['time'] = current_time()
+        self._display.display(json.dumps(data, cls=AnsibleJSONEncoder, sort_keys=True))
+
+    def _task_info(self, task):
+        return {
+            'name': task.get_name(),
+            'id': str(task._uuid),
+            'path': str(task.get_path()),
+        }
+
+    def v2_playbook_on_start(self, playbook):
+        self._emit('playbook_start', playbook=str(playbook._file_name))
+
+    def v2_playbook_on_play_start(self, play):
+        self._emit(
+            'play_start',
+            play={'name': play.get_name(), 'id': str(play._uuid), 'path': str(play.get_path())},
+            task_count=count_play_tasks(play),
+        )
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._emit('task_start', task=self._task_info(task), handler=False)
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self._emit('task_start', task=self._task_info(task), handler=True)
+
+    def _host_result(self, status, result):
+        result_copy = result._result.copy()
+        if status in ('failed', 'skipped'):
+            result_copy[status] = True
+        result_copy['action'] = result._task.action
+        self._emit(
+            'host_result',
+            status=status,
+            host=result._host.get_name(),
+            task=self._task_info(result._task),
+            result=result_copy,
+        )
+
+    def v2_runner_on_ok(self, result, **kwargs):
+        self._host_result('ok', result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._host_result('failed', result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._host_result('unreachable', result)
+
+    def v2_runner_on_skipped(self, result):
+        self._host_result('skipped', result)
+
+    def v2_playbook_on_stats(self, stats):
+        summary = dict((host, stats.summarize(host)) for host in sorted(stats.processed.keys()))
+        custom_stats = dict((str(k), v) for k, v in stats.custom.items()) if stats.custom else {}
+        global_custom_stats = custom_stats.pop('_run', {})
+        self._emit('stats', stats=summary, custom_stats=custom_stats, global_custom_stats=global_custom_stats)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# IT-Ops CLI - Inventario de targets recibido por variable de entorno
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: itops_targets
+    plugin_type: inventory
+    short_description: Targets de IT-Ops CLI armados en memoria
+    description:
+        - Arma el inventario a partir de la variable de entorno ITOPS_INVENTORY
+          (JSON comprimido con zlib y codificado en base64, o JSON plano) que
+          genera infrastructure/ansible/inventory_builder.py.
+        - Todos los targets van al grupo target (hijo de windows_hosts), con su
+          ansible_host si hay IP resuelta y sus variables propias (host_vars,
+          ej. puerto y esquema https); las variables de conexión WinRM se
+          asignan al grupo target.
+        - Se usa con el archivo inventory/itops_targets.yml, así Ansible sigue
+          encontrando inventory/group_vars. Sin la variable el inventario queda vacío.
+    options:
+        plugin:
+            description: Nombre del plugin.
+            required: true
+            choices: ['itops_targets']
+'''
+
+import base64
+import json
+import os
+import zlib
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin
+
+try:
+    # ansible-core >= 2.19: los valores que arma un plugin no son confiables y
+    # sus {{ }} no se renderizan salvo que se marquen (el INI los marca solo)
+    from ansible.template import trust_as_template
+except ImportError:
+    def trust_as_template(value):
+        return value
+
+ENV_VAR = 'ITOPS_INVENTORY'
+CONFIG_FILES = ('itops_targets.yml', 'itops_targets.yaml')
+
+
+def decode_payload(payload):
+    """Decodifica el contenido de ITOPS_INVENTORY (JSON plano o zlib+base64)."""
+    payload = payload.strip()
+    if not payload.startswith('{'):
+        payload = zlib.decompress(base64.b64decode(payload)).decode('utf-8')
+    return json.loads(payload)
+
+
+class InventoryModule(BaseInventoryPlugin):
+    NAME = 'itops_targets'
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and os.path.basename(path) in CONFIG_FILES
+
+    def parse(self, inventory, loader, path, cache=False):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        payload = os.environ.get(ENV_VAR)
+        if not payload:
+            return
+        try:
+            data = decode_payload(payload)
+        except (ValueError, zlib.error) as e:
+            raise AnsibleParserError('%s inválida: %s' % (ENV_VAR, e))
+
+        self.inventory.add_group('windows_hosts')
+        self.inventory.add_group('target')
+        self.inventory.add_child('windows_hosts', 'target')
+        for key, value in data.get('vars', {}).items():
+            if isinstance(value, str):
+                value = trust_as_template(value)
+            self.inventory.set_variable('target', key, value)
+        for hostname, address in data.get('hosts', {}).items():
+            self.inventory.add_host(hostname, group='target')
+            if address and address != hostname:
+                self.inventory.set_variable(hostname, 'ansible_host', address)
+        for hostname, host_vars in data.get('host_vars', {}).items():
+            for key, value in host_vars.items():
+                self.inventory.set_variable(hostname, key, value)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+tests/conftest.py
+=================
+Configuración común de los tests: el paquete cli se importa desde la raíz del proyecto.
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
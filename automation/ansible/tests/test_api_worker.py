@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_api_worker.py
+========================
+Workers residentes del backend "api": trabajos seguidos en un proceso y simultáneos en el pool.
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ansible")
+
+from cli.infrastructure.ansible.api_executor import AnsibleApiWorker, AnsibleApiWorkerPool  # noqa: E402
+from cli.shared.config import INVENTORY_ENV_VAR  # noqa: E402
+
+PLAYBOOK = """
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - debug:
+        msg: "{{ marker }}"
+"""
+
+ENV_PLAYBOOK = """
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - debug:
+        msg: "inventario=[{{ lookup('env', '%s') }}]"
+""" % INVENTORY_ENV_VAR
+
+SLOW_PLAYBOOK = """
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - command: sleep 3
+"""
+
+
+@pytest.fixture
+def worker():
+    api_worker = AnsibleApiWorker()
+    yield api_worker
+    api_worker.stop()
+
+
+def test_consecutive_jobs_in_one_worker(worker, tmp_path):
+    """El segundo trabajo no hereda singletons del primero (CLI args, VaultSecretsContext)."""
+    playbook = tmp_path / "noop.yml"
+    playbook.write_text(PLAYBOOK)
+
+    results = []
+    for marker, vault_password in (("primero", None), ("segundo", "secreto"), ("tercero", None)):
+        cmd = [
+            "ansible-playbook", "-i", "localhost,", "-c", "local",
+            "-e", f"marker={marker}", str(playbook)
+        ]
+        results.append((marker, worker.run(cmd, {}, 120, vault_password=vault_password)))
+
+    for marker, (returncode, stdout, stderr) in results:
+        assert returncode == 0, stderr
+        assert marker in stdout
+
+
+def test_job_env_does_not_leak_into_next_job(worker, tmp_path):
+    """El inventario del trabajo (con la password descifrada) no queda en el worker."""
+    playbook = tmp_path / "env.yml"
+    playbook.write_text(ENV_PLAYBOOK)
+    cmd = ["ansible-playbook", "-i", "localhost,", "-c", "local", str(playbook)]
+
+    _, first, _ = worker.run(cmd, {INVENTORY_ENV_VAR: "secreto"}, 120)
+    returncode, second, stderr = worker.run(cmd, {}, 120)
+
+    assert "inventario=[secreto]" in first
+    assert returncode == 0, stderr
+    assert "inventario=[]" in second
+
+
+def test_pool_runs_concurrent_jobs_in_separate_workers(tmp_path):
+    """Dos trabajos simultáneos no se esperan entre sí: cada uno toma su propio worker."""
+    playbook = tmp_path / "slow.yml"
+    playbook.write_text(SLOW_PLAYBOOK)
+    cmd = ["ansible-playbook", "-i", "localhost,", "-c", "local", str(playbook)]
+    pool = AnsibleApiWorkerPool(2)
+    pool.start()
+    results = []
+    try:
+        single_start = time.time()
+        results.append(pool.run(cmd, {}, 120))
+        single = time.time() - single_start
+
+        threads = [threading.Thread(target=lambda: results.append(pool.run(cmd, {}, 120))) for _ in range(2)]
+        concurrent_start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrent = time.time() - concurrent_start
+    finally:
+        pool.stop()
+
+    assert [returncode for returncode, _, _ in results] == [0, 0, 0]
+    assert len(pool._workers) == 2
+    # Serializados tardarían dos ejecuciones; el segundo worker además arranca en ese lapso
+    assert concurrent < 2 * single
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_ejecutar_batch.py
+============================
+Caso de uso batch: una tarea por target distinto.
+"""
+
+from cli import task_manager, task_scheduler
+from cli.application.use_cases import ejecutar_batch
+from cli.domain.models import MenuOption
+
+
+def test_duplicate_targets_get_a_single_task(monkeypatch):
+    added, submitted = [], []
+    monkeypatch.setattr(task_manager, "add_task", lambda **task: added.append(task))
+    monkeypatch.setattr(task_scheduler, "submit", lambda job, task_ids, priority: submitted.append(task_ids))
+    opcion = MenuOption(key="H1", label="Ping", playbook="health/ping.yml")
+
+    placeholders = ejecutar_batch.ejecutar_batch_use_case(
+        opcion, ["CIT-NB-01", "cit-nb-01", "CIT-NB-02", "CIT-NB-01"]
+    )
+
+    assert [task["target"] for task in added] == ["CIT-NB-01", "CIT-NB-02"]
+    assert len(submitted) == 1 and len(submitted[0]) == 2
+    assert len(placeholders) == 2
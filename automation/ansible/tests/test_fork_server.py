@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_fork_server.py
+=========================
+Backend "forkserver": trabajos reales ejecutados en hijos del servidor, timeout y cancelación.
+"""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+pytest.importorskip("ansible")
+
+from cli.infrastructure.ansible import forkserver_executor  # noqa: E402
+from cli.shared.cancellation import CancelToken, activate  # noqa: E402
+
+PLAYBOOK = """
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - debug:
+        msg: "{{ marker }}"
+"""
+
+# Cada test usa una duración distinta para reconocer su "sleep" entre los procesos
+SLOW_PLAYBOOK = """
+- hosts: localhost
+  gather_facts: no
+  tasks:
+    - command: sleep {seconds}
+"""
+
+pytestmark = pytest.mark.skipif(
+    not forkserver_executor.is_fork_server_available(), reason="Requiere fork y sockets Unix"
+)
+
+
+# group_vars del proyecto de prueba: el servidor los precarga en el cache del DataLoader
+GROUP_VARS = """
+software_share: "fileserver/software"
+office_installer_path: "{{ software_share }}/Office365/setup.exe"
+"""
+
+GROUP_VARS_PLAYBOOK = """
+- hosts: windows_hosts
+  gather_facts: no
+  tasks:
+    - debug:
+        msg: "ruta={{ office_installer_path }}"
+"""
+
+
+@pytest.fixture(scope="module")
+def project_dir(tmp_path_factory):
+    """Directorio base del servidor con inventory/group_vars (como el del repo, sin vault)."""
+    base_dir = tmp_path_factory.mktemp("project")
+    (base_dir / "inventory" / "group_vars").mkdir(parents=True)
+    (base_dir / "inventory" / "group_vars" / "windows_hosts.yml").write_text(GROUP_VARS)
+    (base_dir / "inventory" / "hosts.ini").write_text("[windows_hosts]\nlocalhost ansible_connection=local\n")
+    return base_dir
+
+
+@pytest.fixture(scope="module")
+def fork_server(tmp_path_factory, project_dir):
+    socket_path = tmp_path_factory.mktemp("forkserver") / "fs.sock"
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(forkserver_executor, "SOCKET_PATH", socket_path)
+        monkeypatch.setattr(forkserver_executor, "BASE_DIR", project_dir)
+        assert forkserver_executor.start_fork_server()
+        yield
+        forkserver_executor.stop_fork_server()
+
+
+def _sleeping(seconds):
+    """True si sigue vivo algún "sleep <seconds>" (lo lanza un worker del trabajo)."""
+    expected = f"sleep\0{seconds}\0".encode()
+    for entry in os.listdir("/proc"):
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                if f.read() == expected:
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def _assert_job_killed(seconds):
+    """El trabajo y sus workers (que hacen setsid() en ansible-core >= 2.19) no sobreviven."""
+    if not os.path.isdir("/proc"):
+        return
+    deadline = time.time() + 5
+    while _sleeping(seconds) and time.time() < deadline:
+        time.sleep(0.1)
+    assert not _sleeping(seconds)
+
+
+def _playbook(tmp_path, content):
+    playbook = tmp_path / "playbook.yml"
+    playbook.write_text(content)
+    return ["ansible-playbook", "-i", "localhost,", "-c", "local", str(playbook)]
+
+
+def test_runs_real_jobs(fork_server, tmp_path):
+    """Cada hijo ejecuta su playbook aunque el servidor ya haya hecho la ejecución de calentamiento."""
+    cmd = _playbook(tmp_path, PLAYBOOK)
+    for marker, vault_password in (("primero", None), ("segundo", "secreto")):
+        returncode, stdout, stderr = forkserver_executor.run_playbook_in_fork_server(
+            cmd + ["-e", f"marker={marker}"], {}, 120, vault_password=vault_password
+        )
+        assert returncode == 0, stderr
+        assert marker in stdout
+
+
+def test_group_vars_templates_render(fork_server, project_dir, tmp_path):
+    """Los group_vars precargados por el servidor siguen siendo templates (ansible-core >= 2.19)."""
+    playbook = tmp_path / "group_vars.yml"
+    playbook.write_text(GROUP_VARS_PLAYBOOK)
+    cmd = ["ansible-playbook", "-i", str(project_dir / "inventory" / "hosts.ini"), str(playbook)]
+    returncode, stdout, stderr = forkserver_executor.run_playbook_in_fork_server(cmd, {}, 120)
+    assert returncode == 0, stdout + stderr
+    assert "ruta=fileserver/software/Office365/setup.exe" in stdout
+
+
+def test_timeout_kills_job(fork_server, tmp_path):
+    start = time.time()
+    # Margen para que el worker llegue a lanzar el sleep antes del timeout
+    with pytest.raises(subprocess.TimeoutExpired):
+        forkserver_executor.run_playbook_in_fork_server(
+            _playbook(tmp_path, SLOW_PLAYBOOK.format(seconds=97)), {}, 8
+        )
+    assert time.time() - start < 15
+    _assert_job_killed(97)
+
+
+def test_cancel_before_pid_kills_job(fork_server, tmp_path):
+    """Una cancelación anterior al mensaje con el pid mata al hijo apenas llega el pid."""
+    token = CancelToken()
+    token.cancel()
+    start = time.time()
+    with activate(token), pytest.raises(RuntimeError):
+        forkserver_executor.run_playbook_in_fork_server(
+            _playbook(tmp_path, SLOW_PLAYBOOK.format(seconds=98)), {}, 120
+        )
+    assert time.time() - start < 10
+    _assert_job_killed(98)
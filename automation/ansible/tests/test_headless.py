@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_headless.py
+======================
+Modo headless: códigos de salida distinguibles para cron y scripts.
+"""
+
+import pytest
+
+pytest.importorskip("rich")
+
+from cli import headless  # noqa: E402
+from cli.domain.services import validation_service  # noqa: E402
+
+
+def test_missing_ansible_is_not_reported_as_partial(monkeypatch):
+    monkeypatch.setattr(validation_service.shutil, "which", lambda cmd: None)
+
+    assert headless.main(["H1", "--targets", "CIT-NB-01"]) == headless.EXIT_ENVIRONMENT
+    assert headless.EXIT_ENVIRONMENT != headless.EXIT_PARTIAL
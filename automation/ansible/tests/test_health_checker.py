@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_health_checker.py
+============================
+probe_host con el pool WinRM: transporte del preflight y plazo total del probe.
+"""
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("rich")
+
+from cli.infrastructure.ansible import health_checker  # noqa: E402
+from cli.infrastructure.remote.preflight import ProbeResult  # noqa: E402
+from cli.infrastructure.remote.session_pool import WinRMCredentials  # noqa: E402
+
+SNAPSHOT = json.dumps({"user": "CORP\\ana", "os": "Windows 11", "disk_free": 10.5, "disk_total": 100.0})
+
+
+@pytest.fixture
+def pooled_probe(monkeypatch):
+    """probe_host con credenciales de pool, sin cache ni fact store en disco."""
+    recorded = {}
+    monkeypatch.setattr(health_checker, "decrypt_vault", lambda password: {})
+    monkeypatch.setattr(health_checker, "_pool_credentials", lambda vault_vars: WinRMCredentials("admin", "clave"))
+    monkeypatch.setattr(health_checker, "get_cached", lambda hostname: None)
+    monkeypatch.setattr(health_checker, "put_facts", lambda *args: None)
+    monkeypatch.setattr(
+        health_checker, "record_probe",
+        lambda hostname, online, **details: recorded.update(online=online, **details) or details
+    )
+    return recorded
+
+
+def test_pool_uses_https_when_host_only_answers_on_5986(pooled_probe, monkeypatch):
+    monkeypatch.setattr(health_checker, "preflight_hosts", lambda hostnames: {
+        "CIT-NB-02": ProbeResult("CIT-NB-02", "10.1.0.12", True, "https", 5986)
+    })
+    used = []
+
+    def run_powershell(address, credentials, script):
+        used.append((address, credentials.scheme, credentials.port))
+        return 0, SNAPSHOT, ""
+
+    monkeypatch.setattr(health_checker, "run_powershell", run_powershell)
+
+    probe = health_checker.probe_host("CIT-NB-02", "vault")
+
+    assert used == [("10.1.0.12", "https", 5986)]
+    assert pooled_probe["online"] and pooled_probe["transport"] == "https"
+    assert probe.snapshot.os == "Windows 11"
+
+
+def test_pool_probe_has_overall_deadline(pooled_probe, monkeypatch):
+    monkeypatch.setattr(health_checker, "PROBE_TIMEOUT", 1)
+    monkeypatch.setattr(health_checker, "preflight_hosts", lambda hostnames: {
+        "CIT-NB-01": ProbeResult("CIT-NB-01", "10.1.0.11", True, "http", 5985)
+    })
+    # pywinrm reintentando operaciones vencidas: mucho más que el plazo del probe
+    monkeypatch.setattr(health_checker, "run_powershell", lambda *args: time.sleep(5))
+
+    start = time.monotonic()
+    health_checker.probe_host("CIT-NB-01", "vault")
+
+    assert time.monotonic() - start < 3
+    assert pooled_probe["online"] is False
+    assert pooled_probe["error"] == health_checker.PROBE_TIMEOUT_ERROR[:200]
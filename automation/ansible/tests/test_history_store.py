@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_history_store.py
+===========================
+Historial SQLite: lotes de varios procesos a la vez y vista de la sesión.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from cli import history
+from cli.domain.models import ExecutionResult
+from cli.infrastructure.persistence import history_store
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Proceso escritor: BATCHES lotes de BATCH_SIZE ejecuciones con _write_batch
+WRITER = """
+import time
+from cli.infrastructure.persistence import history_store
+conn = history_store.connect()
+now = time.time()
+for _ in range({batches}):
+    history_store._write_batch(conn, [
+        history_store.HistoryRecord("CIT-NB-01", "Ping", True, now, now, option_key="H1")
+        for _ in range({batch_size})
+    ])
+"""
+
+
+def _result(success, duration):
+    return ExecutionResult(success=success, data=None, stdout="", stderr="", returncode=0, duration=duration)
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    db = tmp_path / "history.db"
+    monkeypatch.setattr(history_store, "HISTORY_DB", db)
+    monkeypatch.setattr(history_store, "_schema_ready", False)
+    monkeypatch.setattr(history_store._local, "conn", None, raising=False)
+    yield db
+    history_store.close_history()
+    conn = getattr(history_store._local, "conn", None)
+    if conn is not None:
+        conn.close()
+
+
+def test_concurrent_writers_do_not_double_count_rollups(history_db):
+    """Con varios procesos escribiendo, el resumen diario suma cada fila una sola vez."""
+    history_store.connect().close()
+    env = {**os.environ, "ITOPS_HISTORY_DB": str(history_db)}
+    script = WRITER.format(batches=40, batch_size=5)
+    writers = [
+        subprocess.Popen([sys.executable, "-c", script], cwd=PROJECT_DIR, env=env)
+        for _ in range(4)
+    ]
+    for writer in writers:
+        assert writer.wait(timeout=120) == 0
+
+    conn = history_store.reader()
+    executions = conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+    rolled_up = conn.execute("SELECT SUM(runs) FROM daily_rollups").fetchone()[0]
+    assert executions == 4 * 40 * 5
+    assert rolled_up == executions
+
+
+def test_clear_history_only_hides_the_session_view(history_db, monkeypatch):
+    monkeypatch.setattr(history, "_session_cleared_at", None)
+    history.add_entry("CIT-NB-01", "Ping", _result(True, 1.0), option_key="H1")
+    assert len(history.get_entries(session_only=True)) == 1
+
+    time.sleep(0.01)
+    history.clear_history()
+    assert history.get_entries(session_only=True) == []
+    # El historial persistente y sus métricas no se tocan
+    assert len(history.get_entries()) == 1
+    assert history.get_stats()[0].runs == 1
+
+    history.add_entry("CIT-NB-02", "Ping", _result(False, 2.0), option_key="H1")
+    assert [entry.hostname for entry in history.get_entries(session_only=True)] == ["CIT-NB-02"]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_inventory_plugin.py
+==============================
+Plugin itops_targets: las variables resueltas coinciden con las del inventario INI.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("ansible")
+
+from cli.infrastructure.ansible import inventory_builder  # noqa: E402
+from cli.shared.config import INVENTORY_ENV_VAR, INVENTORY_PLUGINS_DIR, TARGETS_INVENTORY  # noqa: E402
+
+# Las variables {{ }} del grupo target se renderizan al usarlas
+PLAYBOOK = """
+- hosts: target
+  gather_facts: no
+  tasks:
+    - debug:
+        msg: "{{ inventory_hostname }}|{{ ansible_host | default('') }}|{{ ansible_user }}|{{ ansible_password }}|{{ ansible_port }}|{{ ansible_winrm_scheme }}|{{ ansible_connection }}"
+"""
+
+HOSTS = ["CIT-NB-01", "CIT-NB-02"]
+RESOLVED_IPS = {"CIT-NB-01": "10.1.0.11", "CIT-NB-02": None}
+# CIT-NB-02 solo respondió al preflight por 5986/https
+TRANSPORTS = {"CIT-NB-01": "http", "CIT-NB-02": "https"}
+
+
+def _resolved_hostvars(tmp_path, inventory, env):
+    """Ejecuta el playbook y devuelve las líneas msg de cada host, ordenadas."""
+    playbook = tmp_path / "hostvars.yml"
+    playbook.write_text(PLAYBOOK)
+    cmd = [
+        os.path.join(os.path.dirname(sys.executable), "ansible-playbook"),
+        "-i", str(inventory),
+        "-e", "vault_ansible_user=admin", "-e", "vault_ansible_password=clave",
+        str(playbook),
+    ]
+    # cwd en tmp_path: no se toma el ansible.cfg del repo
+    result = subprocess.run(
+        cmd, cwd=tmp_path, env={**os.environ, **env}, capture_output=True, text=True,
+        stdin=subprocess.DEVNULL, timeout=120
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return sorted(re.findall(r'"msg": "(.*)"', result.stdout))
+
+
+def test_plugin_matches_ini_inventory(tmp_path, monkeypatch):
+    monkeypatch.setattr(inventory_builder, "resolve_target_ip", lambda hostname: None)
+
+    ini_path = tmp_path / "hosts.ini"
+    ini_path.write_text(inventory_builder.build_batch_inventory(
+        HOSTS, resolved_ips=RESOLVED_IPS, transports=TRANSPORTS
+    ))
+    from_ini = _resolved_hostvars(tmp_path, ini_path, {})
+
+    plugin_path = tmp_path / TARGETS_INVENTORY.name
+    plugin_path.write_text(TARGETS_INVENTORY.read_text())
+    from_plugin = _resolved_hostvars(tmp_path, plugin_path, {
+        INVENTORY_ENV_VAR: inventory_builder.build_inventory_payload(
+            HOSTS, resolved_ips=RESOLVED_IPS, transports=TRANSPORTS
+        ),
+        "ANSIBLE_INVENTORY_PLUGINS": str(INVENTORY_PLUGINS_DIR),
+    })
+
+    assert len(from_ini) == len(HOSTS)
+    assert from_plugin == from_ini
+    assert "CIT-NB-01|10.1.0.11|admin|clave|5985|http|winrm" in from_plugin
+    assert "CIT-NB-02|CIT-NB-02|admin|clave|5986|https|winrm" in from_plugin
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_prompts.py
+=====================
+Prompts: elegir "Volver" al cancelar tareas no cancela nada.
+"""
+
+from types import SimpleNamespace
+
+from cli import prompts
+
+
+class _Answer:
+    def __init__(self, value):
+        self.value = value
+
+    def ask(self):
+        return self.value
+
+
+def test_volver_does_not_ask_to_cancel(monkeypatch):
+    task = SimpleNamespace(status="QUEUED", task_name="Ping", target="CIT-NB-01", task_id="abc12345")
+
+    def select_last(message, choices, style):
+        # El usuario elige la última opción ("Volver")
+        return _Answer(choices[-1].value)
+
+    def confirm(message, default=True):
+        raise AssertionError(f"No debía pedir confirmación: {message}")
+
+    monkeypatch.setattr(prompts.questionary, "select", select_last)
+    monkeypatch.setattr(prompts, "interactive_confirm", confirm)
+
+    assert prompts.solicitar_tarea_a_cancelar([task]) is None
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_routing_info.py
+==========================
+Gateway por defecto a partir de tablas con el formato de /proc/net/route.
+"""
+
+import socket
+import struct
+import sys
+
+import pytest
+
+from cli.infrastructure.ansible.routing_info import parse_default_gateway
+
+HEADER = "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT"
+
+
+def _hex(address):
+    """Dirección como la escribe el kernel (orden de bytes nativo)."""
+    return "%08X" % struct.unpack("=I", socket.inet_aton(address))[0]
+
+
+def _route(iface, destination, gateway, flags, metric, mask):
+    return "\t".join([
+        iface, _hex(destination), _hex(gateway), "%04X" % flags, "0", "0", str(metric), _hex(mask), "0", "0", "0"
+    ])
+
+
+def _table(*routes):
+    return "\n".join((HEADER,) + routes) + "\n"
+
+
+def test_single_default_route():
+    table = _table(
+        _route("eth0", "172.20.0.0", "0.0.0.0", 0x0001, 0, "255.255.240.0"),
+        _route("eth0", "0.0.0.0", "172.20.0.1", 0x0003, 0, "0.0.0.0"),
+    )
+    assert parse_default_gateway(table) == "172.20.0.1"
+
+
+def test_no_default_route():
+    table = _table(
+        _route("eth0", "172.20.0.0", "0.0.0.0", 0x0001, 0, "255.255.240.0"),
+        _route("eth0", "10.0.0.0", "172.20.0.1", 0x0003, 0, "255.0.0.0"),
+    )
+    assert parse_default_gateway(table) is None
+    assert parse_default_gateway(HEADER + "\n") is None
+    assert parse_default_gateway("") is None
+
+
+def test_lowest_metric_wins():
+    table = _table(
+        _route("wlan0", "0.0.0.0", "192.168.1.1", 0x0003, 600, "0.0.0.0"),
+        _route("tun0", "0.0.0.0", "10.8.0.1", 0x0003, 50, "0.0.0.0"),
+        _route("eth0", "0.0.0.0", "172.20.0.1", 0x0003, 100, "0.0.0.0"),
+    )
+    assert parse_default_gateway(table) == "10.8.0.1"
+
+
+def test_ignores_routes_down_or_without_gateway():
+    table = _table(
+        _route("tun0", "0.0.0.0", "10.8.0.1", 0x0002, 0, "0.0.0.0"),
+        _route("eth1", "0.0.0.0", "0.0.0.0", 0x0001, 0, "0.0.0.0"),
+        _route("eth0", "0.0.0.0", "172.20.0.1", 0x0003, 100, "0.0.0.0"),
+    )
+    assert parse_default_gateway(table) == "172.20.0.1"
+
+
+def test_malformed_lines_are_skipped():
+    table = _table(
+        "eth0\t00000000",
+        "eth0\tZZZZZZZZ\t0100A8C0\t0003\t0\t0\t0\t00000000",
+        "eth0\t00000000\t0100A8C0\t0003\t0\t0\tmetric\t00000000",
+        "",
+        _route("eth0", "0.0.0.0", "192.168.0.1", 0x0003, 0, "0.0.0.0"),
+    )
+    assert parse_default_gateway(table) == "192.168.0.1"
+
+
+@pytest.mark.skipif(sys.byteorder != "little", reason="Valor escrito por un kernel little endian")
+def test_matches_real_table_order():
+    """Un valor tal cual lo escribe el kernel x86: 0101A8C0 = 192.168.1.1."""
+    table = HEADER + "\neth0\t00000000\t0101A8C0\t0003\t0\t0\t0\t00000000\t0\t0\t0\n"
+    assert parse_default_gateway(table) == "192.168.1.1"
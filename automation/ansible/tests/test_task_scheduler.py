@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_task_scheduler.py
+============================
+Scheduler de tareas: los trabajos cancelados en cola no se ejecutan.
+"""
+
+import threading
+import uuid
+
+from cli import task_manager, task_scheduler
+
+
+def _add_queued_task():
+    task_id = uuid.uuid4().hex[:8]
+    task_manager.add_task(task_id, "Ping", "CIT-NB-01", "health/ping.yml", status="QUEUED")
+    return task_id
+
+
+def test_cancelled_queued_jobs_do_not_run_after_history_eviction(monkeypatch):
+    """Cancelar más tareas en cola que TASK_HISTORY_SIZE no deja que ninguna se ejecute."""
+    monkeypatch.setattr(task_manager, "TASK_HISTORY_SIZE", 2)
+    monkeypatch.setattr(task_scheduler, "MAX_CONCURRENT_TASKS", 1)
+    release = threading.Event()
+    ran = []
+
+    blocker = _add_queued_task()
+    assert task_scheduler.submit(release.wait, [blocker])
+    queued = [_add_queued_task() for _ in range(5)]
+    for task_id in queued:
+        assert task_scheduler.submit(lambda task_id=task_id: ran.append(task_id), [task_id])
+    for task_id in queued:
+        assert task_manager.cancel_task(task_id) == [task_id]
+
+    release.set()
+    task_scheduler._queue.join()
+    task_manager.update_task(blocker, "SUCCESS")
+
+    assert ran == []
+    for task_id in queued:
+        task = task_manager.get_task(task_id)
+        assert task is None or task.status == "CANCELLED"
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+tests/test_vars_cache.py
+========================
+Archivo de variables de los playbooks localhost: limpieza de versiones anteriores.
+"""
+
+import os
+import time
+
+from cli.infrastructure.ansible import vars_cache
+
+
+def test_only_stale_files_older_than_playbook_timeout_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(vars_cache, "VARS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(vars_cache, "load_common_vars", lambda: {"domain": "corp.local"})
+    old = tmp_path / "localhost-0000000000000000.json"
+    recent = tmp_path / "localhost-1111111111111111.json"
+    for stale in (old, recent):
+        stale.write_text("{}")
+    expired = time.time() - vars_cache.PLAYBOOK_TIMEOUT - 60
+    os.utime(old, (expired, expired))
+
+    args = vars_cache.localhost_extra_vars()
+
+    current = tmp_path / args[1][1:]
+    assert args[0] == "--extra-vars" and current.exists()
+    assert not old.exists()
+    # Puede ser el de un playbook que todavía corre
+    assert recent.exists()
+
+
+def test_reused_file_is_touched(tmp_path, monkeypatch):
+    monkeypatch.setattr(vars_cache, "VARS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(vars_cache, "load_common_vars", lambda: {"domain": "corp.local"})
+    current = tmp_path / vars_cache.localhost_extra_vars()[1][1:]
+    expired = time.time() - vars_cache.PLAYBOOK_TIMEOUT - 60
+    os.utime(current, (expired, expired))
+
+    assert vars_cache.localhost_extra_vars()[1] == f"@{current}"
+    assert current.stat().st_mtime > expired + 60